@@ -0,0 +1,98 @@
+"""
+Run time and memory of the daily birthday digest job on a synthetic dataset.
+
+The database is seeded with benchmarks.load.datagen (10M contacts by
+default) and the digests of one day are built with SMTP stubbed out, so the
+numbers cover the indexed scan, the grouping and the rendering only.
+
+Usage: python -m benchmarks.birthday_digest [--contacts 10000000] \
+           [--users 100000] [--db-url postgresql+asyncpg://.../bench] \
+           [--no-seed]
+
+Without --db-url the run uses a temporary SQLite file. A Postgres database
+given with --db-url is dropped and reseeded unless --no-seed is passed.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.load.datagen import seed
+from src.entity.models import Base
+from src.jobs.birthday_digest import send_digests
+from src.services import email as email_service
+
+
+async def run_digest(db_url: str, args: argparse.Namespace) -> None:
+    engine = create_async_engine(db_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        if not args.no_seed:
+            start = time.perf_counter()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await seed(engine, args.users,
+                       max(args.contacts // args.users, 1),
+                       create_schema=True)
+            print(f"Seeded {args.contacts} contacts of {args.users} users "
+                  f"in {time.perf_counter() - start:.1f}s")
+
+        queries = 0
+        contacts = 0
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count_query(*_):
+            nonlocal queries
+            queries += 1
+
+        async def stub_send(message):
+            nonlocal contacts
+            contacts += message.body.count("<li>")
+
+        with patch.object(email_service, "send_message", stub_send):
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                async with session_maker() as db:
+                    sent = await send_digests(db, args.day, rate=1e9,
+                                              chunk_size=args.chunk_size)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        print(f"{args.day}: {sent} digests, {contacts} contacts, "
+              f"{queries} queries in {elapsed:.2f}s, "
+              f"{peak / 1024 / 1024:.1f} MiB peak")
+    finally:
+        await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = args.db_url or \
+            f"sqlite+aiosqlite:///{Path(tmp) / 'bench_digest.db'}"
+        await run_digest(db_url, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--day", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--db-url",
+                        help="Postgres URL; dropped and reseeded")
+    parser.add_argument("--no-seed", action="store_true",
+                        help="Reuse the data already in --db-url")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
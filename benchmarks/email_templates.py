@@ -0,0 +1,50 @@
+"""
+Messages rendered per second for the email templates.
+
+Compares the per-send path FastMail takes with ``template_name`` (a fresh
+Jinja environment and template compilation per message) against the
+precompiled templates in ``src.services.email``.
+
+Usage: python -m benchmarks.email_templates [--count 10000]
+"""
+import argparse
+import time
+
+from jinja2 import Environment, FileSystemLoader
+
+from src.services.email import (TEMPLATE_FOLDER, VERIFY_EMAIL_TEMPLATE,
+                                RESET_PASSWORD_TEMPLATE, build_message,
+                                render_template)
+
+
+def per_send_render(template_name: str, **context) -> str:
+    env = Environment(loader=FileSystemLoader(TEMPLATE_FOLDER))
+    return env.get_template(template_name).render(**context)
+
+
+def measure(label: str, render, template_name: str, count: int) -> None:
+    start = time.perf_counter()
+    for i in range(count):
+        render(template_name, host="http://localhost:8000/",
+               username=f"user{i}", token=f"token-{i}")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {template_name:<22} {count / elapsed:>12,.0f} msg/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for template_name in (VERIFY_EMAIL_TEMPLATE, RESET_PASSWORD_TEMPLATE):
+        measure("per-send environment", per_send_render, template_name,
+                max(args.count // 10, 1))
+        measure("precompiled render", render_template, template_name,
+                args.count)
+        measure("precompiled message", lambda name, **ctx: build_message(
+            f"{ctx['username']}@example.com", "Subject", name, **ctx),
+                template_name, args.count)
+
+
+if __name__ == "__main__":
+    main()
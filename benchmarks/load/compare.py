@@ -0,0 +1,59 @@
+"""
+Diff two load-test reports written by benchmarks.load.run.
+
+Usage: python -m benchmarks.load.compare base.json new.json
+"""
+import argparse
+import json
+
+
+def delta(base: float, new: float) -> str:
+    if not base:
+        return "n/a"
+    return f"{(new - base) / base * 100:+.1f}%"
+
+
+def compare(base: dict, new: dict) -> list[str]:
+    """
+    Build comparison lines for every endpoint present in both reports.
+
+    :param base: dict: The baseline report.
+    :param new: dict: The report to compare against the baseline.
+    :return: list[str]: Formatted table lines.
+    """
+    lines = [f"{'scenario / endpoint':<48} {'rps':>18} {'p50 ms':>18} "
+             f"{'p99 ms':>18}"]
+    new_scenarios = {s["scenario"]: s for s in new["scenarios"]}
+    for base_scenario in base["scenarios"]:
+        new_scenario = new_scenarios.get(base_scenario["scenario"])
+        if new_scenario is None:
+            continue
+        for name, b in base_scenario["endpoints"].items():
+            n = new_scenario["endpoints"].get(name)
+            if n is None:
+                continue
+            label = f"{base_scenario['scenario']} {name}"
+            lines.append(
+                f"{label:<48} "
+                f"{b['rps']:>7} {delta(b['rps'], n['rps']):>10} "
+                f"{b['p50_ms']:>7} {delta(b['p50_ms'], n['p50_ms']):>10} "
+                f"{b['p99_ms']:>7} {delta(b['p99_ms'], n['p99_ms']):>10}")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base['meta'].get('commit')}  ->  "
+          f"new {new['meta'].get('commit')}")
+    print("\n".join(compare(base, new)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Synthetic dataset generator: N users x M contacts.
+
+Every user is confirmed and shares the same password, so the load scenarios
+can log in as any of them. Data is deterministic for a given --seed.
+
+Usage: python -m benchmarks.load.datagen --db-url postgresql+asyncpg://... \
+           --users 1000 --contacts 100 [--create-schema]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from typing import Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.entity.models import Base, Contact, User
+from src.repository.search import rebuild_contact_search_terms
+from src.repository.stats import rebuild_contact_stats
+from src.services.auth import auth_service
+from src.services.birthdays import month_day
+from src.services.normalize import blocking_keys, e164, name_search_keys
+
+BENCH_PASSWORD = "bench123"
+DUPLICATE_RATE = 0.02
+
+FIRST_NAMES = ["Olena", "Andriy", "Maria", "Taras", "Iryna", "Dmytro",
+               "Sofia", "Mykola", "Anna", "Petro", "Oksana", "Yurii",
+               "John", "Jane", "Alice", "Robert", "Emily", "Michael",
+               "Sarah", "David", "Laura", "James", "Linda", "Peter"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko",
+              "Kravchenko", "Oliynyk", "Shevchuk", "Polishchuk", "Lysenko",
+              "Smith", "Johnson", "Williams", "Brown", "Jones", "Miller",
+              "Davis", "Wilson", "Anderson", "Taylor", "Thomas", "Moore"]
+
+
+def bench_email(user_index: int) -> str:
+    return f"bench{user_index}@example.com"
+
+
+def user_rows(count: int, password_hash: str) -> Iterator[dict]:
+    """
+    Generate user rows.
+
+    :param count: int: The number of users.
+    :param password_hash: str: The bcrypt hash shared by all users.
+    :return: Iterator[dict]: Rows for the users table, IDs starting at 1.
+    """
+    for i in range(1, count + 1):
+        yield {"id": i, "username": f"bench{i}", "email": bench_email(i),
+               "password": password_hash, "confirmed": True}
+
+
+def contact_rows(user_ids: range, per_user: int,
+                 rng: random.Random) -> Iterator[dict]:
+    """
+    Generate contact rows for each user.
+
+    :param user_ids: range: The owners of the contacts.
+    :param per_user: int: The number of contacts per user.
+    :param rng: random.Random: The seeded random generator.
+    :return: Iterator[dict]: Rows for the contacts table. About
+        DUPLICATE_RATE of them reuse the phone number of an earlier contact
+        of the same user, for the deduplication scenarios.
+    """
+    today = date.today()
+    for user_id in user_ids:
+        phone_number = None
+        for i in range(per_user):
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            email = (f"{first_name.lower()}.{last_name.lower()}"
+                     f".{user_id}.{i}@example.com")
+            if phone_number is None or rng.random() >= DUPLICATE_RATE:
+                phone_number = f"0{rng.randrange(10 ** 9):09d}"
+            birthday = today - timedelta(days=rng.randrange(365 * 6,
+                                                            365 * 80))
+            yield {
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": email,
+                "phone_number": phone_number,
+                "birthday": birthday,
+                "birthday_md": month_day(birthday),
+                "phone_e164": e164(phone_number),
+                "additional_info": None,
+                "user_id": user_id,
+                **blocking_keys(first_name, last_name, email, phone_number),
+                **name_search_keys(first_name, last_name),
+            }
+
+
+async def insert_chunked(engine: AsyncEngine, table, rows: Iterator[dict],
+                         chunk_size: int) -> int:
+    """
+    Insert rows in executemany chunks, one transaction per chunk.
+
+    :param engine: AsyncEngine: The target engine.
+    :param table: Table: The table to insert into.
+    :param rows: Iterator[dict]: The rows to insert.
+    :param chunk_size: int: The number of rows per chunk.
+    :return: int: The number of rows inserted.
+    """
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            async with engine.begin() as conn:
+                await conn.execute(insert(table), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
+
+
+async def seed(engine: AsyncEngine, users: int, contacts_per_user: int,
+               seed_value: int = 42, chunk_size: int = 5000,
+               create_schema: bool = False) -> None:
+    """
+    Populate a database with the synthetic dataset.
+
+    :param engine: AsyncEngine: The target engine.
+    :param users: int: The number of users.
+    :param contacts_per_user: int: The number of contacts per user.
+    :param seed_value: int: The random seed.
+    :param chunk_size: int: The number of rows per insert.
+    :param create_schema: bool: Create the tables first (instead of alembic).
+    :return: None
+    """
+    if create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    password_hash = auth_service.get_password_hash(BENCH_PASSWORD)
+    rng = random.Random(seed_value)
+    await insert_chunked(engine, User.__table__,
+                         user_rows(users, password_hash), chunk_size)
+    await insert_chunked(engine, Contact.__table__,
+                         contact_rows(range(1, users + 1), contacts_per_user,
+                                      rng), chunk_size)
+    # Core inserts skip the ORM events that keep the counters and the
+    # search terms current
+    async with engine.begin() as conn:
+        await conn.run_sync(rebuild_contact_stats)
+        await conn.run_sync(rebuild_contact_search_terms)
+    if engine.dialect.name == "postgresql":
+        # Explicit IDs were inserted, move the sequence past them
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql(
+                "SELECT setval('users_id_seq', (SELECT max(id) FROM users))")
+            await conn.exec_driver_sql("ANALYZE")
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.db_url)
+    start = time.perf_counter()
+    try:
+        await seed(engine, args.users, args.contacts, args.seed,
+                   args.chunk_size, args.create_schema)
+    finally:
+        await engine.dispose()
+    print(f"Seeded {args.users} users x {args.contacts} contacts "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db-url", required=True)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--contacts", type=int, default=100,
+                        help="Contacts per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--create-schema", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Run load scenarios against the API and write an RPS/latency report.
+
+Seed the database with benchmarks.load.datagen first, then either point
+--base-url at a running server or pass --spawn to start one locally with
+python -m src.server serve (DB_URL and REDIS_* are taken from the
+environment / .env as usual).
+
+Usage: python -m benchmarks.load.run --scenario search-heavy \
+           --concurrency 50 --duration 30 --output base.json [--spawn]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.load.datagen import bench_email
+from benchmarks.load.scenarios import SCENARIOS, Recorder, VirtualUser
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        endpoints[name] = {
+            "count": len(latencies),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "status": {str(code): count for code, count
+                       in sorted(recorder.statuses[name].items())},
+        }
+    total = sum(e["count"] for e in endpoints.values())
+    errors = sum(count for e in endpoints.values()
+                 for code, count in e["status"].items() if int(code) >= 400)
+    return {"requests": total, "rps": round(total / elapsed, 2),
+            "errors": errors, "duration_s": round(elapsed, 2),
+            "endpoints": endpoints}
+
+
+async def run_scenario(base_url: str, scenario: str, concurrency: int,
+                       duration: float, users: int, seed: int = 42,
+                       bypass_rate_limit: bool = True) -> dict:
+    """
+    Drive one scenario with a fixed number of concurrent virtual users.
+
+    :param base_url: str: The URL of the API.
+    :param scenario: str: The name of the scenario in SCENARIOS.
+    :param concurrency: int: The number of concurrent virtual users.
+    :param duration: float: How long to run, in seconds.
+    :param users: int: The number of seeded users to spread the load over.
+    :param seed: int: The random seed.
+    :param bypass_rate_limit: bool: Send a fresh X-Forwarded-For per request.
+    :return: dict: The scenario report.
+    """
+    step = SCENARIOS[scenario]
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                 timeout=30) as client:
+        setup = Recorder()
+        vus = [VirtualUser(client, setup, bench_email(i % users + 1),
+                           random.Random(seed + i), bypass_rate_limit)
+               for i in range(concurrency)]
+        await asyncio.gather(*(vu.login() for vu in vus))
+        await asyncio.gather(*(vu.load_contact_ids() for vu in vus))
+
+        recorder = Recorder()
+        for vu in vus:
+            vu.recorder = recorder
+        deadline = time.perf_counter() + duration
+
+        async def loop(vu: VirtualUser):
+            while time.perf_counter() < deadline:
+                await step(vu)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(loop(vu) for vu in vus))
+        elapsed = time.perf_counter() - start
+    return {"scenario": scenario, "concurrency": concurrency,
+            **summarize(recorder, elapsed)}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def spawn_server(port: int, workers: int):
+    """
+    Start the production server entry point and wait until it answers.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "serve", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        env={**os.environ, "LOG_LEVEL": "WARNING"})
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/api/healthchecker",
+                          timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.2)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def run_all(base_url: str, args: argparse.Namespace) -> list[dict]:
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = []
+    for scenario in scenarios:
+        result = await run_scenario(base_url, scenario, args.concurrency,
+                                    args.duration, args.users, args.seed,
+                                    not args.respect_rate_limit)
+        print(f"{scenario:<14} {result['rps']:>9.1f} rps  "
+              f"{result['errors']} errors")
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", default="all",
+                        choices=["all", *SCENARIOS])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--users", type=int, default=100,
+                        help="Number of seeded users to log in as")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--respect-rate-limit", action="store_true")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start uvicorn locally for the run")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if args.spawn:
+        with spawn_server(args.port, args.workers) as base_url:
+            results = asyncio.run(run_all(base_url, args))
+    else:
+        results = asyncio.run(run_all(args.base_url, args))
+
+    report = {
+        "meta": {"commit": git_commit(),
+                 "timestamp": datetime.now(timezone.utc).isoformat(),
+                 "concurrency": args.concurrency, "duration": args.duration,
+                 "users": args.users, "workers": args.workers},
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Scripted load scenarios. Each scenario is one iteration of a virtual user.
+"""
+import random
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.load.datagen import BENCH_PASSWORD, FIRST_NAMES
+
+
+class Recorder:
+    """
+    Collects latencies and status codes per named endpoint.
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(
+            lambda: defaultdict(int))
+
+    def record(self, name: str, latency: float, status: int) -> None:
+        self.latencies[name].append(latency)
+        self.statuses[name][status] += 1
+
+
+class VirtualUser:
+    """
+    One simulated client logged in as one of the seeded users.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder,
+                 email: str, rng: random.Random, bypass_rate_limit: bool):
+        self.client = client
+        self.recorder = recorder
+        self.email = email
+        self.rng = rng
+        self.bypass_rate_limit = bypass_rate_limit
+        self.access_token: str | None = None
+        self.refresh_token: str | None = None
+        self.contact_ids: list[int] = []
+
+    async def request(self, name: str, method: str, url: str,
+                      **kwargs) -> httpx.Response:
+        headers = kwargs.pop("headers", {})
+        if self.access_token and "Authorization" not in headers:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        if self.bypass_rate_limit:
+            # The limiter keys on X-Forwarded-For; a fresh address per
+            # request still pays the Redis round-trip but is never rejected
+            headers["X-Forwarded-For"] = f"10.{self.rng.randrange(256)}." \
+                                         f"{self.rng.randrange(256)}." \
+                                         f"{self.rng.randrange(256)}"
+        start = time.perf_counter()
+        response = await self.client.request(method, url, headers=headers,
+                                             **kwargs)
+        self.recorder.record(name, time.perf_counter() - start,
+                             response.status_code)
+        return response
+
+    async def login(self) -> None:
+        response = await self.request(
+            "POST /auth/login", "POST", "/api/auth/login",
+            data={"username": self.email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        tokens = response.json()
+        self.access_token = tokens["access_token"]
+        self.refresh_token = tokens["refresh_token"]
+
+    async def load_contact_ids(self) -> None:
+        response = await self.request("GET /contacts", "GET",
+                                      "/api/contacts",
+                                      params={"limit": 500})
+        self.contact_ids = [c["id"] for c in response.json()]
+
+
+async def auth_heavy(vu: VirtualUser) -> None:
+    await vu.login()
+    await vu.request("GET /users/me", "GET", "/api/users/me")
+    response = await vu.request(
+        "GET /auth/refresh_token", "GET", "/api/auth/refresh_token",
+        headers={"Authorization": f"Bearer {vu.refresh_token}"})
+    if response.status_code == 200:
+        vu.access_token = response.json()["access_token"]
+        vu.refresh_token = response.json()["refresh_token"]
+
+
+async def search_heavy(vu: VirtualUser) -> None:
+    await vu.request("GET /contacts", "GET", "/api/contacts",
+                     params={"limit": vu.rng.choice([10, 100, 500]),
+                             "offset": vu.rng.randrange(0, 100)})
+    await vu.request("GET /contacts?first_name", "GET", "/api/contacts",
+                     params={"first_name": vu.rng.choice(FIRST_NAMES)[:3],
+                             "limit": 50})
+    if vu.contact_ids:
+        await vu.request("GET /contacts/{id}", "GET",
+                         f"/api/contacts/{vu.rng.choice(vu.contact_ids)}")
+
+
+async def write_heavy(vu: VirtualUser) -> None:
+    suffix = uuid.uuid4().hex[:12]
+    response = await vu.request("POST /contacts", "POST", "/api/contacts",
+                                json={"first_name": "Load",
+                                      "last_name": "Test",
+                                      "email": f"load.{suffix}@example.com",
+                                      "phone_number": "0501234567",
+                                      "birthday": "1990-01-01"})
+    if response.status_code != 201:
+        return
+    contact_id = response.json()["id"]
+    await vu.request("PUT /contacts/{id}", "PUT",
+                     f"/api/contacts/{contact_id}",
+                     json={"additional_info": f"updated {suffix}"})
+    await vu.request("DELETE /contacts/{id}", "DELETE",
+                     f"/api/contacts/{contact_id}")
+
+
+async def sync_polling(vu: VirtualUser) -> None:
+    await vu.request("GET /contacts/birthdays", "GET",
+                     "/api/contacts/birthdays")
+    await vu.request("GET /contacts", "GET", "/api/contacts",
+                     params={"limit": 100})
+
+
+SCENARIOS = {
+    "auth-heavy": auth_heavy,
+    "search-heavy": search_heavy,
+    "write-heavy": write_heavy,
+    "sync-polling": sync_polling,
+}
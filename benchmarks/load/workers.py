@@ -0,0 +1,73 @@
+"""
+Compare single- and multi-worker throughput on the contacts endpoints.
+
+Starts python -m src.server serve once per worker count and drives the
+contacts scenarios against it with benchmarks.load.run. Seed the database
+with benchmarks.load.datagen first.
+
+Usage: python -m benchmarks.load.workers [--workers 1,4] \
+           [--concurrency 50] [--duration 20] [--output workers.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+from benchmarks.load.run import git_commit, run_scenario, spawn_server
+
+CONTACTS_SCENARIOS = ("search-heavy", "write-heavy")
+
+
+async def run_workers(base_url: str, args: argparse.Namespace) -> dict:
+    results = {}
+    for scenario in CONTACTS_SCENARIOS:
+        results[scenario] = await run_scenario(
+            base_url, scenario, args.concurrency, args.duration, args.users,
+            args.seed)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}",
+                        type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    runs = {}
+    for workers in args.workers:
+        with spawn_server(args.port, workers) as base_url:
+            runs[workers] = asyncio.run(run_workers(base_url, args))
+
+    baseline = runs[args.workers[0]]
+    print(f"{'scenario':<14} {'workers':>7} {'rps':>9} {'p99 ms':>9} "
+          f"{'speedup':>8}")
+    for scenario in CONTACTS_SCENARIOS:
+        for workers, results in runs.items():
+            result = results[scenario]
+            speedup = result["rps"] / max(baseline[scenario]["rps"], 1e-9)
+            p99 = max((e["p99_ms"] for e in result["endpoints"].values()),
+                      default=0)
+            print(f"{scenario:<14} {workers:>7} {result['rps']:>9.1f} "
+                  f"{p99:>9.1f} {speedup:>7.2f}x")
+
+    if args.output:
+        report = {
+            "meta": {"commit": git_commit(),
+                     "timestamp": datetime.now(timezone.utc).isoformat(),
+                     "concurrency": args.concurrency,
+                     "duration": args.duration, "cpus": os.cpu_count()},
+            "workers": runs,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Name search with precomputed keys against normalizing at query time.
+
+For every scale a fresh database is seeded with benchmarks.load.datagen and
+each search is run twice: through get_contacts, which filters on the
+indexed Latin and sound keys, and by brute force, which loads all of the
+user's names and transliterates them for every query. The plain ilike
+search is timed as the baseline.
+
+Usage: python -m benchmarks.name_search [--scales 10000,100000] \
+           [--users 1] [--db-url postgresql+asyncpg://.../bench]
+"""
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.load.datagen import bench_email
+from benchmarks.repository import Context, prepare, run_case
+from src.entity.models import Contact
+from src.repository import contacts as repositories_contacts
+from src.repository import users as repositories_users
+from src.services.normalize import latin_key, sound_key
+
+# Cyrillic queries for names the generator writes in Latin script
+TRANSLIT_QUERY = "Оле"
+PHONETIC_QUERY = "Elena"
+
+
+async def brute_force(db, ctx, query: str, key, prefix: bool):
+    wanted = key(query)
+    rows = await db.execute(
+        select(Contact.id, Contact.first_name, Contact.last_name)
+        .filter_by(user_id=ctx.user.id))
+    matches = []
+    for row in rows:
+        found = key(row.first_name) or ""
+        if found.startswith(wanted) if prefix else found == wanted:
+            matches.append(row)
+    matches.sort(key=lambda row: (row.last_name, row.first_name, row.id))
+    ids = [row.id for row in matches[:100]]
+    await repositories_contacts.get_contacts_by_ids(ids, db, ctx.user)
+
+
+async def bench_contains(db, ctx):
+    await repositories_contacts.get_contacts(100, 0, "Ole", None, None, db,
+                                             ctx.user)
+
+
+async def bench_translit_indexed(db, ctx):
+    await repositories_contacts.get_contacts(100, 0, TRANSLIT_QUERY, None,
+                                             None, db, ctx.user, "translit")
+
+
+async def bench_translit_brute_force(db, ctx):
+    await brute_force(db, ctx, TRANSLIT_QUERY, latin_key, prefix=True)
+
+
+async def bench_phonetic_indexed(db, ctx):
+    await repositories_contacts.get_contacts(100, 0, PHONETIC_QUERY, None,
+                                             None, db, ctx.user, "phonetic")
+
+
+async def bench_phonetic_brute_force(db, ctx):
+    await brute_force(db, ctx, PHONETIC_QUERY, sound_key, prefix=False)
+
+
+CASES = [
+    ("contains (ilike)", bench_contains),
+    ("translit indexed", bench_translit_indexed),
+    ("translit brute force", bench_translit_brute_force),
+    ("phonetic indexed", bench_phonetic_indexed),
+    ("phonetic brute force", bench_phonetic_brute_force),
+]
+
+
+async def run_scale(db_url: str, contacts: int, users: int,
+                    rounds: int) -> None:
+    engine = create_async_engine(db_url)
+    session_maker = async_sessionmaker(engine, autoflush=False,
+                                       expire_on_commit=False)
+    try:
+        await prepare(engine, contacts, users)
+        async with session_maker() as db:
+            user = await repositories_users.get_user_by_email(bench_email(1),
+                                                              db)
+        ctx = Context(user, [])
+        for name, fn in CASES:
+            r = await run_case(session_maker, ctx, fn, rounds)
+            print(f"{contacts:>9} {name:<24} {r['median_ms']:>9.3f} ms "
+                  f"{r['p95_ms']:>9.3f} ms p95 {r['peak_kib']:>9.1f} KiB peak")
+    finally:
+        await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for contacts in args.scales:
+            db_url = args.db_url or \
+                f"sqlite+aiosqlite:///{Path(tmp) / f'names_{contacts}.db'}"
+            await run_scale(db_url, contacts, args.users, args.rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="10000,100000",
+                        type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--users", type=int, default=1,
+                        help="Users the contacts are spread over")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--db-url",
+                        help="Postgres URL; dropped and reseeded per scale")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
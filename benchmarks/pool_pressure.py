@@ -0,0 +1,129 @@
+"""
+Connection pool use of requests whose current user comes from the cache.
+
+A route depending only on auth_service.get_current_user is called by many
+concurrent clients, with the user already cached in (fake) Redis, against a
+sharded SQLite setup. get_db is run two ways:
+
+- eager: the shard is looked up in the shard directory before the route
+  runs, as get_db did before
+- lazy: get_db as it is now, the session looks the shard up on its first
+  statement
+
+and the pool checkouts per request, the peak number of connections in use
+and the throughput are reported.
+
+Usage: python -m benchmarks.pool_pressure [--requests 5000] \
+           [--concurrency 50] [--shards 3]
+"""
+import argparse
+import asyncio
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+from fastapi import Depends, FastAPI, Request
+from sqlalchemy import event
+
+from src.database import db as database
+from src.database.db import ShardRouter, get_db, request_email
+from src.entity.models import Base, User
+from src.services.auth import auth_service
+from src.services.metrics import DB_CONNECTIONS_IN_USE
+
+EMAIL = "deadpool@example.com"
+
+
+async def eager_get_db(request: Request):
+    router = database.shard_router
+    shard = await router.shard_for(await request_email(request))
+    async with router.shards[shard].session() as session:
+        yield session
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(user: User = Depends(auth_service.get_current_user)):
+        return {"email": user.email}
+
+    return app
+
+
+async def run_mode(app: FastAPI, router: ShardRouter, token: str,
+                   args: argparse.Namespace) -> dict:
+    checkouts = 0
+    peak = 0
+
+    def on_checkout(*_):
+        nonlocal checkouts, peak
+        checkouts += 1
+        peak = max(peak, DB_CONNECTIONS_IN_USE.value())
+
+    for shard in router.shards:
+        event.listen(shard.engine.sync_engine, "checkout", on_checkout)
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(None)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"}) as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                response = await client.get("/me")
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    for shard in router.shards:
+        event.remove(shard.engine.sync_engine, "checkout", on_checkout)
+    return {"checkouts_per_request": checkouts / args.requests,
+            "peak_in_use": peak, "rps": args.requests / elapsed}
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        router = ShardRouter([f"sqlite+aiosqlite:///{Path(tmp)}/shard{i}.db"
+                              for i in range(args.shards)])
+        for shard in router.shards:
+            async with shard.engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        cache = fakeredis.FakeRedis()
+        cache.set(EMAIL, pickle.dumps(User(id=1, username="deadpool",
+                                           email=EMAIL, password="hash",
+                                           confirmed=True)))
+        token = await auth_service.create_access_token({"sub": EMAIL})
+        app = make_app()
+        try:
+            with patch.object(database, "shard_router", router), \
+                    patch.object(auth_service, "cache", cache):
+                for mode in ("eager", "lazy"):
+                    app.dependency_overrides.clear()
+                    if mode == "eager":
+                        app.dependency_overrides[get_db] = eager_get_db
+                    r = await run_mode(app, router, token, args)
+                    print(f"{mode:<6} {r['checkouts_per_request']:>6.2f} "
+                          f"checkouts/request {r['peak_in_use']:>4.0f} peak "
+                          f"in use {r['rps']:>8.0f} requests/s")
+        finally:
+            await router.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
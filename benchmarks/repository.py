@@ -0,0 +1,272 @@
+"""
+Microbenchmarks for the functions in src/repository at several dataset sizes.
+
+For every scale a fresh database is seeded with benchmarks.load.datagen and
+every repository function is timed over --rounds calls (min / median / p95)
+and then run once more under tracemalloc to record the bytes allocated and
+the peak traced memory of a single call.
+
+Usage: python -m benchmarks.repository [--scales 1000,100000,1000000] \
+           [--db-url postgresql+asyncpg://.../bench] [--output repo.json]
+
+Without --db-url each scale runs on a temporary SQLite file. A Postgres
+database given with --db-url is dropped and recreated for every scale.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, \
+    create_async_engine
+
+from benchmarks.load.datagen import bench_email, seed
+from src.entity.models import Base, User
+from src.repository import contacts as repositories_contacts
+from src.repository import dedup as repositories_dedup
+from src.repository import search as repositories_search
+from src.repository import stats as repositories_stats
+from src.repository import users as repositories_users
+from src.schemas.contact import ContactCreateSchema, ContactUpdateSchema
+from src.schemas.user import UserSchema
+
+
+class Context:
+    """
+    State shared by the benchmark cases of one scale.
+    """
+
+    def __init__(self, user: User, contact_ids: list[int]):
+        self.user = user
+        self.contact_ids = contact_ids
+        self.created_ids: list[int] = []
+        self.counter = 0
+
+    def next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+async def bench_get_contacts(db, ctx):
+    await repositories_contacts.get_contacts(100, 0, None, None, None, db,
+                                             ctx.user)
+
+
+async def bench_get_contacts_filtered(db, ctx):
+    await repositories_contacts.get_contacts(100, 0, "Ann", None, None, db,
+                                             ctx.user)
+
+
+async def bench_get_contact(db, ctx):
+    contact_id = ctx.contact_ids[ctx.next() % len(ctx.contact_ids)]
+    await repositories_contacts.get_contact(contact_id, db, ctx.user)
+
+
+async def bench_get_contacts_by_ids(db, ctx):
+    await repositories_contacts.get_contacts_by_ids(ctx.contact_ids[:100], db,
+                                                    ctx.user)
+
+
+async def bench_lookup_contacts_by_phone(db, ctx):
+    await repositories_contacts.lookup_contacts_by_phone(
+        [f"0{ctx.next():09d}", "+380501234567", "0671112233"], db, ctx.user)
+
+
+async def bench_autocomplete(db, ctx):
+    await repositories_search.autocomplete("an", 10, db, ctx.user)
+
+
+async def bench_autocomplete_two_words(db, ctx):
+    await repositories_search.autocomplete("ann sh", 10, db, ctx.user)
+
+
+async def bench_create_contact(db, ctx):
+    body = ContactCreateSchema(
+        first_name="Bench", last_name="Mark",
+        email=f"bench.create.{ctx.next()}@example.com",
+        phone_number="0501234567", birthday="1990-01-01")
+    contact = await repositories_contacts.create_contact(body, db, ctx.user)
+    ctx.created_ids.append(contact.id)
+
+
+async def bench_update_contact(db, ctx):
+    contact_id = ctx.created_ids[ctx.next() % len(ctx.created_ids)]
+    body = ContactUpdateSchema(additional_info=f"updated {ctx.counter}")
+    await repositories_contacts.update_contact(contact_id, body, db, ctx.user)
+
+
+async def bench_delete_contact(db, ctx):
+    await repositories_contacts.delete_contact(ctx.created_ids.pop(), db,
+                                               ctx.user)
+
+
+async def bench_get_upcoming_birthdays(db, ctx):
+    await repositories_contacts.get_upcoming_birthdays(db, ctx.user)
+
+
+async def bench_get_contact_stats(db, ctx):
+    await repositories_stats.get_contact_stats(12, db, ctx.user)
+
+
+async def bench_find_duplicate_clusters(db, ctx):
+    await repositories_dedup.find_duplicate_clusters(50, db, ctx.user)
+
+
+async def bench_get_user_by_email(db, ctx):
+    await repositories_users.get_user_by_email(ctx.user.email, db)
+
+
+async def bench_get_unconfirmed_users(db, ctx):
+    await repositories_users.get_unconfirmed_users(0, 1000, db)
+
+
+async def bench_create_user(db, ctx):
+    body = UserSchema(username="benchuser",
+                      email=f"bench.user.{ctx.next()}@example.com",
+                      password="hashed")
+    await repositories_users.create_user(body, db)
+
+
+async def bench_update_token(db, ctx):
+    user = await repositories_users.get_user_by_email(ctx.user.email, db)
+    await repositories_users.update_token(user, f"token{ctx.next()}", db)
+
+
+async def bench_confirmed_email(db, ctx):
+    await repositories_users.confirmed_email(ctx.user.email, db)
+
+
+async def bench_update_avatar_url(db, ctx):
+    await repositories_users.update_avatar_url(
+        ctx.user.email, f"memory://{ctx.next()}", db)
+
+
+async def bench_update_password(db, ctx):
+    user = await repositories_users.get_user_by_email(ctx.user.email, db)
+    await repositories_users.update_password(user, f"hash{ctx.next()}", db)
+
+
+# Order matters: the write cases create, update and then delete contacts
+CASES = [
+    ("contacts.get_contacts", bench_get_contacts),
+    ("contacts.get_contacts[first_name]", bench_get_contacts_filtered),
+    ("contacts.get_contact", bench_get_contact),
+    ("contacts.get_contacts_by_ids[100]", bench_get_contacts_by_ids),
+    ("contacts.lookup_contacts_by_phone[3]", bench_lookup_contacts_by_phone),
+    ("search.autocomplete", bench_autocomplete),
+    ("search.autocomplete[2 words]", bench_autocomplete_two_words),
+    ("contacts.create_contact", bench_create_contact),
+    ("contacts.update_contact", bench_update_contact),
+    ("contacts.delete_contact", bench_delete_contact),
+    ("contacts.get_upcoming_birthdays", bench_get_upcoming_birthdays),
+    ("stats.get_contact_stats", bench_get_contact_stats),
+    ("dedup.find_duplicate_clusters", bench_find_duplicate_clusters),
+    ("users.get_user_by_email", bench_get_user_by_email),
+    ("users.get_unconfirmed_users", bench_get_unconfirmed_users),
+    ("users.create_user", bench_create_user),
+    ("users.update_token", bench_update_token),
+    ("users.confirmed_email", bench_confirmed_email),
+    ("users.update_avatar_url", bench_update_avatar_url),
+    ("users.update_password", bench_update_password),
+]
+# Functions relying on SQL that the dialect does not provide
+UNSUPPORTED: dict[str, set[str]] = {}
+
+
+async def run_case(session_maker, ctx: Context, fn, rounds: int) -> dict:
+    timings = []
+    for _ in range(rounds):
+        async with session_maker() as db:
+            start = time.perf_counter()
+            await fn(db, ctx)
+            timings.append(time.perf_counter() - start)
+
+    async with session_maker() as db:
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await fn(db, ctx)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "min_ms": round(timings[0] * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+        "retained_kib": round((after - before) / 1024, 1),
+        "peak_kib": round((peak - before) / 1024, 1),
+    }
+
+
+async def prepare(engine: AsyncEngine, contacts: int, users: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await seed(engine, users, max(contacts // users, 1), create_schema=True)
+
+
+async def run_scale(db_url: str, contacts: int, users: int,
+                    rounds: int) -> dict:
+    engine = create_async_engine(db_url)
+    session_maker = async_sessionmaker(engine, autoflush=False,
+                                       expire_on_commit=False)
+    try:
+        await prepare(engine, contacts, users)
+        async with session_maker() as db:
+            user = await repositories_users.get_user_by_email(bench_email(1),
+                                                              db)
+            contact_ids = [c.id for c in
+                           await repositories_contacts.get_contacts(
+                               500, 0, None, None, None, db, user)]
+        ctx = Context(user, contact_ids)
+        skip = UNSUPPORTED.get(engine.dialect.name, set())
+        results = {}
+        for name, fn in CASES:
+            if name in skip:
+                continue
+            results[name] = await run_case(session_maker, ctx, fn, rounds)
+            r = results[name]
+            print(f"{contacts:>9} {name:<36} {r['median_ms']:>9.3f} ms "
+                  f"{r['p95_ms']:>9.3f} ms p95 {r['peak_kib']:>9.1f} KiB peak")
+        return results
+    finally:
+        await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    report = {"dialect": None, "scales": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for contacts in args.scales:
+            db_url = args.db_url or \
+                f"sqlite+aiosqlite:///{Path(tmp) / f'bench_{contacts}.db'}"
+            report["dialect"] = db_url.split("+")[0].split(":")[0]
+            report["scales"][contacts] = await run_scale(
+                db_url, contacts, args.users, args.rounds)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1000,100000,1000000",
+                        type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--users", type=int, default=10,
+                        help="Users the contacts are spread over")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--db-url",
+                        help="Postgres URL; dropped and reseeded per scale")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
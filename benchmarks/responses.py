@@ -0,0 +1,130 @@
+"""
+Benchmark response serialization for the contacts and users routes.
+
+Every route's payload is serialized three ways:
+
+- fastapi: response_model validation + jsonable output + stdlib JSONResponse
+  (FastAPI's default, used by every route before)
+- orjson: the same validation with ORJSONResponse, the app-wide default now
+- model_response: pydantic-core validation and JSON dump in one pass, what
+  the routes in src/routes/contacts.py and src/routes/users.py now return
+
+Usage: python -m benchmarks.responses [--rounds 200] [--output resp.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.entity.models import Contact, User
+from src.routes import contacts as contacts_routes
+from src.routes import users as users_routes
+from src.schemas.contact import ContactResponse, ContactShortResponse
+from src.schemas.user import UserResponse
+from src.services.responses import model_response
+
+
+def make_user() -> User:
+    return User(id=1, username="deadpool", email="deadpool@example.com",
+                password="hash", avatar="https://example.com/avatar.jpg",
+                confirmed=True)
+
+
+def make_contacts(count: int, user: User) -> list[Contact]:
+    return [Contact(id=i, first_name=f"First{i}", last_name=f"Last{i}",
+                    email=f"contact{i}@example.com", phone_number="0501234567",
+                    birthday=date(1990, 1 + i % 12, 1 + i % 28),
+                    additional_info="Met at a conference" if i % 2 else None,
+                    created_at=datetime(2024, 1, 1, 12, 0),
+                    updated_at=datetime(2024, 2, 1, 12, 0),
+                    user_id=user.id, user=user)
+            for i in range(1, count + 1)]
+
+
+def routes() -> list[tuple]:
+    """
+    (route, response schema, adapter, payload) for every benchmarked route.
+    """
+    user = make_user()
+    contacts = make_contacts(500, user)
+    return [
+        ("GET /contacts?limit=500", list[ContactResponse],
+         contacts_routes.contact_list_adapter, contacts),
+        ("GET /contacts?limit=10", list[ContactResponse],
+         contacts_routes.contact_list_adapter, contacts[:10]),
+        ("GET /contacts/birthdays", list[ContactShortResponse],
+         contacts_routes.contact_short_list_adapter, contacts[:50]),
+        ("GET /contacts/{id}", ContactResponse,
+         contacts_routes.contact_adapter, contacts[0]),
+        ("POST /contacts", ContactResponse,
+         contacts_routes.contact_adapter, contacts[0]),
+        ("PUT /contacts/{id}", ContactResponse,
+         contacts_routes.contact_adapter, contacts[0]),
+        ("GET /users/me", UserResponse, users_routes.user_adapter, user),
+        ("PATCH /users/avatar", UserResponse, users_routes.user_adapter,
+         user),
+    ]
+
+
+async def fastapi_body(field, payload, response_class) -> bytes:
+    content = await serialize_response(field=field, response_content=payload)
+    return response_class(content).body
+
+
+def timed(fn, rounds: int) -> dict:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {"median_us": round(statistics.median(timings) * 1e6, 1),
+            "p95_us": round(timings[int(len(timings) * 0.95) - 1] * 1e6, 1)}
+
+
+def run(rounds: int) -> dict:
+    loop = asyncio.new_event_loop()
+    report = {}
+    try:
+        for name, schema, adapter, payload in routes():
+            field = create_model_field(name="Response", type_=schema,
+                                       mode="serialization")
+            strategies = {
+                "fastapi": lambda: loop.run_until_complete(
+                    fastapi_body(field, payload, JSONResponse)),
+                "orjson": lambda: loop.run_until_complete(
+                    fastapi_body(field, payload, ORJSONResponse)),
+                "model_response": lambda: model_response(adapter,
+                                                          payload).body,
+            }
+            report[name] = {key: timed(fn, rounds)
+                            for key, fn in strategies.items()}
+            r = report[name]
+            print(f"{name:<26} fastapi {r['fastapi']['median_us']:>9.1f} us"
+                  f"  orjson {r['orjson']['median_us']:>9.1f} us"
+                  f"  model_response {r['model_response']['median_us']:>9.1f}"
+                  f" us")
+    finally:
+        loop.close()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+    report = run(args.rounds)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
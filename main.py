@@ -1,21 +1,63 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import redis.asyncio as redis
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi_limiter import FastAPILimiter, http_default_callback
 from redis import Redis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.middleware.middleware import user_agent_ban_middleware
+from src.database.db import get_db, shard_router
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.middleware import user_agent_ban_middleware, \
+    metrics_middleware
 from src.routes import contacts, auth, users
 from src.conf.config import config
+from src.conf.log import setup_logging
+from src.services.metrics import registry, RATE_LIMIT_REJECTIONS
 import logging
 
+setup_logging(config.LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+async def rate_limit_callback(request: Request, response: Response,
+                              pexpire: int):
+    route = request.scope.get("route")
+    RATE_LIMIT_REJECTIONS.inc(route.path if route else request.url.path)
+    await http_default_callback(request, response, pexpire)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Код для запуску програми; виконується в кожному воркері окремо,
+    # тож пули з'єднань не переходять між процесами
+    r = await redis.Redis(
+        host=config.REDIS_DOMAIN,
+        port=config.REDIS_PORT,
+        db=0,
+        password=config.REDIS_PASSWORD,
+    )
+    await FastAPILimiter.init(r, http_callback=rate_limit_callback)
+    # Кілька воркерів: кожен регулярно записує свої метрики для /metrics
+    snapshots = None
+    if registry.directory is not None:
+        registry.directory.mkdir(parents=True, exist_ok=True)
+        registry.write_snapshot()
+        snapshots = asyncio.create_task(registry.write_snapshots())
+    yield  # Дозволяє виконання програми
+    # Код для завершення програми: запити вже завершені, закриваємо пули
+    if snapshots is not None:
+        snapshots.cancel()
+        registry.write_snapshot()
+    await r.close()  # Закриття підключення до Redis
+    await shard_router.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = ["*"]
 
@@ -27,35 +69,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if config.COMPRESSION_ENCODINGS:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MIN_SIZE,
+        encodings=tuple(config.COMPRESSION_ENCODINGS.split(",")),
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=config.COMPRESSION_ZSTD_LEVEL,
+    )
+
 app.middleware("http")(user_agent_ban_middleware)
+app.middleware("http")(metrics_middleware)
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(contacts.router, prefix="/api")
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Код для запуску програми
-    r = await redis.Redis(
-        host=config.REDIS_DOMAIN,
-        port=config.REDIS_PORT,
-        db=0,
-        password=config.REDIS_PASSWORD,
-    )
-    await FastAPILimiter.init(r)
-    yield  # Дозволяє виконання програми
-    # Код для завершення програми (при необхідності)
-    await r.close()  # Закриття підключення до Redis
-
-app.router.lifespan_context = lifespan # type: ignore
-
-
 @app.get("/")
 def index():
     return {"message": "Contact Application"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(),
+                             media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/healthchecker")
 async def healthchecker(db: AsyncSession = Depends(get_db)):
     try:
@@ -68,5 +110,5 @@ async def healthchecker(db: AsyncSession = Depends(get_db)):
             )
         return {"message": "Welcome to FastAPI!"}
     except Exception as e:
-        print(e)
+        logger.error("Healthcheck failed: %s", e)
         raise HTTPException(status_code=500, detail="Error connecting to the database")
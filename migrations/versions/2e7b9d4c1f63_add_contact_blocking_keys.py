@@ -0,0 +1,97 @@
+"""add contact blocking keys
+
+Revision ID: 2e7b9d4c1f63
+Revises: 8d3f6a2c4e10
+Create Date: 2026-10-19 15:22:48.613920
+
+"""
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e7b9d4c1f63'
+down_revision: Union[str, None] = '8d3f6a2c4e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# A frozen copy of src.services.normalize as of this revision: later changes
+# to it must not change what this migration writes
+_NON_DIGITS = re.compile(r"\D")
+_NAME_TOKENS = re.compile(r"[^\W_]+")
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def blocking_keys(first_name: str | None, last_name: str | None,
+                  email: str | None, phone_number: str | None) -> dict:
+    local = (email or "").rpartition("@")[0] or (email or "")
+    local = local.split("+", 1)[0].strip().lower()
+    tokens = sorted(_NAME_TOKENS.findall(
+        _fold(f"{first_name or ''} {last_name or ''}")))
+    return {"phone_key": _NON_DIGITS.sub("", phone_number or "")[:32] or None,
+            "email_key": local[:64] or None,
+            "name_key": " ".join(tokens)[:64] or None}
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('phone_key', sa.String(length=32),
+                                        nullable=True))
+    op.add_column('contacts', sa.Column('email_key', sa.String(length=64),
+                                        nullable=True))
+    op.add_column('contacts', sa.Column('name_key', sa.String(length=64),
+                                        nullable=True))
+
+    contacts = sa.table('contacts', sa.column('id', sa.Integer),
+                        sa.column('first_name', sa.String),
+                        sa.column('last_name', sa.String),
+                        sa.column('email', sa.String),
+                        sa.column('phone_number', sa.String),
+                        sa.column('phone_key', sa.String),
+                        sa.column('email_key', sa.String),
+                        sa.column('name_key', sa.String))
+    conn = op.get_bind()
+    # Commit the new columns, then fill them in short transactions so the
+    # contacts table isn't locked for the whole backfill
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                sa.select(contacts.c.id, contacts.c.first_name,
+                          contacts.c.last_name, contacts.c.email,
+                          contacts.c.phone_number)
+                .where(contacts.c.id > last_id)
+                .order_by(contacts.c.id).limit(BATCH_SIZE)).all()
+            if not rows:
+                break
+            conn.execute(
+                contacts.update().where(contacts.c.id == sa.bindparam('b_id')),
+                [{'b_id': row.id,
+                  **blocking_keys(row.first_name, row.last_name, row.email,
+                                  row.phone_number)} for row in rows])
+            last_id = rows[-1].id
+
+    op.create_index('ix_contacts_user_phone_key', 'contacts',
+                    ['user_id', 'phone_key'], unique=False)
+    op.create_index('ix_contacts_user_email_key', 'contacts',
+                    ['user_id', 'email_key'], unique=False)
+    op.create_index('ix_contacts_user_name_key', 'contacts',
+                    ['user_id', 'name_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_name_key', table_name='contacts')
+    op.drop_index('ix_contacts_user_email_key', table_name='contacts')
+    op.drop_index('ix_contacts_user_phone_key', table_name='contacts')
+    op.drop_column('contacts', 'name_key')
+    op.drop_column('contacts', 'email_key')
+    op.drop_column('contacts', 'phone_key')
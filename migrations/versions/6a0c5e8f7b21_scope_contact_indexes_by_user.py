@@ -0,0 +1,42 @@
+"""scope contact indexes and email uniqueness by user
+
+Revision ID: 6a0c5e8f7b21
+Revises: 2e7b9d4c1f63
+Create Date: 2026-10-19 16:48:05.277431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a0c5e8f7b21'
+down_revision: Union[str, None] = '2e7b9d4c1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_email', 'contacts',
+                    ['user_id', 'email'], unique=True)
+    op.create_index('ix_contacts_user_name', 'contacts',
+                    ['user_id', 'last_name', 'first_name', 'id'],
+                    unique=False)
+    op.create_index('ix_contacts_user_id', 'contacts', ['user_id', 'id'],
+                    unique=False)
+    op.drop_index('ix_contacts_last_name', table_name='contacts')
+    op.drop_index('ix_contacts_first_name', table_name='contacts')
+    op.drop_index('ix_contacts_email', table_name='contacts')
+
+
+def downgrade() -> None:
+    # Fails if two users now store the same email
+    op.create_index('ix_contacts_email', 'contacts', ['email'], unique=True)
+    op.create_index('ix_contacts_first_name', 'contacts', ['first_name'],
+                    unique=False)
+    op.create_index('ix_contacts_last_name', 'contacts', ['last_name'],
+                    unique=False)
+    op.drop_index('ix_contacts_user_id', table_name='contacts')
+    op.drop_index('ix_contacts_user_name', table_name='contacts')
+    op.drop_index('ix_contacts_user_email', table_name='contacts')
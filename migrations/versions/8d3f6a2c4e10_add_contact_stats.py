@@ -0,0 +1,51 @@
+"""add contact_stats counters
+
+Revision ID: 8d3f6a2c4e10
+Revises: 5b1e9c3f2a71
+Create Date: 2026-10-19 14:05:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f6a2c4e10'
+down_revision: Union[str, None] = '5b1e9c3f2a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUCKETS = {
+    'postgresql': ("to_char(birthday, 'MM')",
+                   "to_char(date_trunc('week', created_at), 'YYYY-MM-DD')"),
+    'sqlite': ("strftime('%m', birthday)",
+               "date(created_at, '-6 days', 'weekday 1')"),
+}
+
+
+def upgrade() -> None:
+    op.create_table('contact_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.String(length=10), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'metric', 'bucket')
+    )
+    month, week = BUCKETS[op.get_bind().dialect.name]
+    op.execute("INSERT INTO contact_stats (user_id, metric, bucket, count) "
+               "SELECT user_id, 'total', '', count(*) FROM contacts "
+               "WHERE user_id IS NOT NULL GROUP BY user_id")
+    for metric, bucket, column in (('birth_month', month, 'birthday'),
+                                   ('added_week', week, 'created_at')):
+        op.execute(
+            "INSERT INTO contact_stats (user_id, metric, bucket, count) "
+            f"SELECT user_id, '{metric}', {bucket}, count(*) FROM contacts "
+            f"WHERE user_id IS NOT NULL AND {column} IS NOT NULL "
+            f"GROUP BY user_id, {bucket}")
+
+
+def downgrade() -> None:
+    op.drop_table('contact_stats')
@@ -0,0 +1,83 @@
+"""add contact phone_e164
+
+Revision ID: 9c5d1e7a3b48
+Revises: f4a2c8e6b1d3
+Create Date: 2026-10-19 21:58:02.730146
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.conf.config import config
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c5d1e7a3b48'
+down_revision: Union[str, None] = 'f4a2c8e6b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# A frozen copy of src.services.normalize.e164 as of this revision: later
+# changes to it must not change what this migration writes. The default
+# region still comes from the settings of the deployment.
+_NON_DIGITS = re.compile(r"\D")
+
+
+def e164(phone_number: str | None) -> str | None:
+    text = (phone_number or "").strip()
+    digits = _NON_DIGITS.sub("", text)
+    if not text.startswith("+"):
+        if digits.startswith("00"):
+            digits = digits[2:]
+        elif digits:
+            trunk = config.PHONE_TRUNK_PREFIX
+            if trunk and digits.startswith(trunk):
+                digits = digits[len(trunk):]
+            digits = config.PHONE_COUNTRY_CODE + digits
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return f"+{digits}"
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('phone_e164', sa.String(length=16),
+                                        nullable=True))
+
+    contacts = sa.table('contacts', sa.column('id', sa.Integer),
+                        sa.column('user_id', sa.Integer),
+                        sa.column('phone_number', sa.String),
+                        sa.column('phone_e164', sa.String))
+    conn = op.get_bind()
+    # Commit the new column, then fill it in short transactions so the
+    # contacts table isn't locked for the whole backfill
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                sa.select(contacts.c.id, contacts.c.user_id,
+                          contacts.c.phone_number)
+                .where(contacts.c.id > last_id)
+                .order_by(contacts.c.id).limit(BATCH_SIZE)).all()
+            if not rows:
+                break
+            # With user_id each update only touches its own partition
+            conn.execute(
+                contacts.update().where(
+                    contacts.c.id == sa.bindparam('b_id'),
+                    contacts.c.user_id == sa.bindparam('b_user_id')),
+                [{'b_id': row.id, 'b_user_id': row.user_id,
+                  'phone_e164': e164(row.phone_number)} for row in rows])
+            last_id = rows[-1].id
+
+    op.create_index('ix_contacts_user_phone_e164', 'contacts',
+                    ['user_id', 'phone_e164'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_phone_e164', table_name='contacts')
+    op.drop_column('contacts', 'phone_e164')
@@ -0,0 +1,189 @@
+"""hash partition contacts by user_id
+
+Revision ID: b3f1c7a9d5e2
+Revises: 6a0c5e8f7b21
+Create Date: 2026-10-19 18:12:40.551806
+
+On Postgres the table is rebuilt online:
+
+1. create contacts_partitioned, PARTITION BY HASH (user_id), with the
+   primary key (id, user_id) since unique keys must contain the partition
+   key;
+2. a trigger on contacts mirrors every insert, update and delete into it;
+3. existing rows are copied in keyset batches of -x batch_size (default
+   5000), each committed on its own, so writers are never blocked for long;
+4. rows deleted while their batch was being copied are removed again;
+5. the tables are swapped under a short ACCESS EXCLUSIVE lock.
+
+The number of partitions is -x partitions (default 16), e.g.
+``alembic -x partitions=32 upgrade head``.
+
+Other databases only get user_id made NOT NULL, which it is on every
+database from here on: the mapper identifies contacts by (id, user_id).
+Contacts without a user_id must be deleted or reassigned first.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c7a9d5e2'
+down_revision: Union[str, None] = '6a0c5e8f7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('id', 'first_name', 'last_name', 'email', 'phone_number',
+           'birthday', 'additional_info', 'created_at', 'updated_at',
+           'user_id', 'phone_key', 'email_key', 'name_key')
+# name -> (columns, unique)
+INDEXES = {
+    'ix_contacts_user_email': ('user_id, email', True),
+    'ix_contacts_user_name': ('user_id, last_name, first_name, id', False),
+    'ix_contacts_user_id': ('user_id, id', False),
+    'ix_contacts_user_phone_key': ('user_id, phone_key', False),
+    'ix_contacts_user_email_key': ('user_id, email_key', False),
+    'ix_contacts_user_name_key': ('user_id, name_key', False),
+}
+COLUMN_DDL = """
+    id integer NOT NULL DEFAULT nextval('contacts_id_seq'),
+    first_name varchar(20) NOT NULL,
+    last_name varchar(20) NOT NULL,
+    email varchar(50) NOT NULL,
+    phone_number varchar NOT NULL,
+    birthday date NOT NULL,
+    additional_info varchar,
+    created_at timestamp without time zone,
+    updated_at timestamp without time zone,
+    user_id integer {user_id_null} REFERENCES users (id),
+    phone_key varchar(32),
+    email_key varchar(64),
+    name_key varchar(64)
+"""
+
+
+def _options() -> tuple[int, int]:
+    args = context.get_x_argument(as_dictionary=True)
+    return int(args.get('partitions', 16)), int(args.get('batch_size', 5000))
+
+
+def _create_indexes(table: str, suffix: str) -> None:
+    for name, (columns, unique) in INDEXES.items():
+        op.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX "
+                   f"{name}{suffix} ON {table} ({columns})")
+
+
+def _rename_indexes(suffix: str) -> None:
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name}{suffix} RENAME TO {name}")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    orphans = conn.execute(
+        sa.text("SELECT count(*) FROM contacts WHERE user_id IS NULL")
+    ).scalar()
+    if orphans:
+        raise RuntimeError(f"{orphans} contacts have no user_id; delete or "
+                           f"reassign them before partitioning")
+    if conn.dialect.name != 'postgresql':
+        with op.batch_alter_table('contacts') as batch_op:
+            batch_op.alter_column('user_id', existing_type=sa.Integer(),
+                                  nullable=False)
+        return
+    partitions, batch_size = _options()
+
+    columns = ', '.join(COLUMNS)
+    op.execute(f"CREATE TABLE contacts_partitioned "
+               f"({COLUMN_DDL.format(user_id_null='NOT NULL')}, "
+               f"PRIMARY KEY (id, user_id)) PARTITION BY HASH (user_id)")
+    for remainder in range(partitions):
+        op.execute(f"CREATE TABLE contacts_p{remainder} PARTITION OF "
+                   f"contacts_partitioned FOR VALUES WITH "
+                   f"(MODULUS {partitions}, REMAINDER {remainder})")
+    _create_indexes('contacts_partitioned', '_new')
+
+    new_values = ', '.join(f'NEW.{column}' for column in COLUMNS)
+    updates = ', '.join(f'{column} = EXCLUDED.{column}'
+                        for column in COLUMNS if column not in ('id',
+                                                                'user_id'))
+    op.execute(f"""
+        CREATE FUNCTION contacts_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE'
+                                    AND OLD.user_id <> NEW.user_id) THEN
+                DELETE FROM contacts_partitioned
+                WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO contacts_partitioned ({columns})
+                VALUES ({new_values})
+                ON CONFLICT (id, user_id) DO UPDATE SET {updates};
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("CREATE TRIGGER contacts_mirror AFTER INSERT OR UPDATE OR "
+               "DELETE ON contacts FOR EACH ROW "
+               "EXECUTE FUNCTION contacts_mirror()")
+
+    # Commit the new table and the trigger, then copy in short transactions
+    with op.get_context().autocommit_block():
+        last_id = 0
+        max_id = conn.execute(
+            sa.text("SELECT coalesce(max(id), 0) FROM contacts")).scalar()
+        while last_id < max_id:
+            conn.execute(sa.text(
+                f"INSERT INTO contacts_partitioned ({columns}) "
+                f"SELECT {columns} FROM contacts "
+                f"WHERE id > :low AND id <= :high "
+                f"ON CONFLICT (id, user_id) DO NOTHING"),
+                {'low': last_id, 'high': last_id + batch_size})
+            last_id += batch_size
+        # A row copied from a snapshot taken before its delete committed
+        # outlives the delete; nothing can add such rows any more
+        conn.execute(sa.text(
+            "DELETE FROM contacts_partitioned p WHERE NOT EXISTS "
+            "(SELECT 1 FROM contacts c WHERE c.id = p.id)"))
+
+    op.execute("LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER contacts_mirror ON contacts")
+    op.execute("DROP FUNCTION contacts_mirror()")
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY "
+               "contacts_partitioned.id")
+    op.execute("DROP TABLE contacts")
+    op.execute("ALTER TABLE contacts_partitioned RENAME TO contacts")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT "
+               "contacts_partitioned_pkey TO contacts_pkey")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT "
+               "contacts_partitioned_user_id_fkey TO contacts_user_id_fkey")
+    _rename_indexes('_new')
+    op.execute("ANALYZE contacts")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('contacts') as batch_op:
+            batch_op.alter_column('user_id', existing_type=sa.Integer(),
+                                  nullable=True)
+        return
+    columns = ', '.join(COLUMNS)
+    # Offline: contacts are locked for the duration of the copy
+    op.execute("LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"CREATE TABLE contacts_unpartitioned "
+               f"({COLUMN_DDL.format(user_id_null='NULL')}, "
+               f"PRIMARY KEY (id))")
+    op.execute(f"INSERT INTO contacts_unpartitioned ({columns}) "
+               f"SELECT {columns} FROM contacts")
+    _create_indexes('contacts_unpartitioned', '_old')
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY "
+               "contacts_unpartitioned.id")
+    op.execute("DROP TABLE contacts")
+    op.execute("ALTER TABLE contacts_unpartitioned RENAME TO contacts")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT "
+               "contacts_unpartitioned_pkey TO contacts_pkey")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT "
+               "contacts_unpartitioned_user_id_fkey TO contacts_user_id_fkey")
+    _rename_indexes('_old')
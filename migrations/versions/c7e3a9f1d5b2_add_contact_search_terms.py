@@ -0,0 +1,91 @@
+"""add contact search terms
+
+Revision ID: c7e3a9f1d5b2
+Revises: 9c5d1e7a3b48
+Create Date: 2026-10-19 23:06:41.375820
+
+"""
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e3a9f1d5b2'
+down_revision: Union[str, None] = '9c5d1e7a3b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# A frozen copy of src.services.normalize as of this revision: later changes
+# to it must not change what this migration writes
+_NAME_TOKENS = re.compile(r"[^\W_]+")
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def search_terms(first_name: str | None, last_name: str | None,
+                 email: str | None) -> set[tuple[str, str]]:
+    terms = {("email", _fold((email or "").strip())[:64])}
+    for field, name in (("first_name", first_name), ("last_name", last_name)):
+        terms.update((field, token[:64])
+                     for token in _NAME_TOKENS.findall(_fold(name or "")))
+    return {(field, term) for field, term in terms if term}
+
+
+def upgrade() -> None:
+    terms = op.create_table('contact_search_terms',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    # Byte order on Postgres: a prefix is one contiguous range of the key
+    sa.Column('term', sa.String(length=64).with_variant(
+        sa.String(length=64, collation='C'), 'postgresql'), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=10), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'term', 'contact_id', 'field')
+    )
+
+    contacts = sa.table('contacts', sa.column('id', sa.Integer),
+                        sa.column('user_id', sa.Integer),
+                        sa.column('first_name', sa.String),
+                        sa.column('last_name', sa.String),
+                        sa.column('email', sa.String))
+    conn = op.get_bind()
+    # Commit the new table, then fill it in short transactions instead of
+    # one that lasts the whole backfill
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                sa.select(contacts.c.id, contacts.c.user_id,
+                          contacts.c.first_name, contacts.c.last_name,
+                          contacts.c.email)
+                .where(contacts.c.id > last_id,
+                       contacts.c.user_id.is_not(None))
+                .order_by(contacts.c.id).limit(BATCH_SIZE)).all()
+            if not rows:
+                break
+            values = [{'user_id': row.user_id, 'contact_id': row.id,
+                       'field': field, 'term': term}
+                      for row in rows
+                      for field, term in search_terms(
+                          row.first_name, row.last_name, row.email)]
+            if values:
+                conn.execute(terms.insert(), values)
+            last_id = rows[-1].id
+
+    op.create_index('ix_contact_search_terms_contact', 'contact_search_terms',
+                    ['user_id', 'contact_id', 'term'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_search_terms_contact',
+                  table_name='contact_search_terms')
+    op.drop_table('contact_search_terms')
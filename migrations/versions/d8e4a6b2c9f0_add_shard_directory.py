@@ -0,0 +1,30 @@
+"""add shard directory
+
+Revision ID: d8e4a6b2c9f0
+Revises: b3f1c7a9d5e2
+Create Date: 2026-10-19 19:31:56.084417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e4a6b2c9f0'
+down_revision: Union[str, None] = 'b3f1c7a9d5e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('shard_directory',
+    sa.Column('email', sa.String(length=150), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('email')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('shard_directory')
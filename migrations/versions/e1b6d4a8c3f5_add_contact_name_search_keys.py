@@ -0,0 +1,159 @@
+"""add contact name search keys
+
+Revision ID: e1b6d4a8c3f5
+Revises: c7e3a9f1d5b2
+Create Date: 2026-10-20 00:14:27.918305
+
+"""
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b6d4a8c3f5'
+down_revision: Union[str, None] = 'c7e3a9f1d5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+PAGE_ORDER = ['last_name', 'first_name', 'id']
+# name -> (key column, trailing columns)
+INDEXES = {
+    'ix_contacts_user_first_latin': ('first_name_latin', []),
+    'ix_contacts_user_last_latin': ('last_name_latin', []),
+    'ix_contacts_user_first_sound': ('first_name_sound', PAGE_ORDER),
+    'ix_contacts_user_last_sound': ('last_name_sound', PAGE_ORDER),
+}
+
+# A frozen copy of src.services.normalize as of this revision: later changes
+# to it must not change what this migration writes
+_NAME_TOKENS = re.compile(r"[^\W_]+")
+_CYRILLIC = dict(zip(
+    "абвгґдеєжзиіїйклмнопрстуфхцчшщьюяёъыэў",
+    ["a", "b", "v", "h", "g", "d", "e", "ie", "zh", "z", "y", "i", "i", "i",
+     "k", "l", "m", "n", "o", "p", "r", "s", "t", "u", "f", "kh", "ts", "ch",
+     "sh", "shch", "", "iu", "ia", "e", "", "y", "e", "u"]))
+_CYRILLIC_INITIAL = {"є": "ye", "ї": "yi", "й": "y", "ю": "yu", "я": "ya"}
+_APOSTROPHES = "'’ʼ"
+_VOWELS = "aeiouy"
+_SOUND_GROUPS = {"shch": "S", "tsch": "C", "sch": "S", "dzh": "J", "tch": "C",
+                 "sh": "S", "zh": "J", "ch": "C", "kh": "H", "ts": "Z",
+                 "tz": "Z", "ph": "F", "th": "T", "ck": "K", "gh": "G"}
+_SOUND_GROUP = re.compile("|".join(_SOUND_GROUPS))
+_SOUND_LETTERS = {"b": "B", "d": "D", "f": "F", "g": "G", "k": "K", "l": "L",
+                  "m": "M", "n": "N", "p": "P", "q": "K", "r": "R", "s": "S",
+                  "t": "T", "v": "V", "w": "V", "x": "KS", "z": "S"}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def _latin_key(text: str | None) -> str | None:
+    text = unicodedata.normalize("NFC", (text or "").casefold())
+    latin = []
+    in_word = False
+    for char in text:
+        if char in _APOSTROPHES:
+            continue
+        spelled = _CYRILLIC_INITIAL.get(char) if not in_word else None
+        latin.append(spelled or _CYRILLIC.get(char, char))
+        in_word = char.isalpha()
+    words = _NAME_TOKENS.findall(_fold("".join(latin)))
+    return " ".join(words)[:64] or None
+
+
+def _sound_word(word: str) -> str:
+    word = _SOUND_GROUP.sub(lambda match: _SOUND_GROUPS[match.group()], word)
+    codes = []
+    last = ""
+    for i, char in enumerate(word):
+        following = word[i + 1:i + 2]
+        before_vowel = bool(following) and following in _VOWELS
+        if char in _VOWELS or char == "j" and not before_vowel:
+            if i == 0:
+                codes.append("A")
+            last = ""
+            continue
+        if char == "j":
+            code = "J"
+        elif char == "h":
+            code = "G" if before_vowel else ""
+        elif char == "c":
+            code = "S" if following and following in "eiy" else "K"
+        else:
+            code = char if char.isupper() else _SOUND_LETTERS.get(char, "")
+        if code and code != last:
+            codes.append(code)
+            last = code[-1]
+    return "".join(codes)
+
+
+def _sound_key(text: str | None) -> str | None:
+    words = [_sound_word(word) for word in (_latin_key(text) or "").split()]
+    return " ".join(word for word in words if word)[:32] or None
+
+
+def name_search_keys(first_name: str | None, last_name: str | None) -> dict:
+    return {"first_name_latin": _latin_key(first_name),
+            "last_name_latin": _latin_key(last_name),
+            "first_name_sound": _sound_key(first_name),
+            "last_name_sound": _sound_key(last_name)}
+
+
+def upgrade() -> None:
+    # Byte order on Postgres: a prefix is one contiguous range of the index
+    latin = sa.String(length=64).with_variant(
+        sa.String(length=64, collation='C'), 'postgresql')
+    op.add_column('contacts', sa.Column('first_name_latin', latin,
+                                        nullable=True))
+    op.add_column('contacts', sa.Column('last_name_latin', latin,
+                                        nullable=True))
+    op.add_column('contacts', sa.Column('first_name_sound',
+                                        sa.String(length=32), nullable=True))
+    op.add_column('contacts', sa.Column('last_name_sound',
+                                        sa.String(length=32), nullable=True))
+
+    contacts = sa.table('contacts', sa.column('id', sa.Integer),
+                        sa.column('user_id', sa.Integer),
+                        sa.column('first_name', sa.String),
+                        sa.column('last_name', sa.String),
+                        *(sa.column(column, sa.String)
+                          for column, _ in INDEXES.values()))
+    conn = op.get_bind()
+    # Commit the new columns, then fill them in short transactions so the
+    # contacts table isn't locked for the whole backfill
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                sa.select(contacts.c.id, contacts.c.user_id,
+                          contacts.c.first_name, contacts.c.last_name)
+                .where(contacts.c.id > last_id)
+                .order_by(contacts.c.id).limit(BATCH_SIZE)).all()
+            if not rows:
+                break
+            # With user_id each update only touches its own partition
+            conn.execute(
+                contacts.update().where(
+                    contacts.c.id == sa.bindparam('b_id'),
+                    contacts.c.user_id == sa.bindparam('b_user_id')),
+                [{'b_id': row.id, 'b_user_id': row.user_id,
+                  **name_search_keys(row.first_name, row.last_name)}
+                 for row in rows])
+            last_id = rows[-1].id
+
+    for name, (column, trailing) in INDEXES.items():
+        op.create_index(name, 'contacts', ['user_id', column, *trailing],
+                        unique=False)
+
+
+def downgrade() -> None:
+    for name, (column, _) in INDEXES.items():
+        op.drop_index(name, table_name='contacts')
+        op.drop_column('contacts', column)
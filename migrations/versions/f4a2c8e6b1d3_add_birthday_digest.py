@@ -0,0 +1,58 @@
+"""add contact birthday_md and job checkpoints
+
+Revision ID: f4a2c8e6b1d3
+Revises: d8e4a6b2c9f0
+Create Date: 2026-10-19 20:47:13.209554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a2c8e6b1d3'
+down_revision: Union[str, None] = 'd8e4a6b2c9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 50000
+MONTH_DAY = {
+    'postgresql': "(EXTRACT(MONTH FROM birthday) * 100 "
+                  "+ EXTRACT(DAY FROM birthday))::smallint",
+    'sqlite': "CAST(strftime('%m%d', birthday) AS INTEGER)",
+}
+
+
+def upgrade() -> None:
+    op.create_table('job_checkpoints',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.add_column('contacts', sa.Column('birthday_md', sa.SmallInteger(),
+                                        nullable=True))
+
+    conn = op.get_bind()
+    month_day = MONTH_DAY[conn.dialect.name]
+    # Commit the new column, then fill it in short transactions so the
+    # contacts table isn't locked for the whole backfill
+    with op.get_context().autocommit_block():
+        max_id = conn.execute(
+            sa.text("SELECT coalesce(max(id), 0) FROM contacts")).scalar()
+        for low in range(0, max_id, BATCH_SIZE):
+            conn.execute(sa.text(
+                f"UPDATE contacts SET birthday_md = {month_day} "
+                f"WHERE id > :low AND id <= :high"),
+                {'low': low, 'high': low + BATCH_SIZE})
+
+    op.create_index('ix_contacts_birthday_md', 'contacts',
+                    ['birthday_md', 'user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_birthday_md', table_name='contacts')
+    op.drop_column('contacts', 'birthday_md')
+    op.drop_table('job_checkpoints')
@@ -16,9 +16,40 @@ class Settings(BaseSettings):
     REDIS_DOMAIN: str = 'localhost'
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str | None = None
+    LOG_LEVEL: str = "INFO"
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int | None = None
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    DB_ECHO: bool = False
+    # Comma-separated URLs of shards 1..N-1; DB_URL is shard 0
+    DB_SHARD_URLS: str = ""
+    # Country calling code of phone numbers entered without one, and the
+    # trunk prefix such national numbers may start with
+    PHONE_COUNTRY_CODE: str = "380"
+    PHONE_TRUNK_PREFIX: str = "0"
+    SLOW_QUERY_MS: float = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+    SQL_PROFILE_ENABLED: bool = False
+    # Where worker processes share their metrics; set by `serve` for >1 worker
+    METRICS_DIR: str = ""
     CLD_NAME: str = 'web'
     CLD_API_KEY: int = 373869467823731
     CLD_API_SECRET: str = "secret"
+    AVATAR_MAX_BYTES: int = 5 * 1024 * 1024
+    AVATAR_STORAGE: str = "cloudinary"
+    AVATAR_LOCAL_DIR: str = "avatars"
+    AVATAR_BASE_URL: str = "/api/users/avatars"
+    S3_BUCKET: str = "avatars"
+    S3_PUBLIC_URL: str = ""
+    S3_ENDPOINT_URL: str | None = None
+    S3_ACCESS_KEY: str | None = None
+    S3_SECRET_KEY: str | None = None
 
     @field_validator('ALGORITHM')
     @classmethod
@@ -27,6 +58,13 @@ class Settings(BaseSettings):
             raise ValueError("algorithm must be HS256 or HS512")
         return v
 
+    @field_validator('AVATAR_STORAGE')
+    @classmethod
+    def validate_avatar_storage(cls, v: Any):
+        if v not in ["cloudinary", "local", "s3"]:
+            raise ValueError("avatar storage must be cloudinary, local or s3")
+        return v
+
     model_config = ConfigDict(extra='ignore', env_file=".env", env_file_encoding="utf-8")  # noqa
 
 
@@ -0,0 +1,41 @@
+import json
+import logging
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects.
+
+    Fields passed with ``extra={...}`` are added to the object.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level: str) -> None:
+    """
+    Send application logs to stderr as JSON at the given level.
+
+    Records below the level are discarded before any formatting happens.
+
+    :param level: str: The minimum level name, e.g. "INFO".
+    :return: None
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    logging.basicConfig(level=level.upper(), handlers=[handler])
@@ -7,4 +7,7 @@ INVALID_REFRESH_TOKEN ="Invalid refresh token"
 VERIFICATION_ERROR = "Verification error"
 USER_NOT_FOUND = "User not found"
 INVALID_TOKEN_OR_USER = "Invalid token or user"
-CONTACT_NOT_FOUND = "Contact not found"
\ No newline at end of file
+CONTACT_NOT_FOUND = "Contact not found"
+AVATAR_TOO_LARGE = "Avatar file is too large"
+INVALID_IMAGE = "Invalid image file"
+AVATAR_NOT_FOUND = "Avatar not found"
\ No newline at end of file
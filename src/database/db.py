@@ -1,40 +1,211 @@
 import contextlib
+import logging
+import zlib
+
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
     async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
 from src.conf.config import config
+from src.database.instrumentation import instrument
+from src.entity.models import ShardDirectory
+
+logger = logging.getLogger(__name__)
 
-# Ініціалізація двигуна з використанням DB_URL з конфігураційного файлу
-engine: AsyncEngine = create_async_engine(config.DB_URL, echo=True)
 
-# Створення сесії
-SessionLocal = async_sessionmaker(autocommit=False, autoflush=False,
-                                  bind=engine)
+@contextlib.asynccontextmanager
+async def _managed(session: AsyncSession):
+    try:
+        yield session
+    except Exception as err:
+        logger.debug("Rolling back session: %r", err)
+        await session.rollback()
+        raise err
+    finally:
+        await session.close()
 
 
 class DatabaseSessionManager:
     def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
-        self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, expire_on_commit=False, bind=self._engine)
+        self._url = url
+        self._engine: AsyncEngine | None = None
+        self._session_maker: async_sessionmaker | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """
+        The engine, created on first use.
+
+        Creating the engine imports the database driver, so it is deferred
+        until a process actually talks to the database.
+
+        :return: AsyncEngine: The engine for the configured database URL.
+        """
+        if self._engine is None:
+            self._engine = create_async_engine(self._url, echo=config.DB_ECHO)
+            instrument(self._engine)
+        return self._engine
+
+    async def close(self) -> None:
+        """
+        Dispose of the engine and its connection pool, if it was created.
+
+        :return: None
+        """
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_maker = None
 
     @contextlib.asynccontextmanager
     async def session(self):
         if self._session_maker is None:
-            raise Exception("Session is not initialized")
-        session = self._session_maker()
-        try:
+            self._session_maker = async_sessionmaker(
+                autoflush=False, expire_on_commit=False, bind=self.engine)
+        async with _managed(self._session_maker()) as session:
             yield session
-        except Exception as err:
-            print(err)
-            await session.rollback()
-            raise err
-        finally:
-            await session.close()
 
 
-sessionmanager = DatabaseSessionManager(config.DB_URL)
+class _LazyShardSession(Session):
+    """
+    Session bound to a user's shard the first time it needs a connection.
+
+    Looking the shard up takes a connection to the shard directory, which
+    requests that never query (a current user served from the cache) would
+    pay for nothing. get_bind runs inside the AsyncSession's greenlet, so it
+    can await the lookup.
+    """
+
+    def get_bind(self, mapper=None, **kw):
+        if self.bind is None:
+            router, email = self.info["shard_of"]
+            shard = await_only(router.shard_for(email))
+            self.bind = router.shards[shard].engine.sync_engine
+        return super().get_bind(mapper, **kw)
+
+
+class ShardRouter:
+    """
+    Spreads users over several databases, one DatabaseSessionManager each.
+
+    A user lives on the shard their email hashes to, unless the shard
+    directory on shard 0 says otherwise (users moved with
+    ``python -m src.jobs.move_user``). With a single shard nothing is
+    looked up.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.shards = [DatabaseSessionManager(url) for url in urls]
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    @property
+    def directory(self) -> DatabaseSessionManager:
+        return self.shards[0]
+
+    def hash_shard(self, email: str) -> int:
+        """
+        The shard an email maps to by default.
+
+        :param email: str: The user's email.
+        :return: int: The shard index.
+        """
+        return zlib.crc32(email.strip().lower().encode()) % len(self.shards)
+
+    async def shard_for(self, email: str | None) -> int:
+        """
+        The shard holding a user's rows.
+
+        :param email: str | None: The user's email; without one, shard 0.
+        :return: int: The shard index.
+        """
+        if len(self.shards) == 1 or not email:
+            return 0
+        async with self.directory.session() as session:
+            shard = await session.scalar(
+                select(ShardDirectory.shard).filter_by(
+                    email=email.strip().lower()))
+        return self.hash_shard(email) if shard is None else shard
+
+    @contextlib.asynccontextmanager
+    async def session(self, email: str | None):
+        """
+        A session on the shard of a user.
+
+        Neither the shard directory nor the shard is connected to until the
+        session runs its first statement.
+
+        :param email: str | None: The user's email; without one, shard 0.
+        :return: AsyncIterator[AsyncSession]: The session.
+        """
+        if len(self.shards) == 1 or not email:
+            async with self.shards[0].session() as session:
+                yield session
+            return
+        async with _managed(AsyncSession(
+                sync_session_class=_LazyShardSession, autoflush=False,
+                expire_on_commit=False,
+                info={"shard_of": (self, email)})) as session:
+            yield session
+
+    async def close(self) -> None:
+        """
+        Dispose of the engines of every shard.
+
+        :return: None
+        """
+        for shard in self.shards:
+            await shard.close()
+
+
+shard_router = ShardRouter(
+    [config.DB_URL, *(url.strip() for url in config.DB_SHARD_URLS.split(",")
+                      if url.strip())])
+# Shard 0, for code that doesn't deal with users (and single-database setups)
+sessionmanager = shard_router.directory
+
+
+async def request_email(request: Request) -> str | None:
+    """
+    Find the email of the user a request is about, to route it to a shard.
+
+    Looks at the bearer token, a ``token`` path or query parameter (email
+    and password reset links), then an ``email`` field in a JSON body or
+    the ``username`` of a login form. Tokens are not verified here, that's
+    still up to the route; a forged one only selects another shard.
+
+    :param request: Request: The incoming request.
+    :return: str | None: The email, if the request carries one.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        token = (request.path_params.get("token")
+                 or request.query_params.get("token"))
+    if token:
+        try:
+            return jwt.get_unverified_claims(token).get("sub")
+        except JWTError:
+            return None
+    content_type = request.headers.get("content-type", "")
+    # A malformed body is left for the route to reject, not a 500 here
+    try:
+        if content_type.startswith("application/json"):
+            body = await request.json()
+            return body.get("email") if isinstance(body, dict) else None
+        if content_type.startswith(("application/x-www-form-urlencoded",
+                                    "multipart/form-data")):
+            form = await request.form()
+            return form.get("username") or form.get("email")
+    except ValueError:
+        return None
+    return None
 
 
-async def get_db():
-    async with sessionmanager.session() as session:
+async def get_db(request: Request):
+    email = await request_email(request) if len(shard_router) > 1 else None
+    async with shard_router.session(email) as session:
         yield session
@@ -0,0 +1,157 @@
+"""
+SQLAlchemy cursor and pool event hooks feeding the query and connection
+metrics, the slow-query log and the per-request SQL profile.
+"""
+import logging
+import re
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import config
+from src.services.metrics import DB_CONNECTIONS_IN_USE, DB_POOL_CHECKOUTS, \
+    DB_QUERIES, DB_QUERY_LATENCY
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("sql.slow")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\([^)]*\)s|%s|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape, independent of parameter values.
+
+    Literals and driver placeholders become ``?`` and IN-lists of any
+    length collapse to ``(?)``, so every execution of the same query maps
+    to one fingerprint.
+
+    :param statement: str: The SQL statement as sent to the driver.
+    :return: str: The normalized statement.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class RequestQueryStats:
+    """
+    Queries executed while handling a single HTTP request.
+
+    ``queries`` is only collected when the request asked for a SQL profile.
+    """
+    __slots__ = ("count", "duration", "queries")
+
+    def __init__(self, profile: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.queries: list[dict] | None = [] if profile else None
+
+
+request_query_stats: ContextVar[RequestQueryStats | None] = ContextVar(
+    "request_query_stats", default=None)
+
+
+def _row_count(cursor) -> int:
+    if cursor.rowcount >= 0:
+        return cursor.rowcount
+    # aiosqlite reports -1 for SELECT but has already buffered the rows
+    rows = getattr(cursor, "_rows", None)
+    return len(rows) if rows is not None else -1
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    prefix = ("EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite"
+              else "EXPLAIN ")
+    # The caller's own connection: slow queries come with a busy pool, and
+    # waiting here for a second connection would hold this one meanwhile.
+    # The savepoint keeps a failing EXPLAIN from aborting the caller's
+    # transaction; the raw cursor keeps it out of the query metrics.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT explain_slow_query")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+            raise
+        finally:
+            cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+        return "\n".join(" ".join(str(col) for col in row) for row in rows)
+    except Exception as err:
+        logger.debug("EXPLAIN failed: %r", err)
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    context._query_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed = perf_counter() - context._query_start
+    DB_QUERIES.inc()
+    DB_QUERY_LATENCY.observe(elapsed)
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        if stats.queries is not None:
+            stats.queries.append({"sql": fingerprint(statement),
+                                  "ms": round(elapsed * 1000, 3),
+                                  "rows": _row_count(cursor)})
+
+    if elapsed * 1000 >= config.SLOW_QUERY_MS and not executemany:
+        _log_slow_query(conn, cursor, statement, parameters, elapsed)
+
+
+def _log_slow_query(conn, cursor, statement, parameters, elapsed):
+    verb = statement.lstrip()[:7].upper()
+    if verb.startswith("EXPLAIN") or \
+            not slow_query_logger.isEnabledFor(logging.WARNING):
+        return
+    plan = None
+    if config.SLOW_QUERY_EXPLAIN and verb.startswith("SELECT"):
+        plan = _explain(conn, statement, parameters)
+    slow_query_logger.warning(
+        "Slow query",
+        extra={"fingerprint": fingerprint(statement),
+               "duration_ms": round(elapsed * 1000, 3),
+               "rows": _row_count(cursor), "plan": plan},
+    )
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+    DB_CONNECTIONS_IN_USE.inc()
+
+
+def _checkin(dbapi_connection, connection_record):
+    DB_CONNECTIONS_IN_USE.dec()
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """
+    Register the query timing and connection pool hooks on an engine.
+
+    :param engine: AsyncEngine: The engine to instrument.
+    :return: None
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute",
+                 _after_cursor_execute)
+    event.listen(engine.sync_engine, "checkout", _checkout)
+    event.listen(engine.sync_engine, "checkin", _checkin)
@@ -1,6 +1,6 @@
 from datetime import date
 from sqlalchemy import Integer, String, Date, ForeignKey, DateTime, func, \
-    Boolean
+    Boolean, Index, SmallInteger, true
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 from typing import Optional
 
@@ -12,9 +12,9 @@ class Base(DeclarativeBase):
 class Contact(Base):
     __tablename__ = 'contacts'
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    first_name: Mapped[str] = mapped_column(String(20), index=True)
-    last_name: Mapped[str] = mapped_column(String(20), index=True)
-    email: Mapped[str] = mapped_column(String(50), index=True, unique=True)
+    first_name: Mapped[str] = mapped_column(String(20))
+    last_name: Mapped[str] = mapped_column(String(20))
+    email: Mapped[str] = mapped_column(String(50))
     phone_number: Mapped[str] = mapped_column(String)
     birthday: Mapped[Date] = mapped_column(Date)
     additional_info: Mapped[Optional[str]] = mapped_column(String,
@@ -25,9 +25,64 @@ class Contact(Base):
                                              default=func.now(),
                                              onupdate=func.now(), nullable=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'),
-                                         nullable=True)
+                                         nullable=False)
     user: Mapped['User'] = relationship('User', backref='contacts',
                                         lazy='joined')
+    # Blocking keys for duplicate detection, see src/services/normalize.py
+    phone_key: Mapped[Optional[str]] = mapped_column(String(32),
+                                                     nullable=True)
+    email_key: Mapped[Optional[str]] = mapped_column(String(64),
+                                                     nullable=True)
+    name_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Search keys of the names, see src/services/normalize.py. Latin keys
+    # sort byte by byte on Postgres so a prefix is one index range.
+    first_name_latin: Mapped[Optional[str]] = mapped_column(
+        String(64).with_variant(String(64, collation='C'), 'postgresql'),
+        nullable=True)
+    last_name_latin: Mapped[Optional[str]] = mapped_column(
+        String(64).with_variant(String(64, collation='C'), 'postgresql'),
+        nullable=True)
+    first_name_sound: Mapped[Optional[str]] = mapped_column(String(32),
+                                                            nullable=True)
+    last_name_sound: Mapped[Optional[str]] = mapped_column(String(32),
+                                                           nullable=True)
+    # phone_number in E.164 form, see src/services/normalize.py
+    phone_e164: Mapped[Optional[str]] = mapped_column(String(16),
+                                                      nullable=True)
+    # month * 100 + day of the birthday, see src/services/birthdays.py
+    birthday_md: Mapped[Optional[int]] = mapped_column(SmallInteger,
+                                                       nullable=True)
+
+    __table_args__ = (
+        # Every query is scoped by user_id, so it leads every index. Emails
+        # are unique per user: two users may store the same person.
+        Index('ix_contacts_user_email', 'user_id', 'email', unique=True),
+        # get_contacts pages in (last_name, first_name, id) order
+        Index('ix_contacts_user_name', 'user_id', 'last_name', 'first_name',
+              'id'),
+        Index('ix_contacts_user_id', 'user_id', 'id'),
+        # Reverse lookup of incoming numbers
+        Index('ix_contacts_user_phone_e164', 'user_id', 'phone_e164'),
+        # get_contacts with search_mode translit / phonetic; a sound key is
+        # matched exactly, so its rows can come out in page order too
+        Index('ix_contacts_user_first_latin', 'user_id', 'first_name_latin'),
+        Index('ix_contacts_user_last_latin', 'user_id', 'last_name_latin'),
+        Index('ix_contacts_user_first_sound', 'user_id', 'first_name_sound',
+              'last_name', 'first_name', 'id'),
+        Index('ix_contacts_user_last_sound', 'user_id', 'last_name_sound',
+              'last_name', 'first_name', 'id'),
+        Index('ix_contacts_user_phone_key', 'user_id', 'phone_key'),
+        Index('ix_contacts_user_email_key', 'user_id', 'email_key'),
+        Index('ix_contacts_user_name_key', 'user_id', 'name_key'),
+        # The one index not led by user_id: the daily birthday digest reads
+        # a single day across all users, in (user_id, id) keyset order
+        Index('ix_contacts_birthday_md', 'birthday_md', 'user_id', 'id'),
+    )
+    # On Postgres the table is hash partitioned by user_id (migration
+    # b3f1c7a9d5e2) with the primary key (id, user_id). Mapping the same
+    # identity puts user_id in the WHERE clause of every UPDATE and DELETE
+    # the ORM emits, so they touch a single partition.
+    __mapper_args__ = {'primary_key': [id, user_id]}
 
 
 class User(Base):
@@ -45,3 +100,78 @@ class User(Base):
                                              onupdate=func.now())
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False,
                                             nullable=True)
+
+    __table_args__ = (
+        # Partial index for the re-verification job's keyset scan: only
+        # unconfirmed users are indexed, so it stays small as users confirm.
+        Index('ix_users_unconfirmed_id', 'id',
+              postgresql_where=confirmed.is_not(true()),
+              sqlite_where=confirmed.is_not(true())),
+    )
+
+
+class ContactStat(Base):
+    """
+    Per-user contact counters, kept up to date as contacts change.
+
+    ``metric`` is ``total`` (empty bucket), ``birth_month`` (bucket ``01``
+    to ``12``) or ``added_week`` (bucket is the ISO date of the Monday).
+    """
+    __tablename__ = 'contact_stats'
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id',
+                                                             ondelete='CASCADE'),
+                                         primary_key=True)
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String(10), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ContactSearchTerm(Base):
+    """
+    Normalized words of contact names and emails, for prefix autocomplete.
+
+    Kept up to date as contacts change, see src/repository/search.py. The
+    primary key is the sorted structure a prefix is looked up in; on
+    Postgres terms use the "C" collation so they sort byte by byte and a
+    prefix is one contiguous key range.
+    """
+    __tablename__ = 'contact_search_terms'
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id',
+                                                             ondelete='CASCADE'),
+                                         primary_key=True)
+    term: Mapped[str] = mapped_column(
+        String(64).with_variant(String(64, collation='C'), 'postgresql'),
+        primary_key=True)
+    contact_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # first_name, last_name or email
+    field: Mapped[str] = mapped_column(String(10), primary_key=True)
+
+    __table_args__ = (
+        # Replacing the terms of one contact, and checking the other words
+        # of a multi-word query against a candidate contact
+        Index('ix_contact_search_terms_contact', 'user_id', 'contact_id',
+              'term'),
+    )
+
+
+class ShardDirectory(Base):
+    """
+    Users placed on another shard than their email hashes to.
+
+    Only read on the first database (DB_URL); see src/database/db.py.
+    """
+    __tablename__ = 'shard_directory'
+    email: Mapped[str] = mapped_column(String(150), primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class JobCheckpoint(Base):
+    """
+    How far a resumable batch job has got, e.g. the last user ID done.
+    """
+    __tablename__ = 'job_checkpoints'
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[date] = mapped_column('updated_at', DateTime,
+                                             default=func.now(),
+                                             onupdate=func.now())
@@ -0,0 +1,139 @@
+"""
+Email every user a digest of their contacts who have a birthday today.
+
+Contacts are read from the birthday_md index in keyset-paginated chunks
+across all users, grouped by owner and sent one message per owner. Once
+every digest of a chunk is sent the last owner is saved as a checkpoint, so
+a run that crashes, or stops because a digest couldn't be sent, resumes
+after it: at most the digests of one chunk are sent twice.
+
+Run it once a day, e.g. from cron: python -m src.jobs.birthday_digest
+"""
+import argparse
+import asyncio
+from datetime import date
+from itertools import groupby
+from operator import attrgetter
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import shard_router
+from src.repository import checkpoints as repositories_checkpoints
+from src.repository import contacts as repositories_contacts
+from src.services.birthdays import digest_month_days
+from src.services.email import build_message, send_bulk, \
+    BIRTHDAY_DIGEST_TEMPLATE
+
+
+def _by_owner(rows: list) -> list[tuple[int, list]]:
+    return [(user_id, list(contacts))
+            for user_id, contacts in groupby(rows, attrgetter("user_id"))]
+
+
+async def birthday_chunks(db: AsyncSession, day: date, chunk_size: int,
+                          after_user_id: int = 0) -> AsyncIterator[list]:
+    """
+    Stream the contacts with a birthday on a day, grouped by owner.
+
+    A chunk never splits the contacts of one owner: the last owner of a
+    fetched chunk is held back until all of their contacts have been read.
+
+    :param db: AsyncSession: The database session.
+    :param day: date: The day of the birthdays.
+    :param chunk_size: int: The number of contacts fetched per query.
+    :param after_user_id: int: Skip the owners up to this user ID.
+    :return: AsyncIterator[list]: Chunks of (user_id, contact rows) pairs, ordered by user_id.
+    """
+    month_days = digest_month_days(day)
+    after_id = None
+    pending: list = []
+    while True:
+        rows = await repositories_contacts.get_birthday_contacts(
+            month_days, after_user_id, after_id, chunk_size, db)
+        # Release the connection while the chunk is being sent
+        await db.commit()
+        if not rows:
+            break
+        after_user_id, after_id = rows[-1].user_id, rows[-1].id
+        rows = pending + rows
+        split = len(rows)
+        while split and rows[split - 1].user_id == after_user_id:
+            split -= 1
+        pending = rows[split:]
+        if split:
+            yield _by_owner(rows[:split])
+    if pending:
+        yield _by_owner(pending)
+
+
+async def digest_messages(owners: list, day: date):
+    """
+    Build the digest messages of a chunk of owners.
+
+    :param owners: list: (user_id, contact rows) pairs.
+    :param day: date: The day of the birthdays.
+    :return: AsyncIterator[MessageSchema]: One message per owner.
+    """
+    for _, contacts in owners:
+        owner = contacts[0]
+        yield build_message(owner.owner_email, "Birthdays today",
+                            BIRTHDAY_DIGEST_TEMPLATE,
+                            username=owner.owner_username, day=day,
+                            contacts=contacts)
+
+
+async def send_digests(db: AsyncSession, day: date, rate: float,
+                       chunk_size: int = 1000, concurrency: int = 4) -> int:
+    """
+    Send the birthday digests of a day, resuming an interrupted run.
+
+    :param db: AsyncSession: The database session.
+    :param day: date: The day of the birthdays.
+    :param rate: float: The maximum number of messages sent per second.
+    :param chunk_size: int: The number of contacts fetched per query.
+    :param concurrency: int: The number of concurrent SMTP senders.
+    :return: int: The number of messages sent.
+    :raises RuntimeError: If a digest of a chunk couldn't be sent; the checkpoint stays before that chunk.
+    """
+    checkpoint = f"birthday_digest:{day.isoformat()}"
+    after_user_id = await repositories_checkpoints.get_checkpoint(checkpoint,
+                                                                  db)
+    sent = 0
+    async for owners in birthday_chunks(db, day, chunk_size, after_user_id):
+        chunk_sent = await send_bulk(digest_messages(owners, day), rate,
+                                     concurrency)
+        sent += chunk_sent
+        if chunk_sent < len(owners):
+            # send_bulk logs and skips failed messages; moving the
+            # checkpoint past them would lose those digests for good
+            raise RuntimeError(
+                f"{len(owners) - chunk_sent} of {len(owners)} birthday "
+                f"digests not sent, {sent} sent before stopping")
+        await repositories_checkpoints.save_checkpoint(checkpoint,
+                                                       owners[-1][0], db)
+    return sent
+
+
+async def run(args: argparse.Namespace) -> None:
+    sent = 0
+    for shard in shard_router.shards:
+        async with shard.session() as db:
+            sent += await send_digests(db, args.day, args.rate,
+                                       args.chunk_size, args.concurrency)
+    print(f"Sent {sent} birthday digests for {args.day}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--day", type=date.fromisoformat, default=date.today(),
+                        help="Day of the birthdays, YYYY-MM-DD (default today)")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Maximum messages sent per second")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Move a user and their contacts to another shard.
+
+The rows are copied to the target shard, the shard directory is pointed at
+it and the rows are deleted from the source shard. Users and contacts get
+new IDs on the target shard. Run it while the user is inactive: writes that
+reach the old shard after the copy are lost.
+
+Usage: python -m src.jobs.move_user --email user@example.com --shard 2
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import delete, insert, select
+
+from src.database.db import ShardRouter, shard_router
+from src.entity.models import Contact, ContactSearchTerm, ContactStat, \
+    ShardDirectory, User
+from src.repository.search import rebuild_contact_search_terms
+from src.services.auth import auth_service
+from src.services.birthdays import birthday_calendar
+
+CHUNK_SIZE = 1000
+
+
+def _row(obj, *exclude: str) -> dict:
+    return {column.key: getattr(obj, column.key)
+            for column in obj.__table__.columns if column.key not in exclude}
+
+
+async def _point_directory(router: ShardRouter, email: str,
+                           shard: int) -> None:
+    email = email.strip().lower()
+    async with router.directory.session() as db:
+        await db.execute(delete(ShardDirectory).filter_by(email=email))
+        # Users on their hash shard need no entry
+        if shard != router.hash_shard(email):
+            db.add(ShardDirectory(email=email, shard=shard))
+        await db.commit()
+
+
+async def move_user(email: str, target: int,
+                    router: ShardRouter = shard_router) -> int:
+    """
+    Move a user's rows from their current shard to another one.
+
+    :param email: str: The email of the user to move.
+    :param target: int: The index of the target shard.
+    :param router: ShardRouter: The shards to move between.
+    :return: int: The number of contacts moved.
+    :raises ValueError: If the user doesn't exist, the target shard is out of range or already has a user with that email.
+    """
+    if not 0 <= target < len(router):
+        raise ValueError(f"No shard {target}, there are {len(router)}")
+    source = await router.shard_for(email)
+    if source == target:
+        return 0
+
+    async with router.shards[source].session() as src, \
+            router.shards[target].session() as dst:
+        user = await src.scalar(select(User).filter_by(email=email))
+        if user is None:
+            raise ValueError(f"User {email} not found on shard {source}")
+        if await dst.scalar(select(User.id).filter_by(email=email)):
+            raise ValueError(f"Shard {target} already has a user {email}")
+
+        user_id = await dst.scalar(
+            insert(User).values(_row(user, "id")).returning(User.id))
+        moved = 0
+        contacts = await src.stream(
+            select(Contact.__table__).where(Contact.user_id == user.id)
+            .execution_options(yield_per=CHUNK_SIZE))
+        async for rows in contacts.mappings().partitions():
+            await dst.execute(insert(Contact.__table__), [
+                {**{k: v for k, v in row.items() if k != "id"},
+                 "user_id": user_id} for row in rows])
+            moved += len(rows)
+        stats = (await src.scalars(
+            select(ContactStat).filter_by(user_id=user.id))).all()
+        if stats:
+            await dst.execute(insert(ContactStat.__table__), [
+                {**_row(stat), "user_id": user_id} for stat in stats])
+        # The terms refer to contact IDs, which are new on the target shard
+        await dst.run_sync(lambda session: rebuild_contact_search_terms(
+            session.connection(), user_id))
+        await dst.commit()
+
+        await _point_directory(router, email, target)
+
+        await src.execute(delete(ContactStat).filter_by(user_id=user.id))
+        await src.execute(
+            delete(ContactSearchTerm).filter_by(user_id=user.id))
+        await src.execute(delete(Contact).filter_by(user_id=user.id))
+        await src.execute(delete(User).filter_by(id=user.id))
+        await src.commit()
+    return moved
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        moved = await move_user(args.email, args.shard)
+    finally:
+        await shard_router.close()
+    # The cached user and calendar still have the old shard's IDs
+    auth_service.cache.delete(args.email)
+    birthday_calendar.invalidate(args.email)
+    print(f"Moved {args.email} with {moved} contacts to shard {args.shard}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--shard", type=int, required=True,
+                        help="Index of the target shard (0 is DB_URL)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
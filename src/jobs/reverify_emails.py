@@ -0,0 +1,95 @@
+"""
+Re-send the confirmation email to every user who has not confirmed it yet.
+
+Usage: python -m src.jobs.reverify_emails --host https://contacts.example.com/
+"""
+import argparse
+import asyncio
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import shard_router
+from src.repository import users as repositories_users
+from src.services.auth import auth_service
+from src.services.email import build_message, send_bulk, \
+    VERIFY_EMAIL_TEMPLATE
+
+
+async def unconfirmed_user_chunks(db: AsyncSession,
+                                  chunk_size: int) -> AsyncIterator[list]:
+    """
+    Stream unconfirmed users in keyset-paginated chunks.
+
+    :param db: AsyncSession: The database session.
+    :param chunk_size: int: The number of users fetched per query.
+    :return: AsyncIterator[list]: Chunks of (id, email, username) rows.
+    """
+    after_id = 0
+    while True:
+        users = await repositories_users.get_unconfirmed_users(
+            after_id, chunk_size, db)
+        # Release the connection while the chunk is being sent
+        await db.commit()
+        if not users:
+            return
+        yield users
+        after_id = users[-1].id
+
+
+async def verification_messages(db: AsyncSession, host: str,
+                                chunk_size: int):
+    """
+    Build verification messages for all unconfirmed users.
+
+    :param db: AsyncSession: The database session.
+    :param host: str: The base URL used in the verification link.
+    :param chunk_size: int: The number of users fetched per query.
+    :return: AsyncIterator[MessageSchema]: The messages to send.
+    """
+    async for users in unconfirmed_user_chunks(db, chunk_size):
+        tokens = auth_service.create_email_tokens([u.email for u in users])
+        for user, token in zip(users, tokens):
+            yield build_message(user.email, "Confirm your email ",
+                                VERIFY_EMAIL_TEMPLATE, host=host,
+                                username=user.username, token=token)
+
+
+async def reverify(db: AsyncSession, host: str, rate: float,
+                   chunk_size: int = 1000, concurrency: int = 4) -> int:
+    """
+    Re-send the confirmation email to all unconfirmed users.
+
+    :param db: AsyncSession: The database session.
+    :param host: str: The base URL used in the verification link.
+    :param rate: float: The maximum number of messages sent per second.
+    :param chunk_size: int: The number of users fetched per query.
+    :param concurrency: int: The number of concurrent SMTP senders.
+    :return: int: The number of messages sent.
+    """
+    messages = verification_messages(db, host, chunk_size)
+    return await send_bulk(messages, rate, concurrency)
+
+
+async def run(args: argparse.Namespace) -> None:
+    sent = 0
+    for shard in shard_router.shards:
+        async with shard.session() as db:
+            sent += await reverify(db, args.host, args.rate, args.chunk_size,
+                                   args.concurrency)
+    print(f"Sent {sent} confirmation emails")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", required=True,
+                        help="Base URL of the API, e.g. https://example.com/")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Maximum messages sent per second")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
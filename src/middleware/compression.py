@@ -0,0 +1,214 @@
+"""
+ASGI middleware compressing responses with zstd, brotli or gzip.
+
+gzip is always available; brotli and zstd are used when the ``brotli`` and
+``zstandard`` packages are installed.
+"""
+import importlib.util
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript",
+                      "application/xml", "image/svg+xml")
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # A sync flush after every chunk keeps streamed output flowing
+        return (self._compressor.compress(data)
+                + self._compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return (self._compressor.compress(data)
+                + self._compressor.flush(self._flush_block))
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# Encoding -> (encoder, module it needs)
+ENCODERS = {"zstd": (ZstdEncoder, "zstandard"),
+            "br": (BrotliEncoder, "brotli"),
+            "gzip": (GzipEncoder, None)}
+
+
+def available_encodings(preferred: list[str]) -> list[str]:
+    """
+    Filter the preferred encodings down to those that can be used here.
+
+    :param preferred: list[str]: Encoding names in server preference order.
+    :return: list[str]: The usable encodings, in the same order.
+    """
+    usable = []
+    for name in preferred:
+        if name not in ENCODERS:
+            raise ValueError(f"Unknown content encoding: {name}")
+        _, module = ENCODERS[name]
+        if module is None or importlib.util.find_spec(module):
+            usable.append(name)
+    return usable
+
+
+def negotiate(accept_encoding: str, encodings: list[str]) -> str | None:
+    """
+    Pick the encoding to use for a request.
+
+    :param accept_encoding: str: The Accept-Encoding request header.
+    :param encodings: list[str]: The usable encodings, preferred first.
+    :return: str | None: The chosen encoding, or None to send identity.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for name in encodings:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compress responses the client accepts an encoding for.
+
+    Bodies sent in one piece are compressed only when they reach
+    ``minimum_size`` bytes; streamed bodies are compressed chunk by chunk
+    with a flush after each one, so clients see data as it is produced.
+    Responses that already carry a Content-Encoding (e.g. precompressed
+    payloads) and non-text content types are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 encodings: tuple[str, ...] = ("zstd", "br", "gzip"),
+                 gzip_level: int = 6, brotli_quality: int = 4,
+                 zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(list(encodings))
+        self.levels = {"gzip": gzip_level, "br": brotli_quality,
+                       "zstd": zstd_level}
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(send, encoding,
+                                         self.levels[encoding],
+                                         self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """
+    Wraps ``send`` for a single response.
+    """
+
+    def __init__(self, send: Send, encoding: str, level: int,
+                 minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows the body size
+            self.start_message = message
+            self.passthrough = not self._compressible(
+                Headers(raw=message["headers"]))
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body
+                                    and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            encoder_class, _ = ENCODERS[self.encoding]
+            self.encoder = encoder_class(self.level)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                body = self.encoder.compress(body)
+            else:
+                body = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body,
+                              "more_body": more_body})
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+        body = (self.encoder.compress(body) if more_body
+                else self.encoder.finish(body))
+        await self._send({"type": "http.response.body", "body": body,
+                          "more_body": more_body})
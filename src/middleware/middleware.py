@@ -1,17 +1,26 @@
+import json
+import logging
 import re
+from time import perf_counter
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from typing import Callable
 
+from src.conf.config import config
+from src.database.instrumentation import RequestQueryStats, \
+    request_query_stats
+from src.services.metrics import REQUEST_LATENCY, DB_QUERIES_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
 # Бан-лист User-Agent
 user_agent_ban_list = [r"Googlebot", r"Python-urllib"]
 
 
 # Middleware для блокування за User-Agent
 async def user_agent_ban_middleware(request: Request, call_next: Callable):
-    print(request.headers.get("Authorization"))
     user_agent = request.headers.get("user-agent")
-    print(user_agent)  # Вивести user-agent для діагностики
+    logger.debug("User-Agent: %s", user_agent)
     for ban_pattern in user_agent_ban_list:
         if re.search(ban_pattern, user_agent):
             return JSONResponse(
@@ -20,3 +29,33 @@ async def user_agent_ban_middleware(request: Request, call_next: Callable):
             )
     response = await call_next(request)
     return response
+
+
+SQL_PROFILE_HEADER = "X-SQL-Profile"
+
+
+# Middleware для збору метрик запитів
+async def metrics_middleware(request: Request, call_next: Callable):
+    # Профіль SQL-запитів повертається лише на явний запит і якщо дозволено
+    profile = (config.SQL_PROFILE_ENABLED
+               and request.headers.get(SQL_PROFILE_HEADER) == "1")
+    stats = RequestQueryStats(profile=profile)
+    token = request_query_stats.set(stats)
+    start = perf_counter()
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        if profile:
+            response.headers[SQL_PROFILE_HEADER] = json.dumps(
+                stats.queries, separators=(",", ":"))
+            response.headers["Server-Timing"] = (
+                f'db;dur={stats.duration * 1000:.3f};desc="{stats.count} queries"')
+        return response
+    finally:
+        request_query_stats.reset(token)
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(perf_counter() - start, request.method,
+                                route.path if route else "unmatched",
+                                str(status_code))
+        DB_QUERIES_PER_REQUEST.observe(stats.count)
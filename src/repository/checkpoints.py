@@ -0,0 +1,30 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.entity.models import JobCheckpoint
+
+
+async def get_checkpoint(name: str, db: AsyncSession) -> int:
+    """
+    Get the position a job has reached.
+
+    :param name: str: The name of the job run.
+    :param db: AsyncSession: The database session.
+    :return: int: The saved position, or 0 if the run hasn't started.
+    """
+    position = await db.scalar(
+        select(JobCheckpoint.position).filter_by(name=name))
+    return position or 0
+
+
+async def save_checkpoint(name: str, position: int, db: AsyncSession) -> None:
+    """
+    Save and commit the position a job has reached.
+
+    :param name: str: The name of the job run.
+    :param position: int: The new position.
+    :param db: AsyncSession: The database session.
+    :return: None
+    """
+    await db.merge(JobCheckpoint(name=name, position=position))
+    await db.commit()
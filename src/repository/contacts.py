@@ -1,12 +1,34 @@
-from sqlalchemy import select, and_, extract, func
+from sqlalchemy import select, and_, event, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.entity.models import Contact, User
+# Реєструють обробники подій: лічильники contact_stats, ключі дедуплікації
+# і терміни автодоповнення
+from src.repository import dedup, search, stats  # noqa: F401
 from src.schemas.contact import ContactCreateSchema, ContactUpdateSchema
-from datetime import date, timedelta
+from src.services.birthdays import birthday_calendar
+from src.services.normalize import e164, latin_key, sound_key
+from datetime import date
+
+
+@event.listens_for(Contact, "before_insert")
+@event.listens_for(Contact, "before_update")
+def _fill_phone_e164(mapper, connection, contact: Contact):
+    contact.phone_e164 = e164(contact.phone_number)
+
+
+def _name_filter(value: str | None, latin, sound, search_mode: str):
+    if not value:
+        return None
+    if search_mode == "phonetic":
+        return sound == sound_key(value)
+    # translit: a prefix of the Latin spelling, one range of the index
+    key = latin_key(value) or ""
+    return and_(latin >= key, latin < key + search.END)
 
 
 async def get_contacts(limit: int, offset: int, first_name: str, last_name: str,
-                       email: str, db: AsyncSession, user: User):
+                       email: str, db: AsyncSession, user: User,
+                       search_mode: str = "contains"):
     """
     Retrieve contacts based on given parameters.
 
@@ -17,10 +39,22 @@ async def get_contacts(limit: int, offset: int, first_name: str, last_name: str,
     :param email: str: The email address of the contact to filter by.
     :param db: AsyncSession: The database session.
     :param user: User: The current user.
-    :return: list: A list of contacts that match the given parameters. If no contacts are found, an empty list is returned.
+    :param search_mode: str: How names are matched: "contains" (case-insensitive substring), "translit" (prefix of the Latin spelling, in any script) or "phonetic" (names that sound alike). Emails are always matched as substrings.
+    :return: list: A list of contacts that match the given parameters, ordered by last name, first name and ID. If no contacts are found, an empty list is returned.
     """
-    stmt = select(Contact).filter_by(user=user).offset(offset).limit(limit)
-    if first_name or last_name or email:
+    stmt = select(Contact).filter_by(user=user).order_by(
+        Contact.last_name, Contact.first_name, Contact.id
+    ).offset(offset).limit(limit)
+    if search_mode != "contains":
+        filters = [
+            _name_filter(first_name, Contact.first_name_latin,
+                         Contact.first_name_sound, search_mode),
+            _name_filter(last_name, Contact.last_name_latin,
+                         Contact.last_name_sound, search_mode),
+            Contact.email.ilike(f"%{email}%") if email else None,
+        ]
+        stmt = stmt.filter(*[f for f in filters if f is not None])
+    elif first_name or last_name or email:
         stmt = stmt.filter(
             and_(
                 first_name is None or Contact.first_name.ilike(
@@ -47,6 +81,51 @@ async def get_contact(contact_id: int, db: AsyncSession, user: User):
     return contact.scalar_one_or_none()
 
 
+async def get_contacts_by_ids(contact_ids: list[int], db: AsyncSession,
+                              user: User):
+    """
+    Retrieve several contacts by their IDs in a single query.
+
+    :param contact_ids: list[int]: The IDs of the contacts to retrieve.
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: dict[int, Contact]: The contacts found, keyed by ID. IDs of missing contacts or contacts of other users are absent.
+    """
+    stmt = select(Contact).filter_by(user=user).filter(
+        Contact.id.in_(set(contact_ids)))
+    contacts = await db.execute(stmt)
+    return {contact.id: contact for contact in contacts.scalars()}
+
+
+async def lookup_contacts_by_phone(phone_numbers: list[str], db: AsyncSession,
+                                   user: User):
+    """
+    Find the contacts with any of several phone numbers in a single query.
+
+    The numbers are compared in E.164 form, so "0501234567" and
+    "+38 050 123 45 67" match the same contacts.
+
+    :param phone_numbers: list[str]: The phone numbers to look up, in any format.
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[dict]: One entry per distinct number in request order, with the number as given ("phone"), its E.164 form ("e164", None if it isn't a valid number) and the matching contacts ordered by ID.
+    """
+    numbers = {phone: e164(phone) for phone in phone_numbers}
+    wanted = {number for number in numbers.values() if number}
+    found: dict[str, list[Contact]] = {}
+    if wanted:
+        # Без ORDER BY: сортування за id схилило б планувальник до
+        # ix_contacts_user_id замість пошуку за номером
+        stmt = select(Contact).filter_by(user_id=user.id).filter(
+            Contact.phone_e164.in_(wanted))
+        contacts = await db.execute(stmt)
+        for contact in sorted(contacts.scalars(), key=lambda c: c.id):
+            found.setdefault(contact.phone_e164, []).append(contact)
+    return [{"phone": phone, "e164": number,
+             "contacts": found.get(number, [])}
+            for phone, number in numbers.items()]
+
+
 async def create_contact(body: ContactCreateSchema, db: AsyncSession,
                          user: User):
     """
@@ -104,30 +183,62 @@ async def delete_contact(contact_id: int, db: AsyncSession, user: User):
     return contact
 
 
-async def get_upcoming_birthdays(db: AsyncSession, user: User):
+async def get_upcoming_birthdays(db: AsyncSession, user: User,
+                                 days: int = 7):
     """
-    Fetch contacts who have upcoming birthdays within the next 7 days.
+    Fetch contacts who have birthdays within the next days.
+
+    The window is looked up in the user's cached birthday calendar, so only
+    the matching contacts are read from the database.
 
     :param db: AsyncSession: The database session.
     :param user: User: The current user.
-    :return: list: A list of contacts who have upcoming birthdays. If no contacts are found, an empty list is returned.
+    :param days: int: How many days ahead to look, today included.
+    :return: list: A list of contacts who have upcoming birthdays, the nearest first. If no contacts are found, an empty list is returned.
     """
     try:
-        today = date.today()
-        end_date = today + timedelta(days=7)
-
-        # Обробка дат у форматі MM-DD для врахування місяця та дня
-        stmt = select(Contact).filter(
-            and_(
-                func.to_char(Contact.birthday, 'MM-DD') >= func.to_char(today,
-                                                                        'MM-DD'),
-                func.to_char(Contact.birthday, 'MM-DD') <= func.to_char(
-                    end_date, 'MM-DD'),
-                Contact.user == user  # Додаємо фільтр для перевірки користувача
-            )
-        )
-        result = await db.execute(stmt)
-        contacts = result.scalars().all()
-        return contacts
+        contact_ids = await birthday_calendar.upcoming_ids(db, user,
+                                                           date.today(), days)
+        if not contact_ids:
+            return []
+        contacts = await get_contacts_by_ids(contact_ids, db, user)
+        # Контакт міг бути видалений після побудови календаря
+        return [contacts[contact_id] for contact_id in contact_ids
+                if contact_id in contacts]
     except Exception as e:
         raise Exception(f"Error fetching upcoming birthdays: {e}")
+
+
+async def get_birthday_contacts(month_days: list[int], after_user_id: int,
+                                after_id: int | None, limit: int,
+                                db: AsyncSession):
+    """
+    Retrieve a chunk of contacts of all users with a birthday on a day.
+
+    Uses keyset pagination on (user_id, id), served by the birthday_md
+    index, so every chunk costs the same regardless of depth.
+
+    :param month_days: list[int]: The ``month * 100 + day`` values of the birthdays.
+    :param after_user_id: int: Only contacts of users with a greater ID are returned, or of this user with an ID greater than after_id.
+    :param after_id: int | None: The last contact ID returned, or None to skip all contacts of after_user_id.
+    :param limit: int: The maximum number of contacts to return.
+    :param db: AsyncSession: The database session.
+    :return: list: Rows of (user_id, owner_email, owner_username, id, first_name, last_name, email, phone_number, birthday) ordered by user_id and id.
+    """
+    if after_id is None:
+        after = Contact.user_id > after_user_id
+    else:
+        after = tuple_(Contact.user_id, Contact.id) > tuple_(after_user_id,
+                                                             after_id)
+    stmt = (
+        select(Contact.user_id, User.email.label("owner_email"),
+               User.username.label("owner_username"), Contact.id,
+               Contact.first_name, Contact.last_name, Contact.email,
+               Contact.phone_number, Contact.birthday)
+        .join(User, User.id == Contact.user_id)
+        .where(Contact.birthday_md.in_(month_days), after)
+        .order_by(Contact.user_id, Contact.id)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.all()
@@ -0,0 +1,96 @@
+"""
+Duplicate contact detection over the indexed blocking keys.
+
+The keys are filled in by mapper events whenever a contact is inserted or
+updated through the ORM. Finding duplicates reads only the blocks with more
+than one contact, straight from the ``(user_id, <key>)`` indexes, and joins
+blocks that share a contact into clusters.
+"""
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.entity.models import Contact, User
+from src.services.normalize import blocking_keys
+
+KEY_COLUMNS = {"phone": Contact.phone_key, "email": Contact.email_key,
+               "name": Contact.name_key}
+# Bigger blocks (an "info@" local part, a very common name) say little about
+# duplication and would merge unrelated contacts, so they are skipped
+MAX_BLOCK_SIZE = 50
+
+
+@event.listens_for(Contact, "before_insert")
+@event.listens_for(Contact, "before_update")
+def _fill_blocking_keys(mapper, connection, contact: Contact):
+    for key, value in blocking_keys(contact.first_name, contact.last_name,
+                                    contact.email,
+                                    contact.phone_number).items():
+        setattr(contact, key, value)
+
+
+def _find(parent: dict[int, int], item: int) -> int:
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+async def _blocks(column, db: AsyncSession, user: User) -> list[list[int]]:
+    keys = (select(column)
+            .where(Contact.user_id == user.id, column.is_not(None))
+            .group_by(column)
+            .having(func.count().between(2, MAX_BLOCK_SIZE)))
+    stmt = (select(column, Contact.id)
+            .where(Contact.user_id == user.id, column.in_(keys))
+            .order_by(column, Contact.id))
+    blocks: dict[str, list[int]] = {}
+    for key, contact_id in await db.execute(stmt):
+        blocks.setdefault(key, []).append(contact_id)
+    return list(blocks.values())
+
+
+async def find_duplicate_clusters(limit: int, db: AsyncSession, user: User):
+    """
+    Find groups of contacts that are likely duplicates of each other.
+
+    Contacts are linked when they share a phone number (digits only), an
+    email local part or the same name tokens; linked contacts form one
+    cluster.
+
+    :param limit: int: The maximum number of clusters to return.
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[dict]: Clusters ordered by their lowest contact ID, each with the matched key names ("reasons") and the contacts.
+    """
+    parent: dict[int, int] = {}
+    matched: list[tuple[str, list[int]]] = []
+    for reason, column in KEY_COLUMNS.items():
+        for ids in await _blocks(column, db, user):
+            matched.append((reason, ids))
+            for contact_id in ids:
+                parent.setdefault(contact_id, contact_id)
+            root = _find(parent, ids[0])
+            for contact_id in ids[1:]:
+                parent[_find(parent, contact_id)] = root
+
+    clusters: dict[int, list[int]] = {}
+    for contact_id in sorted(parent):
+        clusters.setdefault(_find(parent, contact_id), []).append(contact_id)
+    clusters = dict(sorted(clusters.items(),
+                           key=lambda item: item[1][0])[:limit])
+    reasons: dict[int, set[str]] = {root: set() for root in clusters}
+    for reason, ids in matched:
+        root = _find(parent, ids[0])
+        if root in reasons:
+            reasons[root].add(reason)
+
+    wanted = [contact_id for ids in clusters.values() for contact_id in ids]
+    contacts = {}
+    if wanted:
+        result = await db.execute(
+            select(Contact).where(Contact.user_id == user.id,
+                                  Contact.id.in_(wanted)))
+        contacts = {contact.id: contact for contact in result.scalars()}
+    return [{"reasons": sorted(reasons[root]),
+             "contacts": [contacts[contact_id] for contact_id in ids]}
+            for root, ids in clusters.items()]
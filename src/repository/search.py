@@ -0,0 +1,166 @@
+"""
+Prefix autocomplete over contact names and emails, and the name search keys.
+
+Every word of a contact's names and its email are stored as normalized
+terms in ``contact_search_terms``, maintained by mapper events on
+``Contact`` in the same transaction as the contact. A prefix is a range
+scan of the table's primary key, ``(user_id, term, ...)``, that stops once
+``limit`` contacts are found, so its cost doesn't grow with the number of
+contacts.
+
+The Latin and sound keys of the names, which get_contacts filters on in the
+translit and phonetic search modes, are filled in by mapper events too.
+"""
+from sqlalchemy import Connection, and_, delete, event, inspect, insert, \
+    select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.entity.models import Contact, ContactSearchTerm, User
+from src.services.normalize import name_search_keys, search_term, \
+    search_terms
+
+SEARCHED_FIELDS = ("first_name", "last_name", "email")
+# Sorts after every character, so [prefix, prefix + END) holds exactly the
+# terms starting with prefix
+END = "\U0010ffff"
+REBUILD_BATCH_SIZE = 5000
+
+
+@event.listens_for(Contact, "before_insert")
+@event.listens_for(Contact, "before_update")
+def _fill_name_search_keys(mapper, connection, contact: Contact):
+    for key, value in name_search_keys(contact.first_name,
+                                       contact.last_name).items():
+        setattr(contact, key, value)
+
+
+def _rows(contact) -> list[dict]:
+    return [{"user_id": contact.user_id, "contact_id": contact.id,
+             "field": field, "term": term}
+            for field, term in search_terms(contact.first_name,
+                                            contact.last_name,
+                                            contact.email)]
+
+
+def _insert(connection: Connection, rows: list[dict]) -> None:
+    if rows:
+        connection.execute(insert(ContactSearchTerm), rows)
+
+
+def _delete(connection: Connection, user_id: int, contact_id: int) -> None:
+    connection.execute(delete(ContactSearchTerm).filter_by(
+        user_id=user_id, contact_id=contact_id))
+
+
+@event.listens_for(Contact, "after_insert")
+def _contact_inserted(mapper, connection: Connection, contact: Contact):
+    if contact.user_id is not None:
+        _insert(connection, _rows(contact))
+
+
+@event.listens_for(Contact, "after_update")
+def _contact_updated(mapper, connection: Connection, contact: Contact):
+    attrs = inspect(contact).attrs
+    if contact.user_id is None or not any(
+            attrs[field].history.has_changes() for field in SEARCHED_FIELDS):
+        return
+    _delete(connection, contact.user_id, contact.id)
+    _insert(connection, _rows(contact))
+
+
+@event.listens_for(Contact, "before_delete")
+def _contact_deleted(mapper, connection: Connection, contact: Contact):
+    if contact.user_id is not None:
+        _delete(connection, contact.user_id, contact.id)
+
+
+def rebuild_contact_search_terms(connection: Connection,
+                                 user_id: int | None = None) -> None:
+    """
+    Recompute the search terms from the contacts table.
+
+    Needed after contacts are written without the ORM (bulk loads, raw
+    SQL), which bypasses the mapper events keeping the terms current.
+
+    :param connection: Connection: A sync connection inside a transaction.
+    :param user_id: int | None: Only rebuild the terms of this user.
+    """
+    owned = Contact.user_id.is_not(None) if user_id is None \
+        else Contact.user_id == user_id
+    stmt = delete(ContactSearchTerm)
+    if user_id is not None:
+        stmt = stmt.filter_by(user_id=user_id)
+    connection.execute(stmt)
+    last_id = 0
+    while True:
+        contacts = connection.execute(
+            select(Contact.id, Contact.user_id, Contact.first_name,
+                   Contact.last_name, Contact.email)
+            .where(owned, Contact.id > last_id)
+            .order_by(Contact.id).limit(REBUILD_BATCH_SIZE)).all()
+        if not contacts:
+            return
+        _insert(connection, [row for contact in contacts
+                             for row in _rows(contact)])
+        last_id = contacts[-1].id
+
+
+async def autocomplete(query: str, limit: int, db: AsyncSession, user: User):
+    """
+    Find contacts whose names or email start with the typed text.
+
+    Every word of the query must be the start of a word of the contact's
+    names or of its email, so "jo do" finds John Doe.
+
+    :param query: str: The text typed so far.
+    :param limit: int: The maximum number of contacts to return.
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[dict]: Contacts ordered by the matching term, each with its id, first_name, last_name, email and the field the first word matched ("matched").
+    """
+    prefixes = [term for term in map(search_term, query.split()) if term]
+    if not prefixes:
+        return []
+    first, *rest = prefixes
+    term = ContactSearchTerm
+    stmt = (
+        select(term.term, term.contact_id, term.field, Contact.first_name,
+               Contact.last_name, Contact.email)
+        .join(Contact, and_(Contact.id == term.contact_id,
+                            Contact.user_id == term.user_id))
+        .where(term.user_id == user.id, term.term < first + END)
+    )
+    for prefix in rest:
+        other = aliased(ContactSearchTerm)
+        # Only columns of ix_contact_search_terms_contact, so the probe is
+        # answered by that index alone
+        stmt = stmt.where(select(other.term).where(
+            other.user_id == term.user_id, other.contact_id == term.contact_id,
+            other.term >= prefix, other.term < prefix + END).exists())
+    stmt = stmt.order_by(term.term, term.contact_id, term.field)
+    # A contact can match the first word with any number of its terms, so
+    # pages continue after the last row until enough distinct contacts
+    # are found
+    page_size = limit * len(SEARCHED_FIELDS)
+    suggestions: dict[int, dict] = {}
+    last = None
+    while len(suggestions) < limit:
+        if last is None:
+            page = stmt.where(term.term >= first)
+        else:
+            # The range starts at the last term, where the next page begins
+            page = stmt.where(
+                term.term >= last[0],
+                tuple_(term.term, term.contact_id, term.field) > last)
+        rows = (await db.execute(page.limit(page_size))).all()
+        for row in rows:
+            if row.contact_id not in suggestions:
+                suggestions[row.contact_id] = {
+                    "id": row.contact_id, "first_name": row.first_name,
+                    "last_name": row.last_name, "email": row.email,
+                    "matched": row.field}
+        if len(rows) < page_size:
+            break
+        last = (rows[-1].term, rows[-1].contact_id, rows[-1].field)
+    return list(suggestions.values())[:limit]
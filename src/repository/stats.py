@@ -0,0 +1,168 @@
+"""
+Per-user contact counters in the ``contact_stats`` table.
+
+The counters are maintained by mapper events on ``Contact``, so every flush
+that inserts, deletes or changes the birthday of a contact upserts the
+matching buckets in the same transaction. Reading the stats is a primary key
+range scan over at most a few dozen rows, whatever the number of contacts.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import Connection, event, func, inspect, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.entity.models import Contact, ContactStat, User
+
+TOTAL = "total"
+BIRTH_MONTH = "birth_month"
+ADDED_WEEK = "added_week"
+
+
+def week_start(day: date) -> date:
+    """
+    The Monday of the ISO week containing a day.
+
+    :param day: date: Any day of the week.
+    :return: date: The Monday of that week.
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def _week_bucket(dialect: str, column):
+    # SQL twin of week_start(), formatted as the bucket string
+    if dialect == "postgresql":
+        return func.to_char(func.date_trunc("week", column), "YYYY-MM-DD")
+    return func.date(column, "-6 days", "weekday 1")
+
+
+def _month_bucket(dialect: str, column):
+    if dialect == "postgresql":
+        return func.to_char(column, "MM")
+    return func.strftime("%m", column)
+
+
+def _upsert(connection: Connection, rows: list[dict]) -> None:
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(ContactStat).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContactStat.user_id, ContactStat.metric,
+                        ContactStat.bucket],
+        set_={"count": ContactStat.count + stmt.excluded.count})
+    connection.execute(stmt)
+
+
+def _rows(user_id: int, deltas: Counter) -> list[dict]:
+    return [{"user_id": user_id, "metric": metric, "bucket": bucket,
+             "count": delta}
+            for (metric, bucket), delta in deltas.items() if delta]
+
+
+@event.listens_for(Contact, "after_insert")
+def _contact_inserted(mapper, connection: Connection, contact: Contact):
+    if contact.user_id is None:
+        return
+    deltas = Counter({(TOTAL, ""): 1})
+    if contact.birthday:
+        deltas[BIRTH_MONTH, f"{contact.birthday.month:02d}"] += 1
+    rows = _rows(contact.user_id, deltas)
+    # created_at is filled in by the database, read it back from the row
+    week = select(_week_bucket(connection.dialect.name, Contact.created_at)
+                  ).where(Contact.id == contact.id,
+                          Contact.user_id == contact.user_id)
+    rows.append({"user_id": contact.user_id, "metric": ADDED_WEEK,
+                 "bucket": week.scalar_subquery(), "count": 1})
+    _upsert(connection, rows)
+
+
+@event.listens_for(Contact, "before_delete")
+def _contact_deleted(mapper, connection: Connection, contact: Contact):
+    if contact.user_id is None:
+        return
+    deltas = Counter({(TOTAL, ""): -1})
+    if contact.birthday:
+        deltas[BIRTH_MONTH, f"{contact.birthday.month:02d}"] -= 1
+    if contact.created_at:
+        deltas[ADDED_WEEK,
+               week_start(contact.created_at.date()).isoformat()] -= 1
+    _upsert(connection, _rows(contact.user_id, deltas))
+
+
+@event.listens_for(Contact, "after_update")
+def _contact_updated(mapper, connection: Connection, contact: Contact):
+    history = inspect(contact).attrs.birthday.history
+    if contact.user_id is None or not history.has_changes():
+        return
+    deltas = Counter()
+    for old in history.deleted:
+        if old:
+            deltas[BIRTH_MONTH, f"{old.month:02d}"] -= 1
+    for new in history.added:
+        if new:
+            deltas[BIRTH_MONTH, f"{new.month:02d}"] += 1
+    _upsert(connection, _rows(contact.user_id, deltas))
+
+
+def rebuild_contact_stats(connection: Connection) -> None:
+    """
+    Recompute every user's counters from the contacts table.
+
+    Needed after contacts are written without the ORM (bulk loads, raw
+    SQL), which bypasses the mapper events keeping the counters current.
+
+    :param connection: Connection: A sync connection inside a transaction.
+    """
+    dialect = connection.dialect.name
+    table = ContactStat.__table__
+    connection.execute(table.delete())
+    owned = Contact.user_id.is_not(None)
+    selects = [
+        select(Contact.user_id, literal(TOTAL), literal(""), func.count())
+        .where(owned).group_by(Contact.user_id),
+    ]
+    for metric, column, bucket in (
+            (BIRTH_MONTH, Contact.birthday,
+             _month_bucket(dialect, Contact.birthday)),
+            (ADDED_WEEK, Contact.created_at,
+             _week_bucket(dialect, Contact.created_at))):
+        selects.append(
+            select(Contact.user_id, literal(metric), bucket, func.count())
+            .where(owned, column.is_not(None))
+            .group_by(Contact.user_id, bucket))
+    for stmt in selects:
+        connection.execute(table.insert().from_select(
+            ["user_id", "metric", "bucket", "count"], stmt))
+
+
+async def get_contact_stats(weeks: int, db: AsyncSession, user: User):
+    """
+    Read a user's contact counters.
+
+    :param weeks: int: How many weeks, the current one included, to report contacts added in.
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: dict: The total, a count per month of birth (1 to 12) and a list of weekly counts, oldest week first. Months and weeks without contacts are reported as 0.
+    """
+    first_week = week_start(date.today()) - timedelta(weeks=weeks - 1)
+    stmt = select(ContactStat).filter_by(user_id=user.id).filter(
+        (ContactStat.metric != ADDED_WEEK)
+        | (ContactStat.bucket >= first_week.isoformat()))
+    result = await db.execute(stmt)
+    counts = {(stat.metric, stat.bucket): stat.count
+              for stat in result.scalars()}
+    return {
+        "total": counts.get((TOTAL, ""), 0),
+        "birth_months": [
+            {"month": month,
+             "count": counts.get((BIRTH_MONTH, f"{month:02d}"), 0)}
+            for month in range(1, 13)],
+        "added_per_week": [
+            {"week": week,
+             "count": counts.get((ADDED_WEEK, week.isoformat()), 0)}
+            for week in (first_week + timedelta(weeks=i)
+                         for i in range(weeks))],
+    }
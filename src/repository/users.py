@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,6 +9,8 @@ from src.database.db import get_db
 from src.entity.models import User
 from src.schemas.user import UserSchema
 
+logger = logging.getLogger(__name__)
+
 
 async def get_user_by_email(email: str, db: AsyncSession = Depends(get_db)):
     """
@@ -35,7 +39,7 @@ async def create_user(body: UserSchema, db: AsyncSession = Depends(get_db)):
         g = Gravatar(body.email)
         avatar = g.get_image()
     except Exception as err:
-        print(err)
+        logger.warning("Gravatar lookup failed: %s", err)
 
     new_user = User(**body.model_dump(), avatar=avatar)
     db.add(new_user)
@@ -44,6 +48,29 @@ async def create_user(body: UserSchema, db: AsyncSession = Depends(get_db)):
     return new_user
 
 
+async def get_unconfirmed_users(after_id: int, limit: int,
+                                db: AsyncSession):
+    """
+    Retrieve a chunk of users who have not confirmed their email yet.
+
+    Uses keyset pagination on the user ID, served by the partial index on
+    unconfirmed users, so every chunk costs the same regardless of depth.
+
+    :param after_id: int: Only users with an ID greater than this are returned.
+    :param limit: int: The maximum number of users to return.
+    :param db: AsyncSession: The database session.
+    :return: list: Rows of (id, email, username) ordered by ID.
+    """
+    stmt = (
+        select(User.id, User.email, User.username)
+        .where(User.confirmed.is_not(True), User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+
 async def update_token(user: User, token: str | None, db: AsyncSession):
     """
     Updates a user's refresh token.
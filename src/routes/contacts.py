@@ -1,20 +1,46 @@
 from fastapi_limiter.depends import RateLimiter
 from fastapi import APIRouter, Query, Path, HTTPException, Depends, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.entity.models import User
 from src.repository import contacts as repositories_contacts
+from src.repository import dedup as repositories_dedup
+from src.repository import search as repositories_search
+from src.repository import stats as repositories_stats
 from src.schemas.contact import (
     ContactCreateSchema,
     ContactResponse,
     ContactUpdateSchema,
     ContactShortResponse,
+    ContactBatchItem,
+    ContactBatchRequest,
+    ContactStatsResponse,
+    ContactSuggestion,
+    DuplicateCluster,
+    PhoneLookupResult,
+    SearchMode,
+    MAX_AUTOCOMPLETE_RESULTS,
+    MAX_BATCH_IDS,
+    MAX_DUPLICATE_CLUSTERS,
+    MAX_LOOKUP_PHONES,
+    MAX_STATS_WEEKS,
 )
 from src.services.auth import auth_service
+from src.services.responses import model_response
 from src.conf import messages
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+contact_adapter = TypeAdapter(ContactResponse)
+contact_list_adapter = TypeAdapter(list[ContactResponse])
+contact_short_list_adapter = TypeAdapter(list[ContactShortResponse])
+contact_batch_adapter = TypeAdapter(list[ContactBatchItem])
+contact_stats_adapter = TypeAdapter(ContactStatsResponse)
+duplicate_cluster_list_adapter = TypeAdapter(list[DuplicateCluster])
+phone_lookup_list_adapter = TypeAdapter(list[PhoneLookupResult])
+suggestion_list_adapter = TypeAdapter(list[ContactSuggestion])
+
 
 @router.get("/", response_model=list[ContactResponse])
 async def get_contacts(
@@ -23,6 +49,7 @@ async def get_contacts(
     first_name: str = Query(None),
     last_name: str = Query(None),
     email: str = Query(None),
+    search_mode: SearchMode = Query("contains"),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(auth_service.get_current_user),
 ):
@@ -34,25 +61,28 @@ async def get_contacts(
     :param first_name: str: Optional filter by first name.
     :param last_name: str: Optional filter by last name.
     :param email: str: Optional filter by email.
+    :param search_mode: SearchMode: How the name filters match: "contains" (default, substring), "translit" (prefix of the Latin spelling, so "Олена" finds "Olena" and back) or "phonetic" (names that sound alike, e.g. "Sergey" and "Serhii").
     :param db: AsyncSession: The database session.
     :param user: User: The current user.
     :return: list[ContactResponse]: A list of contact responses.
     :notes: This endpoint returns a paginated list of contacts, with optional filtering by first name, last name, and email.
     """
     contacts = await repositories_contacts.get_contacts(
-        limit, offset, first_name, last_name, email, db, user
+        limit, offset, first_name, last_name, email, db, user, search_mode
     )
-    return contacts
+    return model_response(contact_list_adapter, contacts)
 
 
 @router.get("/birthdays", response_model=list[ContactShortResponse])
 async def get_upcoming_birthdays(
+    days: int = Query(7, ge=0, le=366),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(auth_service.get_current_user),
 ):
     """
     Retrieves a list of upcoming birthdays.
 
+    :param days: int: How many days ahead to look, today included (default: 7, max: 366).
     :param db: AsyncSession: The database session.
     :param user: User: The current user.
     :return: list[ContactShortResponse]: A list of contact short responses with upcoming birthdays.
@@ -60,11 +90,9 @@ async def get_upcoming_birthdays(
     :notes: This endpoint returns a list of contacts with upcoming birthdays, validated against the ContactShortResponse model.
     """
     try:
-        contacts = await repositories_contacts.get_upcoming_birthdays(db, user)
-        validated_contacts = [
-            ContactShortResponse.model_validate(contact) for contact in contacts
-        ]
-        return validated_contacts
+        contacts = await repositories_contacts.get_upcoming_birthdays(db, user,
+                                                                      days)
+        return model_response(contact_short_list_adapter, contacts)
     except HTTPException as http_exc:
         raise http_exc
     except Exception:
@@ -74,6 +102,137 @@ async def get_upcoming_birthdays(
         )
 
 
+@router.get("/stats", response_model=ContactStatsResponse)
+async def get_contact_stats(
+    weeks: int = Query(12, ge=1, le=MAX_STATS_WEEKS),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Retrieves the contact count and simple aggregates for the current user.
+
+    :param weeks: int: How many weeks of added contacts to report, the current week included (default: 12, max: 104).
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: ContactStatsResponse: The total, contacts per month of birth and contacts added per week.
+    :notes: Served from the per-user contact_stats counters, so the cost doesn't grow with the number of contacts.
+    """
+    stats = await repositories_stats.get_contact_stats(weeks, db, user)
+    return model_response(contact_stats_adapter, stats)
+
+
+@router.get("/duplicates", response_model=list[DuplicateCluster])
+async def get_duplicate_contacts(
+    limit: int = Query(50, ge=1, le=MAX_DUPLICATE_CLUSTERS),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Retrieves groups of contacts that are likely duplicates.
+
+    :param limit: int: The maximum number of clusters to return (default: 50, max: 500).
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[DuplicateCluster]: Clusters of contacts sharing a phone number, an email local part or a name.
+    :notes: Contacts are only compared within blocks of equal normalized keys, never pairwise across the whole address book.
+    """
+    clusters = await repositories_dedup.find_duplicate_clusters(limit, db,
+                                                                user)
+    return model_response(duplicate_cluster_list_adapter, clusters)
+
+
+@router.get("/autocomplete", response_model=list[ContactSuggestion])
+async def autocomplete_contacts(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_AUTOCOMPLETE_RESULTS),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Suggests contacts whose names or email start with the typed text.
+
+    :param q: str: The text typed so far; every word must start a word of the names or the email.
+    :param limit: int: The maximum number of suggestions (default: 10, max: 50).
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[ContactSuggestion]: The matching contacts, ordered by the matched word.
+    :notes: Case and accents are ignored. Served by a range scan of the per-user search terms, not by a LIKE over the contacts.
+    """
+    suggestions = await repositories_search.autocomplete(q, limit, db, user)
+    return model_response(suggestion_list_adapter, suggestions)
+
+
+@router.get("/lookup", response_model=list[PhoneLookupResult])
+async def lookup_contacts_by_phone(
+    phone: list[str] = Query(min_length=1, max_length=MAX_LOOKUP_PHONES),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Finds the contacts with the given phone numbers, e.g. for caller ID.
+
+    :param phone: list[str]: The phone numbers in any format, as repeated ``phone`` query parameters (at most 50).
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[PhoneLookupResult]: One result per distinct number, in request order.
+    :notes: Numbers are matched in E.164 form with a single probe of the (user_id, phone_e164) index. Invalid numbers come back with e164=null and no contacts.
+    """
+    results = await repositories_contacts.lookup_contacts_by_phone(phone, db,
+                                                                   user)
+    return model_response(phone_lookup_list_adapter, results)
+
+
+async def _batch_response(contact_ids: list[int], db: AsyncSession,
+                         user: User):
+    contacts = await repositories_contacts.get_contacts_by_ids(contact_ids,
+                                                               db, user)
+    items = [
+        {"id": contact_id, "found": contact_id in contacts,
+         "contact": contacts.get(contact_id)}
+        for contact_id in contact_ids
+    ]
+    return model_response(contact_batch_adapter, items)
+
+
+# Оголошено перед /{contact_id}, інакше "batch" потрапить у той маршрут
+@router.get("/batch", response_model=list[ContactBatchItem])
+async def get_contacts_batch(
+    ids: list[int] = Query(min_length=1, max_length=MAX_BATCH_IDS),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Retrieves several contacts by ID with a single query.
+
+    :param ids: list[int]: The IDs of the contacts to retrieve, as repeated ``ids`` query parameters (at most 500).
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[ContactBatchItem]: One item per requested ID, in request order.
+    :notes: IDs that don't exist or belong to another user come back with found=false and no contact.
+    """
+    return await _batch_response(ids, db, user)
+
+
+@router.post("/batch", response_model=list[ContactBatchItem])
+async def post_contacts_batch(
+    body: ContactBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Retrieves several contacts by ID with a single query.
+
+    Same as GET /contacts/batch, for ID lists too long for a query string.
+
+    :param body: ContactBatchRequest: The IDs of the contacts to retrieve (at most 500).
+    :param db: AsyncSession: The database session.
+    :param user: User: The current user.
+    :return: list[ContactBatchItem]: One item per requested ID, in request order.
+    :notes: IDs that don't exist or belong to another user come back with found=false and no contact.
+    """
+    return await _batch_response(body.ids, db, user)
+
+
 @router.post(
     "/",
     response_model=ContactResponse,
@@ -99,7 +258,8 @@ async def create_contact(
     """
     try:
         contact = await repositories_contacts.create_contact(body, db, user)
-        return contact
+        return model_response(contact_adapter, contact,
+                              status.HTTP_201_CREATED)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -129,10 +289,10 @@ async def get_contact(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=messages.CONTACT_NOT_FOUND
         )
-    return contact
+    return model_response(contact_adapter, contact)
 
 
-@router.put("/{contact_id}")
+@router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(
     body: ContactUpdateSchema,
     contact_id: int = Path(ge=1),
@@ -146,7 +306,7 @@ async def update_contact(
     :param contact_id: int: The ID of the contact to update (must be greater than or equal to 1).
     :param db: AsyncSession: The database session.
     :param user: User: The current user.
-    :return: Contact: The updated contact.
+    :return: ContactResponse: The updated contact response.
     :raises HTTPException: If the contact is not found.
     :notes: This endpoint updates a contact by its ID, using the provided update schema.
             If the contact is not found, a 404 error is raised.
@@ -157,7 +317,7 @@ async def update_contact(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=messages.CONTACT_NOT_FOUND
         )
-    return contact
+    return model_response(contact_adapter, contact)
 
 
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -176,5 +336,5 @@ async def delete_contact(
     :notes: This endpoint deletes a contact by its ID.
             If the contact is deleted successfully, a 204 status code is returned.
     """
-    contact = await repositories_contacts.delete_contact(contact_id, db, user)
-    return contact
+    # A 204 has no body, so the deleted contact isn't serialized
+    await repositories_contacts.delete_contact(contact_id, db, user)
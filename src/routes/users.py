@@ -1,24 +1,24 @@
 import pickle
-import cloudinary
-import cloudinary.uploader
-from fastapi import APIRouter, Depends, UploadFile, File
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, \
+    Path, status
+from fastapi.responses import FileResponse
 from fastapi_limiter.depends import RateLimiter
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.entity.models import User
 from src.schemas.user import UserResponse
 from src.services.auth import auth_service
-from src.conf.config import config
+from src.services.avatar import upload_avatar
+from src.services.responses import model_response
+from src.services.storage import AvatarStorage, LocalStorage, \
+    get_avatar_storage, IMMUTABLE_CACHE_CONTROL
+from src.conf import messages
 from src.repository import users as repositories_users
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-cloudinary.config(
-    cloud_name=config.CLD_NAME,
-    api_key=config.CLD_API_KEY,
-    api_secret=config.CLD_API_SECRET,
-    secure=True,
-)
+user_adapter = TypeAdapter(UserResponse)
 
 
 @router.get(
@@ -35,7 +35,7 @@ async def read_users_me(user: User = Depends(auth_service.get_current_user)):
     :notes: This endpoint returns the current user's information.
             The endpoint is rate-limited to 1 request per 20 seconds.
     """
-    return user
+    return model_response(user_adapter, user)
 
 
 @router.patch(
@@ -47,6 +47,7 @@ async def update_avatar_user(
     file: UploadFile = File(),
     user: User = Depends(auth_service.get_current_user),
     db: AsyncSession = Depends(get_db),
+    storage: AvatarStorage = Depends(get_avatar_storage),
 ):
     """
     Updates the current user's avatar.
@@ -54,18 +55,46 @@ async def update_avatar_user(
     :param file: UploadFile: The new avatar file.
     :param user: User: The current user.
     :param db: AsyncSession: The database session.
+    :param storage: AvatarStorage: The avatar storage backend.
     :return: UserResponse: The updated user's information.
+    :raises HTTPException: If the file is too large or is not an image.
     :notes: This endpoint updates the current user's avatar.
             The endpoint is rate-limited to 1 request per 20 seconds.
-            The avatar is uploaded to Cloudinary and the URL is updated in the database.
+            A 250x250 thumbnail is generated and uploaded off the event loop,
+            and the URL is updated in the database.
+            Re-uploading the current avatar does no work.
     """
-    public_id = f"ContactsApp/{user.email}"
-    res = cloudinary.uploader.upload(file.file, public_id=public_id, owerite=True)
-    print(res)
-    res_url = cloudinary.CloudinaryImage(public_id).build_url(
-        width=250, height=250, crop="fill", version=res.get("version")
-    )
+    res_url = await upload_avatar(file, storage)
+    if res_url == user.avatar:
+        return model_response(user_adapter, user)
     user = await repositories_users.update_avatar_url(user.email, res_url, db)
     auth_service.cache.set(user.email, pickle.dumps(user))
     auth_service.cache.expire(user.email, 300)
-    return user
+    return model_response(user_adapter, user)
+
+
+@router.get("/avatars/{name}", response_class=FileResponse)
+async def get_avatar(
+    name: str = Path(pattern=r"^[0-9a-f]{64}\.jpg$"),
+    storage: AvatarStorage = Depends(get_avatar_storage),
+):
+    """
+    Serves an avatar stored on the local filesystem.
+
+    :param name: str: The file name of the avatar (content key and extension).
+    :param storage: AvatarStorage: The avatar storage backend.
+    :return: FileResponse: The avatar image.
+    :raises HTTPException: If local storage is not used or the avatar does not exist.
+    :notes: Avatars are content-addressed, so they are served with long-lived,
+            immutable cache headers.
+    """
+    key = name.removesuffix(".jpg")
+    if not isinstance(storage, LocalStorage) or not storage.exists(key):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=messages.AVATAR_NOT_FOUND
+        )
+    return FileResponse(
+        storage.path(key),
+        media_type="image/jpeg",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
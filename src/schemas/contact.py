@@ -1,8 +1,11 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
 from datetime import date, datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from src.schemas.user import UserResponse
+from src.schemas.user import UserResponse, StoredEmail
+
+
+SearchMode = Literal["contains", "translit", "phonetic"]
 
 
 def validate_birthday(value: date) -> date:
@@ -57,12 +60,73 @@ class ContactUpdateSchema(BaseModel):
 
 
 class ContactResponse(ContactBase):
+    email: StoredEmail
     id: int
     created_at: datetime | None
     updated_at: datetime | None
     # user: UserResponse | None
 
 
+MAX_BATCH_IDS = 500
+
+
+class ContactBatchRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class ContactBatchItem(BaseModel):
+    id: int
+    found: bool
+    contact: ContactResponse | None = None
+
+
+MAX_AUTOCOMPLETE_RESULTS = 50
+
+
+class ContactSuggestion(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    matched: str
+
+
+MAX_LOOKUP_PHONES = 50
+
+
+class PhoneLookupResult(BaseModel):
+    phone: str
+    e164: str | None
+    contacts: list[ContactResponse]
+
+
+MAX_DUPLICATE_CLUSTERS = 500
+
+
+class DuplicateCluster(BaseModel):
+    reasons: list[str]
+    contacts: list[ContactResponse]
+
+
+MAX_STATS_WEEKS = 104
+
+
+class BirthMonthCount(BaseModel):
+    month: int
+    count: int
+
+
+class WeekCount(BaseModel):
+    week: date
+    count: int
+
+
+class ContactStatsResponse(BaseModel):
+    total: int
+    birth_months: list[BirthMonthCount]
+    added_per_week: list[WeekCount]
+
+
 class ContactShortResponse(BaseModel):
     first_name: str
     last_name: str
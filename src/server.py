@@ -0,0 +1,108 @@
+"""
+Production entry point serving main:app with uvicorn.
+
+Usage: python -m src.server serve [--host 0.0.0.0] [--port 8000] \
+           [--workers 4]
+
+Every worker is a separate process importing main:app, so the Redis clients
+and the database pool are created inside each worker (in the lifespan and on
+first use) and are never shared across a fork.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from src.conf.config import config
+from src.conf.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers() -> int:
+    """
+    Get the number of worker processes to start.
+
+    :return: int: WEB_CONCURRENCY if set, otherwise the number of CPUs.
+    """
+    if config.WEB_CONCURRENCY:
+        return config.WEB_CONCURRENCY
+    return os.cpu_count() or 1
+
+
+def event_loop() -> str:
+    """
+    Pick the uvicorn event loop implementation.
+
+    :return: str: "uvloop" if it is installed, otherwise "asyncio".
+    """
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    """
+    Pick the uvicorn HTTP protocol implementation.
+
+    :return: str: "httptools" if it is installed, otherwise "h11".
+    """
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def serve(host: str | None = None, port: int | None = None,
+          workers: int | None = None) -> None:
+    """
+    Run the API until it is told to stop.
+
+    On SIGINT/SIGTERM uvicorn stops accepting connections and waits up to
+    GRACEFUL_SHUTDOWN_TIMEOUT seconds for in-flight requests before the
+    lifespan closes the Redis clients and the database pool.
+
+    Metrics are kept per worker process. With more than one worker they are
+    shared through METRICS_DIR (a new temporary directory if it isn't set),
+    so /metrics reports the totals of all workers; see
+    src/services/metrics.py.
+
+    :param host: str | None: The interface to bind, SERVER_HOST by default.
+    :param port: int | None: The port to bind, SERVER_PORT by default.
+    :param workers: int | None: The number of worker processes.
+    :return: None
+    """
+    workers = workers or default_workers()
+    if workers > 1 and not config.METRICS_DIR:
+        # Read by the workers' config when they import main:app
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="metrics-")
+    loop, http = event_loop(), http_protocol()
+    logger.info("Starting %d worker(s) with %s/%s", workers, loop, http)
+    uvicorn.run(
+        "main:app",
+        host=host or config.SERVER_HOST,
+        port=port or config.SERVER_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_graceful_shutdown=config.GRACEFUL_SHUTDOWN_TIMEOUT,
+        log_level=config.LOG_LEVEL.lower(),
+        # Logging is configured by main.py in every worker
+        log_config=None,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the API server")
+    serve_parser.add_argument("--host")
+    serve_parser.add_argument("--port", type=int)
+    serve_parser.add_argument("--workers", type=int,
+                              help="Defaults to WEB_CONCURRENCY or the CPU "
+                                   "count")
+    args = parser.parse_args()
+    setup_logging(config.LOG_LEVEL)
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
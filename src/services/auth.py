@@ -1,3 +1,5 @@
+import functools
+import logging
 import pickle
 from datetime import datetime, timedelta, timezone
 import datetime as dt
@@ -5,7 +7,6 @@ from typing import Optional
 
 import redis
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
@@ -13,21 +14,45 @@ from jose import JWTError, jwt
 from src.database.db import get_db
 from src.repository import users as repositories_users
 from src.conf.config import config
+from src.services.metrics import BCRYPT_IN_PROGRESS, BCRYPT_LATENCY, \
+    USER_CACHE
+
+logger = logging.getLogger(__name__)
 
 
 class Auth:
     """
     Authentication service class.
     """
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     SECRET_KEY = config.SECRET_KEY_JWT
     ALGORITHM = config.ALGORITHM
-    cache = redis.Redis(
-        host=config.REDIS_DOMAIN,
-        port=config.REDIS_PORT,
-        db=0,
-        password=config.REDIS_PASSWORD,
-    )
+
+    # The password context and the cache client are built on first use, so
+    # importing the app doesn't pay for passlib or a Redis connection pool
+    @functools.cached_property
+    def pwd_context(self):
+        """
+        The bcrypt password hashing context.
+
+        :return: CryptContext: The password hashing context.
+        """
+        from passlib.context import CryptContext
+
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+    @functools.cached_property
+    def cache(self) -> redis.Redis:
+        """
+        The Redis client caching the current user.
+
+        :return: redis.Redis: The cache client.
+        """
+        return redis.Redis(
+            host=config.REDIS_DOMAIN,
+            port=config.REDIS_PORT,
+            db=0,
+            password=config.REDIS_PASSWORD,
+        )
 
     def verify_password(self, plain_password, hashed_password):
         """
@@ -37,7 +62,9 @@ class Auth:
         :param hashed_password: str: The hashed password to verify against.
         :return: bool: True if the passwords match, False otherwise.
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        with BCRYPT_IN_PROGRESS.track_inprogress(), \
+                BCRYPT_LATENCY.time("verify"):
+            return self.pwd_context.verify(plain_password, hashed_password)
 
     def get_password_hash(self, password: str):
         """
@@ -46,7 +73,9 @@ class Auth:
         :param password: str: The password to hash.
         :return: str: The hashed password.
         """
-        return self.pwd_context.hash(password)
+        with BCRYPT_IN_PROGRESS.track_inprogress(), \
+                BCRYPT_LATENCY.time("hash"):
+            return self.pwd_context.hash(password)
 
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
@@ -156,14 +185,16 @@ class Auth:
         user = self.cache.get(user_hash)
 
         if user is None:
-            print("User from database")
+            USER_CACHE.inc("miss")
+            logger.debug("User from database")
             user = await repositories_users.get_user_by_email(email, db)
             if user is None:
                 raise credentials_exception
             self.cache.set(user_hash, pickle.dumps(user))
             self.cache.expire(user_hash, 300)
         else:
-            print("User from cache")
+            USER_CACHE.inc("hit")
+            logger.debug("User from cache")
             user = pickle.loads(user)
         return user
 
@@ -180,6 +211,24 @@ class Auth:
         token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return token
 
+    def create_email_tokens(self, emails: list[str]) -> list[str]:
+        """
+        Create email verification tokens for many addresses at once.
+
+        Equivalent to calling create_email_token for each address, but the
+        issue and expiry timestamps are computed once for the whole batch.
+
+        :param emails: list[str]: The email addresses to create tokens for.
+        :return: list[str]: The encoded tokens, in the same order as emails.
+        """
+        now = datetime.now(dt.timezone.utc)
+        claims = {"iat": now, "exp": now + timedelta(days=7)}
+        return [
+            jwt.encode({"sub": email, **claims}, self.SECRET_KEY,
+                       algorithm=self.ALGORITHM)
+            for email in emails
+        ]
+
     async def get_email_from_token(self, token: str):
         """
         Extract the email address from a token.
@@ -193,7 +242,7 @@ class Auth:
             email = payload["sub"]
             return email
         except JWTError as e:
-            print(e)
+            logger.info("Invalid email verification token: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Invalid token for email verification",
@@ -0,0 +1,98 @@
+import hashlib
+from io import BytesIO
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+from src.conf import messages
+from src.conf.config import config
+from src.services.storage import AvatarStorage
+
+AVATAR_SIZE = (250, 250)
+CHUNK_SIZE = 64 * 1024
+# Part of the content key, so changing the thumbnail format changes all keys
+THUMBNAIL_SPEC = b"fill-250x250-jpeg85"
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an uploaded file from its spool in chunks, enforcing a size limit.
+
+    :param file: UploadFile: The uploaded file.
+    :param max_bytes: int: The maximum allowed size in bytes.
+    :return: bytes: The file content.
+    :raises HTTPException: If the file is larger than max_bytes.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=messages.AVATAR_TOO_LARGE,
+    )
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+    chunks = []
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def make_thumbnail(data: bytes) -> bytes:
+    """
+    Crop and resize an image to the avatar size.
+
+    :param data: bytes: The original encoded image.
+    :return: bytes: The 250x250 JPEG thumbnail.
+    :raises HTTPException: If the data is not a readable image.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # Let the JPEG decoder downscale while decoding
+            image.draft("RGB", (AVATAR_SIZE[0] * 2, AVATAR_SIZE[1] * 2))
+            image = ImageOps.exif_transpose(image)
+            thumbnail = ImageOps.fit(image.convert("RGB"), AVATAR_SIZE,
+                                     Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.INVALID_IMAGE,
+        )
+    buffer = BytesIO()
+    thumbnail.save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def content_key(data: bytes) -> str:
+    """
+    Compute the content key of an uploaded image.
+
+    :param data: bytes: The original encoded image.
+    :return: str: The hex SHA-256 of the thumbnail spec and the image.
+    """
+    return hashlib.sha256(THUMBNAIL_SPEC + data).hexdigest()
+
+
+def _store_avatar(data: bytes, storage: AvatarStorage) -> str:
+    key = content_key(data)
+    if storage.exists(key):
+        return storage.url(key)
+    return storage.upload(make_thumbnail(data), key)
+
+
+async def upload_avatar(file: UploadFile, storage: AvatarStorage) -> str:
+    """
+    Store a thumbnail of an uploaded avatar without blocking the event loop.
+
+    The upload is read with a size limit, then hashed, thumbnailed and
+    uploaded to the storage in a worker thread. An image that is already
+    stored under its content key is neither thumbnailed nor uploaded again.
+
+    :param file: UploadFile: The uploaded image.
+    :param storage: AvatarStorage: The storage backend.
+    :return: str: The URL of the stored avatar.
+    """
+    data = await read_upload(file, config.AVATAR_MAX_BYTES)
+    return await run_in_threadpool(_store_avatar, data, storage)
@@ -0,0 +1,217 @@
+"""
+Per-user birthday calendars cached in Redis.
+
+A calendar is a sorted set of contact IDs scored by month and day of birth
+(``MMDD`` as a number), so any window of days is one or two ZRANGEBYSCORE
+calls. It is built from the database on first use, expires at local
+midnight and is dropped after every commit that adds, deletes or changes
+the birthday of one of the user's contacts.
+
+The same score is kept in ``Contact.birthday_md`` for the daily digest job,
+which reads one day across all users from its index.
+"""
+import calendar
+import logging
+from datetime import date, datetime, time, timedelta
+
+from redis import RedisError, WatchError
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from src.entity.models import Contact, User
+from src.services.auth import auth_service
+
+logger = logging.getLogger(__name__)
+
+# Keeps the set of a user without birthdays from looking uncached
+EMPTY_MARKER = "-"
+# Users whose calendar the current transaction invalidates
+_PENDING = "birthday_calendar_users"
+
+
+def month_day(day: date) -> int:
+    """
+    The calendar score of a date.
+
+    :param day: date: The date.
+    :return: int: month * 100 + day, e.g. 1231 for 31 December.
+    """
+    return day.month * 100 + day.day
+
+
+def digest_month_days(day: date) -> list[int]:
+    """
+    The scores of the birthdays celebrated on a day.
+
+    In years without 29 February those birthdays are celebrated on the 28th.
+
+    :param day: date: The day.
+    :return: list[int]: The ``month_day`` values to look up.
+    """
+    scores = [month_day(day)]
+    if scores == [228] and not calendar.isleap(day.year):
+        scores.append(229)
+    return scores
+
+
+def score_ranges(start: date, days: int) -> list[tuple[int, int]]:
+    """
+    The score ranges covering ``days`` days after ``start``, in date order.
+
+    :param start: date: The first day of the window.
+    :param days: int: The number of days after the first one.
+    :return: list[tuple[int, int]]: Inclusive (min, max) score ranges; two when the window crosses New Year.
+    """
+    first = month_day(start)
+    if days >= 365:
+        return [(first, 1231), (101, first - 1)]
+    last = month_day(start + timedelta(days=days))
+    if last < first:
+        return [(first, 1231), (101, last)]
+    return [(first, last)]
+
+
+def _next_midnight(today: date) -> int:
+    return int(datetime.combine(today + timedelta(days=1), time.min)
+               .timestamp())
+
+
+class BirthdayCalendar:
+    """
+    Birthday calendars of all users, one sorted set per user.
+    """
+
+    def __init__(self, prefix: str = "birthdays"):
+        self.prefix = prefix
+
+    @property
+    def redis(self):
+        return auth_service.cache
+
+    def _keys(self, email: str) -> tuple[str, str]:
+        # Emails, unlike IDs, are unique across shards
+        key = f"{self.prefix}:{email}"
+        return key, f"{key}:generation"
+
+    async def upcoming_ids(self, db: AsyncSession, user: User, start: date,
+                           days: int) -> list[int]:
+        """
+        IDs of the user's contacts with a birthday in a window of days.
+
+        :param db: AsyncSession: The database session, used to build the calendar.
+        :param user: User: The current user.
+        :param start: date: The first day of the window.
+        :param days: int: The number of days after the first one.
+        :return: list[int]: The contact IDs, ordered by upcoming birthday.
+        """
+        ranges = score_ranges(start, days)
+        try:
+            cached = self._cached(user.email, ranges)
+            if cached is not None:
+                return cached
+            scores = await self._build(db, user, start)
+        except RedisError as err:
+            logger.warning("Birthday calendar unavailable: %r", err)
+            scores = await self._scores(db, user)
+        ordered = sorted(scores.items(), key=lambda item: item[1])
+        return [contact_id for low, high in ranges
+                for contact_id, score in ordered if low <= score <= high]
+
+    def _cached(self, email: str,
+                ranges: list[tuple[int, int]]) -> list[int] | None:
+        key, _ = self._keys(email)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.exists(key)
+        for low, high in ranges:
+            pipe.zrangebyscore(key, low, high)
+        exists, *found = pipe.execute()
+        if not exists:
+            return None
+        return [int(member) for members in found for member in members]
+
+    @staticmethod
+    async def _scores(db: AsyncSession, user: User) -> dict[int, int]:
+        rows = await db.execute(
+            select(Contact.id, Contact.birthday).filter_by(user_id=user.id))
+        return {contact_id: month_day(birthday)
+                for contact_id, birthday in rows if birthday}
+
+    async def _build(self, db: AsyncSession, user: User,
+                     today: date) -> dict[int, int]:
+        key, generation = self._keys(user.email)
+        with self.redis.pipeline() as pipe:
+            # An invalidation while the rows are read bumps the generation
+            # and makes the write below fail instead of caching stale data
+            pipe.watch(generation)
+            scores = await self._scores(db, user)
+            pipe.multi()
+            pipe.delete(key)
+            pipe.zadd(key, {EMPTY_MARKER: -1, **scores})
+            pipe.expireat(key, _next_midnight(today))
+            try:
+                pipe.execute()
+            except WatchError:
+                logger.debug("Birthday calendar of %s changed while building",
+                             user.email)
+        return scores
+
+    def invalidate(self, *emails: str) -> None:
+        """
+        Drop the calendars of some users.
+
+        :param emails: str: The emails of the users.
+        :return: None
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for email in emails:
+            key, generation = self._keys(email)
+            pipe.delete(key)
+            pipe.incr(generation)
+            pipe.expire(generation, 24 * 60 * 60)
+        pipe.execute()
+
+
+birthday_calendar = BirthdayCalendar()
+
+
+@event.listens_for(Contact, "before_insert")
+@event.listens_for(Contact, "before_update")
+def _fill_birthday_md(mapper, connection, contact: Contact):
+    contact.birthday_md = month_day(contact.birthday) if contact.birthday \
+        else None
+
+
+def _mark(contact: Contact) -> None:
+    session = object_session(contact)
+    if session is not None and contact.user is not None:
+        session.info.setdefault(_PENDING, set()).add(contact.user.email)
+
+
+@event.listens_for(Contact, "after_insert")
+@event.listens_for(Contact, "after_delete")
+def _contact_written(mapper, connection, contact: Contact):
+    _mark(contact)
+
+
+@event.listens_for(Contact, "after_update")
+def _contact_updated(mapper, connection, contact: Contact):
+    if inspect(contact).attrs.birthday.history.has_changes():
+        _mark(contact)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_calendars(session: Session):
+    emails = session.info.pop(_PENDING, None)
+    if not emails:
+        return
+    try:
+        birthday_calendar.invalidate(*emails)
+    except RedisError as err:
+        # The calendar catches up at midnight at the latest
+        logger.warning("Could not invalidate birthday calendars: %r", err)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_calendars(session: Session):
+    session.info.pop(_PENDING, None)
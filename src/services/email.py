@@ -1,25 +1,127 @@
+import asyncio
+import functools
+import logging
 from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, AsyncIterable
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pydantic import EmailStr
 
 from src.services.auth import auth_service
 from src.conf.config import config
+from src.services.metrics import SMTP_SEND_LATENCY
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=config.MAIL_USERNAME,
-    MAIL_PASSWORD=config.MAIL_PASSWORD,
-    MAIL_FROM=config.MAIL_FROM,
-    MAIL_PORT=config.MAIL_PORT,
-    MAIL_SERVER=config.MAIL_SERVER,
-    MAIL_FROM_NAME="CONTACT Systems",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
+if TYPE_CHECKING:
+    from fastapi_mail import FastMail, MessageSchema
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FOLDER = Path(__file__).parent / 'templates'
+VERIFY_EMAIL_TEMPLATE = "verify_email.html"
+RESET_PASSWORD_TEMPLATE = "reset_password.html"
+BIRTHDAY_DIGEST_TEMPLATE = "birthday_digest.html"
+
+
+@functools.cache
+def get_mail() -> "FastMail":
+    """
+    Get the mail client, building it on first use.
+
+    fastapi_mail is slow to import, so it is only loaded by processes that
+    actually send mail.
+
+    :return: FastMail: The configured mail client.
+    """
+    from fastapi_mail import ConnectionConfig, FastMail
+
+    conf = ConnectionConfig(
+        MAIL_USERNAME=config.MAIL_USERNAME,
+        MAIL_PASSWORD=config.MAIL_PASSWORD,
+        MAIL_FROM=config.MAIL_FROM,
+        MAIL_PORT=config.MAIL_PORT,
+        MAIL_SERVER=config.MAIL_SERVER,
+        MAIL_FROM_NAME="CONTACT Systems",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=True,
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True,
+        TEMPLATE_FOLDER=TEMPLATE_FOLDER,
+    )
+    return FastMail(conf)
+
+
+# FastMail builds a new Jinja environment (and recompiles the template) on
+# every ``send_message(..., template_name=...)`` call, so templates are
+# compiled once here and rendered into the message body ourselves.
+template_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_FOLDER),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
 )
+templates = {
+    name: template_env.get_template(name)
+    for name in (VERIFY_EMAIL_TEMPLATE, RESET_PASSWORD_TEMPLATE,
+                 BIRTHDAY_DIGEST_TEMPLATE)
+}
+
+
+def render_template(template_name: str, **context) -> str:
+    """
+    Render a precompiled email template.
+
+    :param template_name: str: The file name of the template in the templates folder.
+    :param context: The variables passed to the template.
+    :return: str: The rendered HTML.
+    """
+    template = templates.get(template_name)
+    if template is None:
+        template = templates[template_name] = template_env.get_template(
+            template_name)
+    return template.render(**context)
+
+
+def build_message(email: EmailStr, subject: str, template_name: str,
+                  **context) -> "MessageSchema":
+    """
+    Build a ready-to-send HTML message from a precompiled template.
+
+    The schema is constructed without re-validation: recipients come from
+    already validated user records and the message has no attachments.
+
+    :param email: EmailStr: The recipient's email address.
+    :param subject: str: The subject of the message.
+    :param template_name: str: The file name of the template to render.
+    :param context: The variables passed to the template.
+    :return: MessageSchema: The message with the rendered body.
+    """
+    from fastapi_mail import MessageSchema, MessageType
+
+    return MessageSchema.model_construct(
+        subject=subject,
+        recipients=[email],
+        body=render_template(template_name, **context),
+        subtype=MessageType.html,
+    )
+
+
+async def send_message(message: "MessageSchema") -> None:
+    """
+    Send a prepared message, recording the SMTP send latency.
+
+    :param message: MessageSchema: The message to send.
+    :return: None
+    :raises ConnectionErrors: If there is an error sending the email.
+    """
+    from fastapi_mail.errors import ConnectionErrors
+
+    start = perf_counter()
+    try:
+        await get_mail().send_message(message)
+    except ConnectionErrors:
+        SMTP_SEND_LATENCY.observe(perf_counter() - start, "error")
+        raise
+    SMTP_SEND_LATENCY.observe(perf_counter() - start, "ok")
 
 
 async def send_email(email: EmailStr, username: str, host: str):
@@ -32,17 +134,68 @@ async def send_email(email: EmailStr, username: str, host: str):
     :return: None
     :raises ConnectionErrors: If there is an error sending the email.
     """
+    from fastapi_mail.errors import ConnectionErrors
+
     try:
         token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username,
-                           "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
+        message = build_message(email, "Confirm your email ",
+                                VERIFY_EMAIL_TEMPLATE, host=host,
+                                username=username, token=token_verification)
+        await send_message(message)
     except ConnectionErrors as err:
-        print(err)
+        logger.error("Failed to send email: %s", err)
+
+
+async def send_bulk(messages: AsyncIterable["MessageSchema"], rate: float,
+                    concurrency: int = 4) -> int:
+    """
+    Send a stream of messages at a controlled rate.
+
+    Messages are pulled from the stream into a small bounded queue, so the
+    producer never gets far ahead of the SMTP senders, and send slots are
+    spaced evenly so no more than ``rate`` messages per second are sent. A
+    message that fails to send is logged and skipped, so the senders keep
+    draining the queue.
+
+    :param messages: AsyncIterable[MessageSchema]: The messages to send.
+    :param rate: float: The maximum number of messages sent per second.
+    :param concurrency: int: The number of concurrent SMTP senders.
+    :return: int: The number of messages sent successfully.
+    :raises ValueError: If rate is not positive.
+    """
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    interval = 1 / rate
+    next_slot = loop.time()
+    sent = 0
+
+    async def sender():
+        nonlocal next_slot, sent
+        while (message := await queue.get()) is not None:
+            now = loop.time()
+            delay = next_slot - now
+            next_slot = max(now, next_slot) + interval
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await send_message(message)
+                sent += 1
+            except Exception as err:
+                # Any error, not just SMTP ones: a sender that dies leaves
+                # the producer blocked on a full queue
+                logger.error("Failed to send email to %s: %r",
+                             message.recipients, err)
+
+    senders = [asyncio.create_task(sender()) for _ in range(concurrency)]
+    try:
+        async for message in messages:
+            await queue.put(message)
+        for _ in senders:
+            await queue.put(None)
+        await asyncio.gather(*senders)
+    finally:
+        for task in senders:
+            task.cancel()
+    return sent
@@ -0,0 +1,303 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Every worker process has its own values. With several workers (see
+src/server.py) a registry given a directory (METRICS_DIR) writes a snapshot
+of its values there about once a second, and /metrics adds up the snapshots
+of all workers, so a scrape sees the totals of the whole server whichever
+worker answers it. Counters and histograms of workers that have exited are
+kept; their gauges are dropped.
+"""
+import asyncio
+import json
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+
+from src.conf.config import config
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base class for metrics with an optional fixed set of label names.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.kind}"]
+
+    def snapshot(self) -> list:
+        """
+        The current values, in a JSON-serializable form.
+
+        :return: list: One entry per label set.
+        """
+        raise NotImplementedError
+
+    def merge(self, values: dict, snapshot: list) -> None:
+        """
+        Add a snapshot of another process to a copy of the values.
+
+        :param values: dict: The values to add to, keyed like ``_values``.
+        :param snapshot: list: A snapshot of the same metric.
+        :return: None
+        """
+        raise NotImplementedError
+
+    def render(self, values: dict | None = None) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    A value that only goes up.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), value]
+                    for labels, value in self._values.items()]
+
+    def merge(self, values: dict, snapshot: list) -> None:
+        for labels, value in snapshot:
+            labels = tuple(labels)
+            values[labels] = values.get(labels, 0) + value
+
+    def render(self, values: dict | None = None) -> list[str]:
+        values = self._values if values is None else values
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down.
+    """
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track_inprogress(self, *labels):
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(Metric):
+    """
+    Counts observations in cumulative buckets.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [
+                    [0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, *labels)
+
+    def count(self, *labels) -> int:
+        series = self._values.get(labels)
+        return sum(series[0]) if series else 0
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), list(counts), total]
+                    for labels, (counts, total) in self._values.items()]
+
+    def merge(self, values: dict, snapshot: list) -> None:
+        for labels, counts, total in snapshot:
+            labels = tuple(labels)
+            series = values.get(labels)
+            if series is None:
+                values[labels] = [list(counts), total]
+            else:
+                values[labels] = [[a + b for a, b in zip(series[0], counts)],
+                                  series[1] + total]
+
+    def render(self, values: dict | None = None) -> list[str]:
+        values = self._values if values is None else values
+        lines = self.header()
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _format_labels(self.labelnames, labels,
+                                           f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """
+    A collection of metrics rendered together.
+
+    :param directory: str | None: Where the worker processes of one server share their snapshots; None renders this process's values only.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self._metrics: list[Metric] = []
+        self.directory = Path(directory) if directory else None
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def write_snapshot(self) -> None:
+        """
+        Save the values of this process for the other workers to render.
+
+        :return: None
+        """
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({metric.name: metric.snapshot()
+                                   for metric in self._metrics}))
+        # Readers never see a half-written snapshot
+        os.replace(tmp, path)
+
+    def _other_snapshots(self) -> list[tuple[bool, dict]]:
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            pid = int(path.stem)
+            if pid == os.getpid():
+                continue
+            try:
+                snapshots.append((_alive(pid), json.loads(path.read_text())))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        lines = []
+        if self.directory is None:
+            for metric in self._metrics:
+                lines.extend(metric.render())
+            return "\n".join(lines) + "\n"
+        others = self._other_snapshots()
+        for metric in self._metrics:
+            values: dict = {}
+            metric.merge(values, metric.snapshot())
+            for alive, snapshot in others:
+                if alive or not isinstance(metric, Gauge):
+                    metric.merge(values, snapshot.get(metric.name, []))
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+    async def write_snapshots(self, interval: float = 1.0) -> None:
+        """
+        Write a snapshot every ``interval`` seconds until cancelled.
+
+        :param interval: float: Seconds between snapshots.
+        :return: None
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.write_snapshot()
+
+
+registry = Registry(config.METRICS_DIR or None)
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    ("method", "route", "status")))
+DB_QUERIES = registry.register(Counter(
+    "db_queries_total", "Database queries executed."))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "db_query_duration_seconds", "Database query latency."))
+DB_POOL_CHECKOUTS = registry.register(Counter(
+    "db_pool_checkouts_total",
+    "Database connections checked out of the pool."))
+DB_CONNECTIONS_IN_USE = registry.register(Gauge(
+    "db_pool_connections_in_use",
+    "Database connections currently checked out of the pool."))
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "db_queries_per_request", "Database queries executed per HTTP request.",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)))
+USER_CACHE = registry.register(Counter(
+    "user_cache_requests_total", "Current-user cache lookups by result.",
+    ("result",)))
+RATE_LIMIT_REJECTIONS = registry.register(Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter.",
+    ("route",)))
+BCRYPT_IN_PROGRESS = registry.register(Gauge(
+    "bcrypt_operations_in_progress",
+    "Password hash/verify operations currently running."))
+BCRYPT_LATENCY = registry.register(Histogram(
+    "bcrypt_duration_seconds", "Password hash/verify latency.",
+    ("operation",)))
+SMTP_SEND_LATENCY = registry.register(Histogram(
+    "smtp_send_duration_seconds", "SMTP send latency by outcome.",
+    ("outcome",)))
@@ -0,0 +1,248 @@
+"""
+Normalized forms of contact fields.
+
+Blocking keys find duplicate contacts: two contacts sharing any key land in
+the same block and are reported as likely duplicates; contacts in different
+blocks are never compared. E.164 phone numbers power the reverse lookup,
+search terms the prefix autocomplete and Latin and sound keys of names the
+script- and spelling-insensitive contact search.
+"""
+import re
+import unicodedata
+
+from src.conf.config import config
+
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+PHONE_KEY_LENGTH = 32
+EMAIL_KEY_LENGTH = 64
+NAME_KEY_LENGTH = 64
+SEARCH_TERM_LENGTH = 64
+LATIN_KEY_LENGTH = 64
+SOUND_KEY_LENGTH = 32
+
+_NON_DIGITS = re.compile(r"\D")
+_NAME_TOKENS = re.compile(r"[^\W_]+")
+
+# Ukrainian national transliteration (KMU 2010), plus the Russian and
+# Belarusian letters it lacks
+_CYRILLIC = dict(zip(
+    "абвгґдеєжзиіїйклмнопрстуфхцчшщьюяёъыэў",
+    ["a", "b", "v", "h", "g", "d", "e", "ie", "zh", "z", "y", "i", "i", "i",
+     "k", "l", "m", "n", "o", "p", "r", "s", "t", "u", "f", "kh", "ts", "ch",
+     "sh", "shch", "", "iu", "ia", "e", "", "y", "e", "u"]))
+# ... which spells these letters differently at the start of a word
+_CYRILLIC_INITIAL = {"є": "ye", "ї": "yi", "й": "y", "ю": "yu", "я": "ya"}
+_APOSTROPHES = "'’ʼ"
+
+_VOWELS = "aeiouy"
+# Letters and letter groups sounding alike, Metaphone style. Longer groups
+# come first so the regex prefers them.
+_SOUND_GROUPS = {"shch": "S", "tsch": "C", "sch": "S", "dzh": "J", "tch": "C",
+                 "sh": "S", "zh": "J", "ch": "C", "kh": "H", "ts": "Z",
+                 "tz": "Z", "ph": "F", "th": "T", "ck": "K", "gh": "G"}
+_SOUND_GROUP = re.compile("|".join(_SOUND_GROUPS))
+_SOUND_LETTERS = {"b": "B", "d": "D", "f": "F", "g": "G", "k": "K", "l": "L",
+                  "m": "M", "n": "N", "p": "P", "q": "K", "r": "R", "s": "S",
+                  "t": "T", "v": "V", "w": "V", "x": "KS", "z": "S"}
+
+
+def phone_key(phone_number: str | None) -> str | None:
+    """
+    Digits-only form of a phone number.
+
+    :param phone_number: str | None: The phone number as entered.
+    :return: str | None: The digits, or None when there are none.
+    """
+    digits = _NON_DIGITS.sub("", phone_number or "")
+    return digits[:PHONE_KEY_LENGTH] or None
+
+
+def e164(phone_number: str | None, country_code: str | None = None,
+         trunk_prefix: str | None = None) -> str | None:
+    """
+    E.164 form of a phone number, e.g. ``+380501234567``.
+
+    Only numbers starting with ``+`` or ``00`` carry their country code. Any
+    other number is national: its trunk prefix, if it has one, is replaced
+    by ``country_code``, so with the defaults 0501234567 and 501234567 both
+    become +380501234567, and 380501234567 has to be written +380501234567.
+
+    :param phone_number: str | None: The phone number as entered.
+    :param country_code: str | None: The calling code of national numbers, PHONE_COUNTRY_CODE by default.
+    :param trunk_prefix: str | None: The trunk prefix of national numbers, PHONE_TRUNK_PREFIX by default.
+    :return: str | None: The number, or None when it can't be a valid one.
+    """
+    text = (phone_number or "").strip()
+    digits = _NON_DIGITS.sub("", text)
+    if not text.startswith("+"):
+        if digits.startswith("00"):
+            digits = digits[2:]
+        elif digits:
+            trunk = config.PHONE_TRUNK_PREFIX if trunk_prefix is None \
+                else trunk_prefix
+            if trunk and digits.startswith(trunk):
+                digits = digits[len(trunk):]
+            digits = (country_code or config.PHONE_COUNTRY_CODE) + digits
+    if not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS \
+            or digits.startswith("0"):
+        return None
+    return f"+{digits}"
+
+
+def email_key(email: str | None) -> str | None:
+    """
+    Lowercased local part of an email address, without a ``+tag``.
+
+    :param email: str | None: The email address.
+    :return: str | None: The key, or None for an empty address.
+    """
+    local = (email or "").rpartition("@")[0] or (email or "")
+    local = local.split("+", 1)[0].strip().lower()
+    return local[:EMAIL_KEY_LENGTH] or None
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def search_term(text: str | None) -> str:
+    """
+    Accent-free, casefolded form of text typed into the autocomplete box.
+
+    :param text: str | None: The text.
+    :return: str: The term, "" for empty text.
+    """
+    return _fold((text or "").strip())[:SEARCH_TERM_LENGTH]
+
+
+def search_terms(first_name: str | None, last_name: str | None,
+                 email: str | None) -> set[tuple[str, str]]:
+    """
+    The terms a contact can be found by with a prefix.
+
+    Every word of the names is a term of its own, so "Mary Ann" is found by
+    "ann" too; the email is one term.
+
+    :param first_name: str | None: The first name.
+    :param last_name: str | None: The last name.
+    :param email: str | None: The email address.
+    :return: set[tuple[str, str]]: (field, term) pairs.
+    """
+    terms = {("email", search_term(email))}
+    for field, name in (("first_name", first_name), ("last_name", last_name)):
+        terms.update((field, token[:SEARCH_TERM_LENGTH])
+                     for token in _NAME_TOKENS.findall(_fold(name or "")))
+    return {(field, term) for field, term in terms if term}
+
+
+def latin_key(text: str | None) -> str | None:
+    """
+    Casefolded Latin spelling of a name, whatever script it was written in.
+
+    "Олена" and "Olena" get the same key, so do "Zoë" and "zoe".
+
+    :param text: str | None: The name.
+    :return: str | None: Space-separated words, or None for an empty name.
+    """
+    text = unicodedata.normalize("NFC", (text or "").casefold())
+    latin = []
+    in_word = False
+    for char in text:
+        if char in _APOSTROPHES:
+            # Мар'яна is Mariana: the apostrophe joins, it doesn't split
+            continue
+        spelled = _CYRILLIC_INITIAL.get(char) if not in_word else None
+        latin.append(spelled or _CYRILLIC.get(char, char))
+        in_word = char.isalpha()
+    words = _NAME_TOKENS.findall(_fold("".join(latin)))
+    return " ".join(words)[:LATIN_KEY_LENGTH] or None
+
+
+def _sound_word(word: str) -> str:
+    word = _SOUND_GROUP.sub(lambda match: _SOUND_GROUPS[match.group()], word)
+    codes = []
+    last = ""
+    for i, char in enumerate(word):
+        following = word[i + 1:i + 2]
+        before_vowel = bool(following) and following in _VOWELS
+        if char in _VOWELS or char == "j" and not before_vowel:
+            # Only a leading vowel counts, and all of them alike
+            if i == 0:
+                codes.append("A")
+            last = ""
+            continue
+        if char == "j":
+            code = "J"
+        elif char == "h":
+            # Ukrainian h is Russian g: Serhii, Sergei
+            code = "G" if before_vowel else ""
+        elif char == "c":
+            code = "S" if following and following in "eiy" else "K"
+        else:
+            code = char if char.isupper() else _SOUND_LETTERS.get(char, "")
+        # Doubled letters sound like one: Anna, Alexsandr
+        if code and code != last:
+            codes.append(code)
+            last = code[-1]
+    return "".join(codes)
+
+
+def sound_key(text: str | None) -> str | None:
+    """
+    Metaphone-style key of a name: spellings that sound alike share it.
+
+    Built from the Latin key, so "Sergey", "Serhii" and "Сергій" all give
+    "SRG", and "Alexander" and "Олександр" give "ALKSNDR".
+
+    :param text: str | None: The name.
+    :return: str | None: Space-separated word keys, or None for an empty name.
+    """
+    words = [_sound_word(word) for word in (latin_key(text) or "").split()]
+    return " ".join(word for word in words if word)[:SOUND_KEY_LENGTH] or None
+
+
+def name_search_keys(first_name: str | None, last_name: str | None) -> dict:
+    """
+    All search keys of a contact's names, as ``Contact`` column values.
+
+    :param first_name: str | None: The first name.
+    :param last_name: str | None: The last name.
+    :return: dict: The first_name_latin, last_name_latin, first_name_sound and last_name_sound values.
+    """
+    return {"first_name_latin": latin_key(first_name),
+            "last_name_latin": latin_key(last_name),
+            "first_name_sound": sound_key(first_name),
+            "last_name_sound": sound_key(last_name)}
+
+
+def name_key(first_name: str | None, last_name: str | None) -> str | None:
+    """
+    Accent-free, casefolded name tokens in sorted order.
+
+    Sorting makes "Doe John" and "John Doe" produce the same key.
+
+    :param first_name: str | None: The first name.
+    :param last_name: str | None: The last name.
+    :return: str | None: The key, or None when both names are empty.
+    """
+    tokens = sorted(_NAME_TOKENS.findall(
+        _fold(f"{first_name or ''} {last_name or ''}")))
+    return " ".join(tokens)[:NAME_KEY_LENGTH] or None
+
+
+def blocking_keys(first_name: str | None, last_name: str | None,
+                  email: str | None, phone_number: str | None) -> dict:
+    """
+    All blocking keys of a contact, as ``Contact`` column values.
+
+    :param first_name: str | None: The first name.
+    :param last_name: str | None: The last name.
+    :param email: str | None: The email address.
+    :param phone_number: str | None: The phone number.
+    :return: dict: The phone_key, email_key and name_key values.
+    """
+    return {"phone_key": phone_key(phone_number),
+            "email_key": email_key(email),
+            "name_key": name_key(first_name, last_name)}
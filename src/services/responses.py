@@ -0,0 +1,27 @@
+"""
+JSON responses serialized without FastAPI's jsonable_encoder pass.
+"""
+from typing import Any
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+def model_response(adapter: TypeAdapter, content: Any,
+                   status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Validate content against a response schema and serialize it to JSON.
+
+    Both steps run in pydantic-core, so ORM objects go straight to JSON
+    bytes instead of being dumped to Python dicts and encoded again. The
+    route should still declare ``response_model`` for the OpenAPI schema.
+
+    :param adapter: TypeAdapter: The adapter for the response schema.
+    :param content: Any: ORM objects, dicts or models to return.
+    :param status_code: int: The status code of the response.
+    :return: Response: The serialized JSON response.
+    """
+    body = adapter.dump_json(
+        adapter.validate_python(content, from_attributes=True))
+    return Response(body, status_code=status_code,
+                    media_type="application/json")
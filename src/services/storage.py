@@ -0,0 +1,239 @@
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from src.conf.config import config
+
+logger = logging.getLogger(__name__)
+
+# Avatars are content-addressed and never change once stored
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class AvatarStorage:
+    """
+    Base class for content-addressed avatar storage backends.
+
+    Images are stored under a key derived from their content, so a key that
+    already exists never has to be uploaded again.
+    """
+
+    def exists(self, key: str) -> bool:
+        """
+        Check whether an image with the given key is already stored.
+
+        Backends that cannot check cheaply return False.
+
+        :param key: str: The content key of the image.
+        :return: bool: True if the image is already stored.
+        """
+        return False
+
+    def url(self, key: str) -> str:
+        """
+        Build the URL an image is served from.
+
+        :param key: str: The content key of the image.
+        :return: str: The URL of the image.
+        """
+        raise NotImplementedError
+
+    def upload(self, data: bytes, key: str) -> str:
+        """
+        Store an avatar image and return the URL it is served from.
+
+        Called from a worker thread, so implementations may block.
+
+        :param data: bytes: The encoded JPEG image.
+        :param key: str: The content key of the image.
+        :return: str: The URL of the stored image.
+        """
+        raise NotImplementedError
+
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Stores avatars in Cloudinary.
+    """
+
+    def __init__(self):
+        # Imported here so processes that never store avatars don't load it
+        import cloudinary
+        import cloudinary.api
+        import cloudinary.exceptions
+        import cloudinary.uploader
+
+        self.cloudinary = cloudinary
+        cloudinary.config(
+            cloud_name=config.CLD_NAME,
+            api_key=config.CLD_API_KEY,
+            api_secret=config.CLD_API_SECRET,
+            secure=True,
+        )
+
+    @staticmethod
+    def _public_id(key: str) -> str:
+        return f"ContactsApp/{key}"
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.cloudinary.api.resource(self._public_id(key))
+        except self.cloudinary.exceptions.NotFound:
+            return False
+        except self.cloudinary.exceptions.Error as err:
+            # The Admin API is rate limited; upload keeps an existing image
+            # anyway (overwrite=False), so just do the work
+            logger.warning("Cloudinary lookup of %s failed: %r", key, err)
+            return False
+        return True
+
+    def url(self, key: str) -> str:
+        return self.cloudinary.CloudinaryImage(self._public_id(key)).build_url(
+            width=250, height=250, crop="fill"
+        )
+
+    def upload(self, data: bytes, key: str) -> str:
+        # The content under a key never changes, so an existing image is kept
+        self.cloudinary.uploader.upload(data, public_id=self._public_id(key),
+                                        overwrite=False)
+        return self.url(key)
+
+
+class LocalStorage(AvatarStorage):
+    """
+    Stores avatars on the local filesystem, served by the API itself.
+    """
+
+    def __init__(self, root: str | Path, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        """
+        Get the path of an image on disk.
+
+        :param key: str: The content key of the image.
+        :return: Path: The file path, sharded by the first key characters.
+        """
+        return self.root / key[:2] / f"{key}.jpg"
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}.jpg"
+
+    def upload(self, data: bytes, key: str) -> str:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see partial images
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return self.url(key)
+
+
+class S3Storage(AvatarStorage):
+    """
+    Stores avatars in an S3-compatible bucket. Requires boto3.
+    """
+
+    def __init__(self, bucket: str, public_url: str,
+                 endpoint_url: str | None = None,
+                 access_key: str | None = None,
+                 secret_key: str | None = None):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("boto3 is required for the s3 avatar storage")
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+        )
+
+    @staticmethod
+    def _object_key(key: str) -> str:
+        return f"avatars/{key}.jpg"
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket,
+                                    Key=self._object_key(key))
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{self._object_key(key)}"
+
+    def upload(self, data: bytes, key: str) -> str:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            ContentType="image/jpeg",
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+        return self.url(key)
+
+
+class MemoryStorage(AvatarStorage):
+    """
+    Keeps avatars in memory. Stands in for Cloudinary in tests.
+    """
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    def exists(self, key: str) -> bool:
+        return key in self.files
+
+    def url(self, key: str) -> str:
+        return f"memory://{key}"
+
+    def upload(self, data: bytes, key: str) -> str:
+        self.files[key] = data
+        return self.url(key)
+
+
+def create_avatar_storage() -> AvatarStorage:
+    """
+    Create the avatar storage backend selected by AVATAR_STORAGE.
+
+    :return: AvatarStorage: The configured storage backend.
+    :raises ValueError: If AVATAR_STORAGE names an unknown backend.
+    """
+    if config.AVATAR_STORAGE == "cloudinary":
+        return CloudinaryStorage()
+    if config.AVATAR_STORAGE == "local":
+        return LocalStorage(config.AVATAR_LOCAL_DIR, config.AVATAR_BASE_URL)
+    if config.AVATAR_STORAGE == "s3":
+        return S3Storage(config.S3_BUCKET, config.S3_PUBLIC_URL,
+                         config.S3_ENDPOINT_URL, config.S3_ACCESS_KEY,
+                         config.S3_SECRET_KEY)
+    raise ValueError(f"Unknown avatar storage: {config.AVATAR_STORAGE}")
+
+
+avatar_storage: AvatarStorage | None = None
+
+
+def get_avatar_storage() -> AvatarStorage:
+    """
+    Dependency returning the configured avatar storage backend.
+
+    :return: AvatarStorage: The avatar storage backend.
+    """
+    global avatar_storage
+    if avatar_storage is None:
+        avatar_storage = create_avatar_storage()
+    return avatar_storage
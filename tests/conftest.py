@@ -1,24 +1,52 @@
 import asyncio
+import functools
+import os
 
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import delete
+from sqlalchemy import event
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, \
     AsyncSession
 
 from main import app
-from src.entity.models import Base, User, Contact
+from src.entity.models import Base, User
 from src.database.db import get_db
+from src.database.instrumentation import instrument
 from src.services.auth import auth_service
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+
+def database_url() -> str:
+    # In-memory by default; TEST_DB_URL=sqlite+aiosqlite:///./test.db keeps
+    # a file, with one file per pytest-xdist worker
+    url = os.getenv("TEST_DB_URL", "sqlite+aiosqlite:///:memory:")
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if worker and url.endswith(".db"):
+        url = f"{url[:-len('.db')]}_{worker}.db"
+    return url
+
+
+SQLALCHEMY_DATABASE_URL = database_url()
 
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False},
     poolclass=StaticPool
 )
+instrument(engine)
+
+
+# SQLite driver-level transactions don't support SAVEPOINT; let SQLAlchemy
+# emit BEGIN itself so every test can run inside a rolled-back transaction
+@event.listens_for(engine.sync_engine, "connect")
+def do_connect(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def do_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
 
 TestingSessionLocal = async_sessionmaker(autocommit=False, autoflush=False,
                                          expire_on_commit=False, bind=engine)
@@ -27,30 +55,43 @@ test_user = {"username": "deadpool", "email": "deadpool@example.com",
              "password": "12345678"}
 
 
-@pytest.fixture(scope="module", autouse=True)
+@functools.cache
+def password_hash(password: str) -> str:
+    # bcrypt is slow by design, hash every test password only once
+    return auth_service.get_password_hash(password)
+
+
+@pytest.fixture(scope="session", autouse=True)
 def init_models_wrap():
     async def init_models():
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
             await conn.run_sync(Base.metadata.create_all)
         async with TestingSessionLocal() as session:
-            hash_password = auth_service.get_password_hash(
-                test_user["password"])
             current_user = User(username=test_user["username"],
                                 email=test_user["email"],
-                                password=hash_password, confirmed=True)
+                                password=password_hash(test_user["password"]),
+                                confirmed=True)
             session.add(current_user)
             await session.commit()
 
     asyncio.run(init_models())
 
+
 @pytest_asyncio.fixture(autouse=True)
-async def clear_database():
-    async with TestingSessionLocal() as session:
-        # Видалення всіх даних з таблиць
-        await session.execute(delete(Contact))
-        await session.commit()
-    yield  # Забезпечує коректне завершення
+async def transaction():
+    # Кожен тест виконується в транзакції, яка відкочується після тесту;
+    # commit() у коді застосунку лише звільняє SAVEPOINT
+    async with engine.connect() as conn:
+        outer = await conn.begin()
+        TestingSessionLocal.configure(
+            bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            yield conn
+        finally:
+            TestingSessionLocal.configure(bind=engine,
+                                          join_transaction_mode=None)
+            await outer.rollback()
 
 
 @pytest.fixture(scope="module")
@@ -1,15 +1,36 @@
 from unittest.mock import Mock
 import pytest
+import pytest_asyncio
 from sqlalchemy import select
 from src.entity.models import User
 
-from tests.conftest import TestingSessionLocal
+from tests.conftest import TestingSessionLocal, password_hash
 from src.conf import messages
 
 user_data = {"username": "agent007", "email": "agent007@gmail.com",
              "password": "12345678"}
 
 
+@pytest_asyncio.fixture()
+async def signed_up_user():
+    # Кожен тест відкочується, тож зареєстрований користувач створюється тут
+    async with TestingSessionLocal() as session:
+        user = User(username=user_data["username"], email=user_data["email"],
+                    password=password_hash(user_data["password"]))
+        session.add(user)
+        await session.commit()
+    return user
+
+
+@pytest_asyncio.fixture()
+async def confirmed_user(signed_up_user):
+    async with TestingSessionLocal() as session:
+        signed_up_user.confirmed = True
+        session.add(signed_up_user)
+        await session.commit()
+    return signed_up_user
+
+
 def test_signup(client, monkeypatch):
     mock_send_email = Mock()
     monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
@@ -22,7 +43,7 @@ def test_signup(client, monkeypatch):
     assert "avatar" in data
 
 
-def test_repeat_signup(client, monkeypatch):
+def test_repeat_signup(client, monkeypatch, signed_up_user):
     mock_send_email = Mock()
     monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
     response = client.post("api/auth/signup", json=user_data)
@@ -31,7 +52,7 @@ def test_repeat_signup(client, monkeypatch):
     assert data["detail"] == messages.ACCOUNT_EXIST
 
 
-def test_not_confirmed_login(client):
+def test_not_confirmed_login(client, signed_up_user):
     response = client.post("api/auth/login",
                            data={"username": user_data.get("email"),
                                  "password": user_data.get("password")})
@@ -41,7 +62,7 @@ def test_not_confirmed_login(client):
 
 
 @pytest.mark.asyncio
-async def test_login(client):
+async def test_login(client, signed_up_user):
     async with TestingSessionLocal() as session:
         current_user = await session.execute(
             select(User).where(User.email == user_data.get("email")))
@@ -59,7 +80,7 @@ async def test_login(client):
     assert "refresh_token" in data
     assert "token_type" in data
 
-def test_wrong_password_login(client):
+def test_wrong_password_login(client, confirmed_user):
     response = client.post("api/auth/login",
                            data={"username": user_data.get("email"),
                                  "password": "wrong_password"})
@@ -1,10 +1,16 @@
 import pytest
+import pytest_asyncio
 from unittest.mock import Mock, patch, AsyncMock, ANY
 from fastapi import status, HTTPException
+from sqlalchemy import select
 from src.conf import messages
+from src.entity.models import Contact, ContactStat, User
+from src.repository.stats import rebuild_contact_stats, week_start
 from src.services.auth import auth_service
 from datetime import datetime, date
 
+from tests.conftest import TestingSessionLocal, test_user
+
 
 # Тест на отримання контактів, якщо не знайдені
 
@@ -460,3 +466,342 @@ def test_get_upcoming_birthdays_http_exception(client, get_token):
         assert response.status_code == 404
         data = response.json()
         assert data["detail"] == "Contact not found"
+
+
+# Тести пакетного отримання контактів
+
+@pytest_asyncio.fixture()
+async def batch_contacts():
+    async with TestingSessionLocal() as session:
+        owner = (await session.execute(
+            select(User).filter_by(email=test_user["email"]))).scalar_one()
+        stranger = User(username="stranger", email="stranger@example.com",
+                        password="hash", confirmed=True)
+        contacts = [
+            Contact(first_name=f"Name{i}", last_name="Batch",
+                    email=f"batch{i}@example.com", phone_number="1234567890",
+                    birthday=date(1990, 1, i), user=owner)
+            for i in range(1, 4)
+        ]
+        foreign = Contact(first_name="Foreign", last_name="Batch",
+                          email="foreign@example.com",
+                          phone_number="1234567890",
+                          birthday=date(1990, 1, 1), user=stranger)
+        session.add_all([*contacts, foreign])
+        await session.commit()
+        return [c.id for c in contacts], foreign.id
+
+
+def test_get_contacts_batch(client, get_token, batch_contacts):
+    ids, foreign_id = batch_contacts
+    requested = [ids[2], 999999, ids[0], foreign_id, ids[2]]
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get("api/contacts/batch",
+                              params={"ids": requested},
+                              headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [item["id"] for item in data] == requested
+    assert [item["found"] for item in data] == [True, False, True, False, True]
+    assert data[0]["contact"]["email"] == "batch3@example.com"
+    assert data[1]["contact"] is None
+    assert data[2]["contact"]["email"] == "batch1@example.com"
+    assert data[3]["contact"] is None
+
+
+def test_post_contacts_batch(client, get_token, batch_contacts):
+    ids, _ = batch_contacts
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.post("api/contacts/batch", json={"ids": ids[::-1]},
+                               headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [item["contact"]["id"] for item in data] == ids[::-1]
+
+
+def test_contacts_batch_validation(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get("api/contacts/batch", headers=headers)
+        assert response.status_code == 422, response.text
+        response = client.post("api/contacts/batch", headers=headers,
+                               json={"ids": list(range(1, 502))})
+        assert response.status_code == 422, response.text
+
+
+async def _stats_rows(session):
+    result = await session.execute(
+        select(ContactStat.user_id, ContactStat.metric, ContactStat.bucket,
+               ContactStat.count).filter(ContactStat.count != 0))
+    return sorted(result.all())
+
+
+@pytest_asyncio.fixture()
+async def stats_contacts():
+    async with TestingSessionLocal() as session:
+        owner = (await session.execute(
+            select(User).filter_by(email=test_user["email"]))).scalar_one()
+        contacts = [
+            Contact(first_name=f"Name{i}", last_name="Stats",
+                    email=f"stats{i}@example.com", phone_number="1234567890",
+                    birthday=date(1990, month, 1), user=owner)
+            for i, month in enumerate((1, 1, 3, 7))
+        ]
+        session.add_all(contacts)
+        await session.commit()
+        contacts[1].birthday = date(1990, 3, 5)
+        await session.delete(contacts[3])
+        await session.commit()
+
+
+def test_get_contact_stats(client, get_token, stats_contacts):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get("api/contacts/stats", params={"weeks": 3},
+                              headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["total"] == 3
+    months = {item["month"]: item["count"] for item in data["birth_months"]}
+    assert list(months) == list(range(1, 13))
+    assert months[1] == 1 and months[3] == 2 and months[7] == 0
+    weeks = data["added_per_week"]
+    assert len(weeks) == 3
+    assert weeks[-1] == {"week": week_start(date.today()).isoformat(),
+                         "count": 3}
+    assert [w["count"] for w in weeks[:-1]] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_contact_stats_match_rebuild(stats_contacts):
+    async with TestingSessionLocal() as session:
+        incremental = await _stats_rows(session)
+        await session.run_sync(
+            lambda s: rebuild_contact_stats(s.connection()))
+        assert incremental == await _stats_rows(session)
+
+
+@pytest_asyncio.fixture()
+async def duplicate_contacts():
+    async with TestingSessionLocal() as session:
+        owner = (await session.execute(
+            select(User).filter_by(email=test_user["email"]))).scalar_one()
+        stranger = User(username="stranger", email="stranger@example.com",
+                        password="hash", confirmed=True)
+        rows = [
+            ("John", "Doe", "john.doe@example.com", "0501234567", owner),
+            ("Doe", "John", "jd@work.example.com", "0671112233", owner),
+            ("Johnny", "Walker", "walker@example.com", "0501234567",
+             owner),
+            ("Jane", "Smith", "jane@example.com", "0939998877", owner),
+            ("Janet", "Smyth", "Jane+news@other.example.com", "0631231231",
+             owner),
+            ("Alice", "Brown", "alice@example.com", "0991234567", owner),
+            ("John", "Doe", "john.doe@stranger.example.com", "0501234567",
+             stranger),
+        ]
+        contacts = [Contact(first_name=first, last_name=last, email=email,
+                            phone_number=phone, birthday=date(1990, 1, 1),
+                            user=user)
+                    for first, last, email, phone, user in rows]
+        session.add_all(contacts)
+        await session.commit()
+        contacts[5].phone_number = "0671112233"
+        await session.commit()
+        return [c.id for c in contacts]
+
+
+def test_get_duplicate_contacts(client, get_token, duplicate_contacts):
+    ids = duplicate_contacts
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get("api/contacts/duplicates",
+                              headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    clusters = response.json()
+    assert [[c["id"] for c in cluster["contacts"]]
+            for cluster in clusters] == [[ids[0], ids[1], ids[2], ids[5]],
+                                         [ids[3], ids[4]]]
+    assert clusters[0]["reasons"] == ["name", "phone"]
+    assert clusters[1]["reasons"] == ["email"]
+
+
+def test_lookup_contacts_by_phone(client, get_token, duplicate_contacts):
+    ids = duplicate_contacts
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get(
+            "api/contacts/lookup",
+            params={"phone": ["+38 050 123 45 67", "0671112233", "0800000000",
+                              "n/a"]},
+            headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [(r["phone"], r["e164"]) for r in results] == [
+        ("+38 050 123 45 67", "+380501234567"),
+        ("0671112233", "+380671112233"),
+        ("0800000000", "+380800000000"),
+        ("n/a", None),
+    ]
+    # The stranger's contact with the same number is not returned
+    assert [c["id"] for c in results[0]["contacts"]] == [ids[0], ids[2]]
+    # Alice's number was changed to this one after she was created
+    assert [c["id"] for c in results[1]["contacts"]] == [ids[1], ids[5]]
+    assert results[2]["contacts"] == results[3]["contacts"] == []
+
+
+@pytest_asyncio.fixture()
+async def autocomplete_contacts():
+    async with TestingSessionLocal() as session:
+        owner = (await session.execute(
+            select(User).filter_by(email=test_user["email"]))).scalar_one()
+        stranger = User(username="stranger", email="stranger@example.com",
+                        password="hash", confirmed=True)
+        rows = [
+            ("John", "Doe", "jd@example.com", owner),
+            ("Joanna", "Dobson", "joanna@example.com", owner),
+            ("Zoë", "Jones", "zoe@example.com", owner),
+            ("Mary Ann", "Smith", "mary@example.com", owner),
+            ("Jodie", "Foster", "jodie@example.com", owner),
+            ("John", "Doe", "john@stranger.example.com", stranger),
+        ]
+        contacts = [Contact(first_name=first, last_name=last, email=email,
+                            phone_number="0501234567",
+                            birthday=date(1990, 1, 1), user=user)
+                    for first, last, email, user in rows]
+        session.add_all(contacts)
+        await session.commit()
+        contacts[4].last_name = "Dorsey"
+        await session.delete(contacts[3])
+        await session.commit()
+        return [c.id for c in contacts]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("jo", [1, 4, 0, 2]),
+    ("JO DO", [1, 4, 0]),
+    ("zoe", [2]),
+    ("zoe@", [2]),
+    ("ann", []),
+    ("fos", []),
+])
+def test_autocomplete_contacts(client, get_token, autocomplete_contacts,
+                               query, expected):
+    ids = autocomplete_contacts
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get(
+            "api/contacts/autocomplete", params={"q": query},
+            headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    assert [s["id"] for s in response.json()] == [ids[i] for i in expected]
+
+
+def test_autocomplete_contacts_limit(client, get_token,
+                                     autocomplete_contacts):
+    ids = autocomplete_contacts
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get(
+            "api/contacts/autocomplete", params={"q": "j", "limit": 2},
+            headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [
+        {"id": ids[0], "first_name": "John", "last_name": "Doe",
+         "email": "jd@example.com", "matched": "email"},
+        {"id": ids[1], "first_name": "Joanna", "last_name": "Dobson",
+         "email": "joanna@example.com", "matched": "first_name"},
+    ]
+
+
+@pytest_asyncio.fixture()
+async def many_terms_contacts():
+    async with TestingSessionLocal() as session:
+        owner = (await session.execute(
+            select(User).filter_by(email=test_user["email"]))).scalar_one()
+        # Seven terms starting with "jo", more than the first page of
+        # limit * 3 rows holds for limit=2
+        contacts = [
+            Contact(first_name="Joa Job Joc", last_name="Jod-Joe Jof",
+                    email="jog@example.com", phone_number="0501234567",
+                    birthday=date(1990, 1, 1), user=owner),
+            Contact(first_name="Joh", last_name="Smith",
+                    email="smith@example.com", phone_number="0501234567",
+                    birthday=date(1990, 1, 1), user=owner),
+        ]
+        session.add_all(contacts)
+        await session.commit()
+        return [c.id for c in contacts]
+
+
+def test_autocomplete_contacts_with_many_matching_terms(client, get_token,
+                                                        many_terms_contacts):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get(
+            "api/contacts/autocomplete", params={"q": "jo", "limit": 2},
+            headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    assert [s["id"] for s in response.json()] == many_terms_contacts
+
+
+@pytest_asyncio.fixture()
+async def multiscript_contacts():
+    async with TestingSessionLocal() as session:
+        owner = (await session.execute(
+            select(User).filter_by(email=test_user["email"]))).scalar_one()
+        stranger = User(username="stranger", email="stranger@example.com",
+                        password="hash", confirmed=True)
+        rows = [
+            ("Олена", "Шевченко", owner),
+            ("Olena", "Kovalenko", owner),
+            ("Elena", "Petrova", owner),
+            ("Сергій", "Бондар", owner),
+            ("Sergey", "Ivanov", owner),
+            ("Oleh", "Melnyk", owner),
+            ("Olena", "Stranger", stranger),
+        ]
+        contacts = [Contact(first_name=first, last_name=last,
+                            email=f"{i}@example.com",
+                            phone_number="0501234567",
+                            birthday=date(1990, 1, 1), user=user)
+                    for i, (first, last, user) in enumerate(rows)]
+        session.add_all(contacts)
+        await session.commit()
+        # Keys follow a rename
+        contacts[5].first_name = "Олег"
+        await session.commit()
+        return [c.id for c in contacts]
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"first_name": "Олена", "search_mode": "translit"}, [1, 0]),
+    ({"first_name": "оле", "search_mode": "translit"}, [1, 5, 0]),
+    ({"last_name": "shevch", "search_mode": "translit"}, [0]),
+    ({"first_name": "Sergey", "search_mode": "phonetic"}, [4, 3]),
+    ({"first_name": "Olena", "search_mode": "phonetic"}, [1, 2, 0]),
+    ({"first_name": "Олена"}, [0]),
+])
+def test_get_contacts_search_modes(client, get_token, multiscript_contacts,
+                                   params, expected):
+    ids = multiscript_contacts
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get(
+            "api/contacts", params=params,
+            headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 200, response.text
+    assert [c["id"] for c in response.json()] == [ids[i] for i in expected]
+
+
+def test_get_contacts_unknown_search_mode(client, get_token):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        response = client.get(
+            "api/contacts", params={"first_name": "Olena",
+                                    "search_mode": "fuzzy"},
+            headers={"Authorization": f"Bearer {get_token}"})
+    assert response.status_code == 422, response.text
@@ -4,8 +4,16 @@ import pytest
 from fastapi.testclient import TestClient
 from src.services.auth import auth_service
 from src.repository.users import update_avatar_url
+import io
 import logging
 import asyncio
+from PIL import Image
+from main import app
+from src.conf import messages
+from src.conf.config import config
+from src.services.avatar import content_key
+from src.services.storage import CloudinaryStorage, MemoryStorage, \
+    LocalStorage, get_avatar_storage
 
 def test_get_me(client, get_token, monkeypatch):
     with patch.object(auth_service, 'cache') as redis_mock:
@@ -27,45 +35,175 @@ def test_get_me(client, get_token, monkeypatch):
         assert data["username"] == "deadpool"
 
 
-# @pytest.mark.asyncio
-# async def test_update_avatar_user(client, get_token, monkeypatch):
-#     # Мокування Redis і FastAPILimiter
-#     with patch.object(auth_service, 'cache') as redis_mock:
-#         redis_mock.get.return_value = None
-#         redis_mock.set = MagicMock()
-#         redis_mock.expire = MagicMock()
-#
-#         # Мокування Cloudinary
-#         mock_upload = MagicMock()
-#         mock_upload.side_effect = lambda *args, **kwargs: asyncio.sleep(0.1) or {"version": "12345"}
-#         monkeypatch.setattr("cloudinary.uploader.upload", mock_upload)
-#
-#         mock_build_url = MagicMock(return_value="http://example.com/avatar.jpg")
-#         monkeypatch.setattr("cloudinary.CloudinaryImage.build_url", mock_build_url)
-#
-#         # Мокування бази даних
-#         async def mock_update_avatar_url(*args, **kwargs):
-#             await asyncio.sleep(0.1)  # Тайм-аут для мокованої функції
-#             return None
-#
-#         monkeypatch.setattr("src.repository.users.update_avatar_url", mock_update_avatar_url)
-#
-#         # Мокування токена
-#         token = get_token
-#         headers = {"Authorization": f"Bearer {token}"}
-#
-#         # Створення мок-файлу
-#         test_file = MagicMock()
-#         test_file.file = MagicMock()
-#
-#         # Відправка запиту на оновлення аватара
-#         response = client.patch("/api/users/avatar", headers=headers, files={"file": test_file})
-#
-#         # Перевірка статус-коду відповіді
-#         assert response.status_code == 200, response.text
-#
-#         # Перевірка викликів моків
-#         mock_upload.assert_called_once_with(test_file.file, public_id="ContactsApp/deadpool@example.com", owerite=True)
-#         mock_build_url.assert_called_once_with(width=250, height=250, crop="fill", version="12345")
-#         redis_mock.set.assert_called_once()
-#         redis_mock.expire.assert_called_once()
\ No newline at end of file
+def make_image(size=(800, 600), fmt="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def avatar_storage():
+    storage = MemoryStorage()
+    app.dependency_overrides[get_avatar_storage] = lambda: storage
+    yield storage
+    del app.dependency_overrides[get_avatar_storage]
+
+
+def test_update_avatar_user(client, get_token, monkeypatch, avatar_storage):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
+        headers = {"Authorization": f"Bearer {get_token}"}
+        image_data = make_image()
+        response = client.patch(
+            "/api/users/avatar", headers=headers,
+            files={"file": ("avatar.png", image_data, "image/png")})
+        assert response.status_code == 200, response.text
+
+        key = content_key(image_data)
+        assert response.json()["avatar"] == f"memory://{key}"
+        # Завантажується мініатюра 250x250, а не оригінал
+        with Image.open(io.BytesIO(avatar_storage.files[key])) as image:
+            assert image.size == (250, 250)
+        # Кеш користувача оновлюється з новим аватаром
+        assert redis_mock.set.call_args.args[0] == "deadpool@example.com"
+        redis_mock.expire.assert_called_with("deadpool@example.com", 300)
+
+
+def test_update_avatar_user_too_large(client, get_token, monkeypatch,
+                                      avatar_storage):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
+        monkeypatch.setattr(config, "AVATAR_MAX_BYTES", 1024)
+        headers = {"Authorization": f"Bearer {get_token}"}
+        response = client.patch(
+            "/api/users/avatar", headers=headers,
+            files={"file": ("avatar.png", make_image(), "image/png")})
+        assert response.status_code == 413, response.text
+        assert response.json()["detail"] == messages.AVATAR_TOO_LARGE
+        assert avatar_storage.files == {}
+
+
+def test_update_avatar_user_invalid_image(client, get_token, monkeypatch,
+                                          avatar_storage):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
+        headers = {"Authorization": f"Bearer {get_token}"}
+        response = client.patch(
+            "/api/users/avatar", headers=headers,
+            files={"file": ("avatar.png", b"not an image", "image/png")})
+        assert response.status_code == 400, response.text
+        assert response.json()["detail"] == messages.INVALID_IMAGE
+        assert avatar_storage.files == {}
+
+
+def test_update_avatar_user_same_image_is_not_uploaded_again(
+        client, get_token, monkeypatch, avatar_storage):
+    with patch.object(auth_service, 'cache') as redis_mock:
+        redis_mock.get.return_value = None
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
+        headers = {"Authorization": f"Bearer {get_token}"}
+        image_data = make_image((300, 300))
+        with patch.object(avatar_storage, "upload",
+                          wraps=avatar_storage.upload) as upload:
+            for _ in range(2):
+                response = client.patch(
+                    "/api/users/avatar", headers=headers,
+                    files={"file": ("avatar.png", image_data, "image/png")})
+                assert response.status_code == 200, response.text
+        upload.assert_called_once()
+
+
+def test_update_avatar_user_cloudinary_skips_stored_image(
+        client, get_token, monkeypatch):
+    import cloudinary.exceptions
+
+    storage = CloudinaryStorage()
+    app.dependency_overrides[get_avatar_storage] = lambda: storage
+    with patch.object(auth_service, 'cache') as redis_mock, \
+            patch("cloudinary.api.resource") as resource, \
+            patch("cloudinary.uploader.upload") as upload:
+        redis_mock.get.return_value = None
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
+        # Not stored yet the first time, found the second
+        resource.side_effect = [cloudinary.exceptions.NotFound("missing"), {}]
+        headers = {"Authorization": f"Bearer {get_token}"}
+        image_data = make_image((300, 300))
+        try:
+            for _ in range(2):
+                response = client.patch(
+                    "/api/users/avatar", headers=headers,
+                    files={"file": ("avatar.png", image_data, "image/png")})
+                assert response.status_code == 200, response.text
+        finally:
+            del app.dependency_overrides[get_avatar_storage]
+
+    public_id = f"ContactsApp/{content_key(image_data)}"
+    assert [call.args[0] for call in resource.call_args_list] == \
+        [public_id, public_id]
+    upload.assert_called_once()
+    assert upload.call_args.kwargs["public_id"] == public_id
+
+
+def test_update_avatar_user_cloudinary_lookup_failure_uploads(
+        client, get_token, monkeypatch):
+    import cloudinary.exceptions
+
+    storage = CloudinaryStorage()
+    app.dependency_overrides[get_avatar_storage] = lambda: storage
+    with patch.object(auth_service, 'cache') as redis_mock, \
+            patch("cloudinary.api.resource") as resource, \
+            patch("cloudinary.uploader.upload") as upload:
+        redis_mock.get.return_value = None
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.redis", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.identifier", AsyncMock())
+        monkeypatch.setattr("fastapi_limiter.FastAPILimiter.http_callback", AsyncMock())
+        resource.side_effect = cloudinary.exceptions.RateLimited("slow down")
+        try:
+            response = client.patch(
+                "/api/users/avatar",
+                headers={"Authorization": f"Bearer {get_token}"},
+                files={"file": ("avatar.png", make_image(), "image/png")})
+        finally:
+            del app.dependency_overrides[get_avatar_storage]
+
+    assert response.status_code == 200, response.text
+    upload.assert_called_once()
+    assert upload.call_args.kwargs["overwrite"] is False
+
+
+def test_get_avatar_from_local_storage(client, tmp_path):
+    storage = LocalStorage(tmp_path, "/api/users/avatars")
+    key = content_key(b"image")
+    url = storage.upload(b"jpeg bytes", key)
+    app.dependency_overrides[get_avatar_storage] = lambda: storage
+    try:
+        response = client.get(url)
+        missing = client.get(f"/api/users/avatars/{'0' * 64}.jpg")
+    finally:
+        del app.dependency_overrides[get_avatar_storage]
+
+    assert response.status_code == 200, response.text
+    assert response.content == b"jpeg bytes"
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "immutable" in response.headers["cache-control"]
+    assert missing.status_code == 404
+
+
+def test_get_avatar_not_served_for_remote_storage(client, avatar_storage):
+    key = content_key(b"image")
+    avatar_storage.upload(b"jpeg bytes", key)
+    response = client.get(f"/api/users/avatars/{key}.jpg")
+    assert response.status_code == 404, response.text
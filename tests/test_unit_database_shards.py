@@ -0,0 +1,184 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import ShardRouter, get_db
+from src.entity.models import Base, Contact, ContactSearchTerm, \
+    ContactStat, ShardDirectory, User
+from src.jobs.move_user import move_user
+
+EMAIL = "sharded@example.com"
+
+
+@pytest_asyncio.fixture()
+async def router(tmp_path):
+    router = ShardRouter([f"sqlite+aiosqlite:///{tmp_path}/shard{i}.db"
+                          for i in range(3)])
+    for shard in router.shards:
+        async with shard.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    yield router
+    await router.close()
+
+
+@pytest.fixture()
+def shard_app(router):
+    app = FastAPI()
+
+    @app.api_route("/shard", methods=["GET", "POST"])
+    @app.get("/shard/{token}")
+    async def which_shard(db: AsyncSession = Depends(get_db)):
+        conn = await db.connection()
+        return {"url": str(conn.engine.url)}
+
+    @app.get("/idle")
+    async def idle(db: AsyncSession = Depends(get_db)):
+        return {}
+
+    with patch("src.database.db.shard_router", router):
+        yield TestClient(app)
+
+
+def shard_of(response, router) -> int:
+    urls = [str(shard.engine.url) for shard in router.shards]
+    return urls.index(response.json()["url"])
+
+
+def test_hash_shard(router):
+    shard = router.hash_shard(EMAIL)
+    assert 0 <= shard < 3
+    assert router.hash_shard(" Sharded@Example.COM") == shard
+    spread = {router.hash_shard(f"user{i}@example.com") for i in range(50)}
+    assert spread == {0, 1, 2}
+
+
+@pytest.mark.asyncio
+async def test_shard_for_uses_directory(router):
+    home = router.hash_shard(EMAIL)
+    assert await router.shard_for(EMAIL) == home
+    assert await router.shard_for(None) == 0
+
+    async with router.directory.session() as db:
+        db.add(ShardDirectory(email=EMAIL, shard=(home + 1) % 3))
+        await db.commit()
+
+    assert await router.shard_for(EMAIL.upper()) == (home + 1) % 3
+
+
+def test_get_db_routes_request(shard_app, router):
+    home = router.hash_shard(EMAIL)
+    token = jwt.encode({"sub": EMAIL, "scope": "access_token"}, "secret")
+
+    response = shard_app.get("/shard",
+                             headers={"Authorization": f"Bearer {token}"})
+    assert shard_of(response, router) == home
+    response = shard_app.get(f"/shard/{token}")
+    assert shard_of(response, router) == home
+    response = shard_app.post("/shard", json={"email": EMAIL})
+    assert shard_of(response, router) == home
+    response = shard_app.post("/shard", data={"username": EMAIL,
+                                              "password": "secret"})
+    assert shard_of(response, router) == home
+
+    # A malformed body goes to shard 0 rather than failing the request
+    malformed = shard_app.post("/shard", content=b"{not json",
+                               headers={"content-type": "application/json"})
+    assert malformed.status_code == 200, malformed.text
+    assert shard_of(malformed, router) == 0
+
+    anonymous = shard_app.get("/shard")
+    assert shard_of(anonymous, router) == 0
+    broken = shard_app.get("/shard", headers={"Authorization": "Bearer x"})
+    assert shard_of(broken, router) == 0
+
+
+def count_checkouts(router) -> list[int]:
+    checkouts = [0] * len(router.shards)
+    for i, shard in enumerate(router.shards):
+        def checkout(*_, i=i):
+            checkouts[i] += 1
+        event.listen(shard.engine.sync_engine, "checkout", checkout)
+    return checkouts
+
+
+def test_get_db_connects_on_first_use(shard_app, router):
+    home = router.hash_shard(EMAIL)
+    token = jwt.encode({"sub": EMAIL, "scope": "access_token"}, "secret")
+    headers = {"Authorization": f"Bearer {token}"}
+    checkouts = count_checkouts(router)
+
+    # Neither the shard directory nor the shard is touched
+    assert shard_app.get("/idle", headers=headers).status_code == 200
+    assert checkouts == [0, 0, 0]
+
+    shard_app.get("/shard", headers=headers)
+    expected = [0, 0, 0]
+    expected[0] += 1  # shard directory
+    expected[home] += 1
+    assert checkouts == expected
+
+
+@pytest.mark.asyncio
+async def test_move_user(router):
+    home = router.hash_shard(EMAIL)
+    target = (home + 1) % 3
+    async with router.shards[home].session() as db:
+        user = User(username="sharded", email=EMAIL, password="hash",
+                    confirmed=True)
+        db.add_all([Contact(first_name=f"Name{i}", last_name="Moved",
+                            email=f"moved{i}@example.com",
+                            phone_number="1234567890",
+                            birthday=date(1990, 1 + i, 1), user=user)
+                    for i in range(3)])
+        await db.commit()
+
+    assert await move_user(EMAIL, target, router) == 3
+
+    assert await router.shard_for(EMAIL) == target
+    async with router.shards[home].session() as db:
+        assert await db.scalar(select(func.count()).select_from(User)) == 0
+        assert await db.scalar(
+            select(func.count()).select_from(Contact)) == 0
+        assert await db.scalar(
+            select(func.count()).select_from(ContactStat)) == 0
+        assert await db.scalar(
+            select(func.count()).select_from(ContactSearchTerm)) == 0
+    async with router.shards[target].session() as db:
+        user = await db.scalar(select(User).filter_by(email=EMAIL))
+        contacts = (await db.scalars(
+            select(Contact).filter_by(user_id=user.id))).all()
+        assert sorted(c.email for c in contacts) == [
+            "moved0@example.com", "moved1@example.com", "moved2@example.com"]
+        assert all(c.name_key == f"moved name{i}"
+                   for i, c in enumerate(sorted(contacts,
+                                                key=lambda c: c.email)))
+        total = await db.scalar(select(ContactStat.count).filter_by(
+            user_id=user.id, metric="total"))
+        assert total == 3
+        term_ids = (await db.scalars(
+            select(ContactSearchTerm.contact_id).filter_by(
+                user_id=user.id, term="moved"))).all()
+        assert sorted(term_ids) == sorted(c.id for c in contacts)
+
+    # Moving back home drops the directory entry
+    assert await move_user(EMAIL, home, router) == 3
+    async with router.directory.session() as db:
+        assert await db.scalar(
+            select(func.count()).select_from(ShardDirectory)) == 0
+    assert await router.shard_for(EMAIL) == home
+
+
+@pytest.mark.asyncio
+async def test_move_user_errors(router):
+    with pytest.raises(ValueError):
+        await move_user(EMAIL, 3, router)
+    target = (router.hash_shard(EMAIL) + 1) % 3
+    with pytest.raises(ValueError):
+        await move_user(EMAIL, target, router)
@@ -0,0 +1,113 @@
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi_mail.errors import ConnectionErrors
+
+from src.entity.models import Contact, User
+from src.jobs.birthday_digest import send_digests
+from src.services import email as email_service
+from tests.conftest import TestingSessionLocal
+
+DAY = date(2026, 10, 19)
+
+
+async def add_owner(session, name: str, birthdays: list[date]) -> User:
+    owner = User(username=name, email=f"{name}@example.com", password="hash",
+                 confirmed=True)
+    session.add(owner)
+    for i, birthday in enumerate(birthdays):
+        session.add(Contact(first_name=f"{name}{i}", last_name="Doe",
+                            email=f"{name}.{i}@example.com",
+                            phone_number="0501234567", birthday=birthday,
+                            user=owner))
+    return owner
+
+
+@pytest.fixture()
+def owners():
+    async def create():
+        async with TestingSessionLocal() as session:
+            await add_owner(session, "alice", [date(1990, 10, 19)])
+            await add_owner(session, "bob", [date(1980, 10, 19),
+                                             date(1991, 10, 19),
+                                             date(1991, 10, 20),
+                                             date(2001, 10, 19)])
+            await add_owner(session, "nobody", [date(1990, 1, 1)])
+            await add_owner(session, "carol", [date(1975, 10, 19)])
+            await session.commit()
+    return create
+
+
+def digests(send_message) -> dict[str, str]:
+    return {call.args[0].recipients[0]: call.args[0].body
+            for call in send_message.call_args_list}
+
+
+@pytest.mark.asyncio
+async def test_one_digest_per_owner(owners):
+    await owners()
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        async with TestingSessionLocal() as session:
+            sent = await send_digests(session, DAY, rate=1000, chunk_size=2)
+
+    sent_digests = digests(send_message)
+    assert sent == 3
+    assert sorted(sent_digests) == ["alice@example.com", "bob@example.com",
+                                    "carol@example.com"]
+    bob = sent_digests["bob@example.com"]
+    assert "bob0 Doe, turning 46" in bob
+    assert "bob1" in bob and "bob3" in bob and "bob2" not in bob
+
+    # The day is done, running it again sends nothing
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        async with TestingSessionLocal() as session:
+            assert await send_digests(session, DAY, rate=1000) == 0
+    send_message.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_after_last_chunk(owners):
+    await owners()
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        send_message.side_effect = [None, RuntimeError("killed")]
+        async with TestingSessionLocal() as session:
+            with pytest.raises(RuntimeError):
+                await send_digests(session, DAY, rate=1000, chunk_size=2,
+                                   concurrency=1)
+    assert list(digests(send_message)) == ["alice@example.com",
+                                           "bob@example.com"]
+
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        async with TestingSessionLocal() as session:
+            sent = await send_digests(session, DAY, rate=1000, chunk_size=2,
+                                      concurrency=1)
+    assert sent == 2
+    assert list(digests(send_message)) == ["bob@example.com",
+                                           "carol@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_failed_digest_keeps_checkpoint(owners):
+    await owners()
+    # SMTP is down for bob's chunk: send_bulk logs the error and goes on
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        send_message.side_effect = [None, ConnectionErrors("down")]
+        async with TestingSessionLocal() as session:
+            with pytest.raises(RuntimeError, match="1 of 1 birthday digests"):
+                await send_digests(session, DAY, rate=1000, chunk_size=2,
+                                   concurrency=1)
+
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        async with TestingSessionLocal() as session:
+            sent = await send_digests(session, DAY, rate=1000, chunk_size=2,
+                                      concurrency=1)
+    assert sent == 2
+    assert list(digests(send_message)) == ["bob@example.com",
+                                           "carol@example.com"]
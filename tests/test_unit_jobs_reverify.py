@@ -0,0 +1,45 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from jose import jwt
+
+from src.entity.models import User
+from src.jobs.reverify_emails import reverify
+from src.services import email as email_service
+from src.services.auth import auth_service
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_reverify_sends_to_unconfirmed_users_only():
+    async with TestingSessionLocal() as session:
+        session.add_all(
+            [User(username=f"pending{i}", email=f"pending{i}@example.com",
+                  password="hash", confirmed=False) for i in range(5)]
+            + [User(username="legacy", email="legacy@example.com",
+                    password="hash", confirmed=None),
+               User(username="done", email="done@example.com",
+                    password="hash", confirmed=True)]
+        )
+        await session.commit()
+
+    with patch.object(email_service.get_mail(), "send_message",
+                      new_callable=AsyncMock) as send_message:
+        async with TestingSessionLocal() as session:
+            sent = await reverify(session, "http://test/", rate=1000,
+                                  chunk_size=2, concurrency=2)
+
+    recipients = sorted(call.args[0].recipients[0]
+                        for call in send_message.call_args_list)
+    assert sent == 6
+    assert recipients == sorted(
+        [f"pending{i}@example.com" for i in range(5)] + ["legacy@example.com"])
+
+
+def test_create_email_tokens():
+    tokens = auth_service.create_email_tokens(["a@example.com",
+                                               "b@example.com"])
+    subjects = [jwt.decode(token, auth_service.SECRET_KEY,
+                           algorithms=[auth_service.ALGORITHM])["sub"]
+                for token in tokens]
+    assert subjects == ["a@example.com", "b@example.com"]
@@ -0,0 +1,118 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.middleware.compression import CompressionMiddleware, \
+    available_encodings, negotiate
+
+PAYLOAD = [{"id": i, "first_name": "John", "last_name": "Doe"}
+           for i in range(200)]
+
+
+def make_client(**options) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **options)
+
+    @app.get("/large")
+    def large():
+        return JSONResponse(PAYLOAD)
+
+    @app.get("/small")
+    def small():
+        return JSONResponse({"message": "ok"})
+
+    @app.get("/precompressed")
+    def precompressed():
+        return Response(gzip.compress(json.dumps(PAYLOAD).encode()),
+                        media_type="application/json",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/image")
+    def image():
+        return Response(b"\xff\xd8" * 2000, media_type="image/jpeg")
+
+    @app.get("/stream")
+    def stream():
+        def chunks():
+            for i in range(50):
+                yield f"line {i}\n".encode() * 20
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def test_large_response_is_compressed():
+    client = make_client(minimum_size=500)
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(
+        json.dumps(PAYLOAD))
+    assert response.json() == PAYLOAD
+
+
+def test_small_response_is_not_compressed():
+    client = make_client(minimum_size=500)
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"message": "ok"}
+
+
+def test_identity_when_not_accepted():
+    client = make_client(minimum_size=500)
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == PAYLOAD
+
+
+def test_precompressed_and_binary_responses_pass_through():
+    client = make_client(minimum_size=500)
+    response = client.get("/precompressed",
+                          headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == PAYLOAD
+
+    response = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"\xff\xd8" * 2000
+
+
+def test_streaming_response_is_compressed_per_chunk():
+    client = make_client(minimum_size=500)
+    with client.stream("GET", "/stream",
+                       headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        body = b"".join(response.iter_bytes())
+    assert body == b"".join(f"line {i}\n".encode() * 20 for i in range(50))
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "gzip"),
+    ("br;q=1.0, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("", None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header, ["gzip"]) == expected
+
+
+def test_negotiate_uses_server_preference():
+    assert negotiate("gzip, zstd", ["zstd", "gzip"]) == "zstd"
+
+
+def test_available_encodings():
+    assert available_encodings(["gzip"]) == ["gzip"]
+    with pytest.raises(ValueError):
+        available_encodings(["lzma"])
+
+
+def test_app_compresses_large_responses(client):
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "paths" in response.json()
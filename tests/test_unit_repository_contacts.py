@@ -1,13 +1,13 @@
 import unittest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from sqlalchemy import select, and_, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.entity.models import Contact, User
 from src.schemas.contact import ContactCreateSchema, ContactUpdateSchema
 from src.repository.contacts import get_contacts, get_contact, create_contact, \
-    update_contact, delete_contact, get_upcoming_birthdays
-from datetime import date, timedelta
+    update_contact, delete_contact, get_upcoming_birthdays, get_contacts_by_ids
+from datetime import date
 from dateutil.relativedelta import relativedelta
 
 
@@ -197,6 +197,25 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
 
         self.assertIsNone(result)
 
+    async def test_get_contacts_by_ids(self):
+        contacts = [
+            Contact(id=1, first_name="John", last_name="Doe",
+                    email="6V7ZM@example.com", phone_number="1234512345",
+                    birthday="1990-04-07", user=self.user),
+            Contact(id=3, first_name="Jane", last_name="Doe",
+                    email="M0p2o@example.com", phone_number="6789067890",
+                    birthday="1995-04-06", user=self.user),
+        ]
+        mocked_contacts = MagicMock()
+        mocked_contacts.scalars.return_value = iter(contacts)
+        self.session.execute.return_value = mocked_contacts
+
+        result = await get_contacts_by_ids([3, 2, 1, 3], self.session,
+                                           self.user)
+
+        self.assertEqual(result, {1: contacts[0], 3: contacts[1]})
+        self.session.execute.assert_awaited_once()
+
     async def test_get_contact_db_error(self):
         contact_id = 1
         self.session.execute.side_effect = Exception(
@@ -384,7 +403,6 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_upcoming_birthdays_found(self):
         today = date.today()
-        end_date = today + timedelta(days=7)
 
         # Створюємо контакти з днями народження в межах наступних 7 днів
         contact1 = Contact(
@@ -408,31 +426,17 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
             user=self.user
         )
 
-        # Мокування результату
+        # Календар повертає ID у порядку найближчих днів народження
         mocked_result = MagicMock()
-        mocked_result.scalars().all.return_value = [contact1, contact2]
+        mocked_result.scalars.return_value = iter([contact2, contact1])
         self.session.execute.return_value = mocked_result
 
-        # Очікуваний SQL-запит
-        stmt = select(Contact).filter(
-            and_(
-                func.to_char(Contact.birthday, 'MM-DD') >= func.to_char(today,
-                                                                        'MM-DD'),
-                func.to_char(Contact.birthday, 'MM-DD') <= func.to_char(
-                    end_date, 'MM-DD'),
-                Contact.user == self.user
-            )
-        )
-
-        # Виклик функції
-        result = await get_upcoming_birthdays(self.session, self.user)
-
-        # Перевірка текстового вигляду SQL-запиту
-        actual_query = str(self.session.execute.call_args[0][
-                               0])  # Отримуємо запит, переданий у `execute`
-        self.assertEqual(actual_query,
-                         str(stmt))  # Порівнюємо текстове представлення запитів
+        with patch("src.repository.contacts.birthday_calendar.upcoming_ids",
+                   AsyncMock(return_value=[1, 2])) as upcoming_ids:
+            result = await get_upcoming_birthdays(self.session, self.user)
 
+        upcoming_ids.assert_awaited_once_with(self.session, self.user, today,
+                                              7)
         # Перевірки результатів
         self.assertEqual(result, [contact1,
                                   contact2])  # Перевіряємо, що повернувся список з очікуваними контактами
@@ -440,36 +444,16 @@ class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_upcoming_birthdays_not_found(self):
         today = date.today()
-        end_date = today + timedelta(days=7)
 
-        # Мокування результату - порожній список
-        mocked_result = MagicMock()
-        mocked_result.scalars().all.return_value = []  # Немає контактів
-        self.session.execute.return_value = mocked_result
-
-        # Очікуваний SQL-запит
-        stmt = select(Contact).filter(
-            and_(
-                func.to_char(Contact.birthday, 'MM-DD') >= func.to_char(today,
-                                                                        'MM-DD'),
-                func.to_char(Contact.birthday, 'MM-DD') <= func.to_char(
-                    end_date, 'MM-DD'),
-                Contact.user == self.user
-            )
-        )
-
-        # Виклик функції
-        result = await get_upcoming_birthdays(self.session, self.user)
-
-        # Перевірка текстового вигляду SQL-запиту
-        actual_query = str(self.session.execute.call_args[0][
-                               0])  # Отримуємо запит, переданий у `execute`
-        self.assertEqual(actual_query,
-                         str(stmt))  # Порівнюємо текстове представлення запитів
+        with patch("src.repository.contacts.birthday_calendar.upcoming_ids",
+                   AsyncMock(return_value=[])) as upcoming_ids:
+            result = await get_upcoming_birthdays(self.session, self.user, 30)
 
+        upcoming_ids.assert_awaited_once_with(self.session, self.user, today,
+                                              30)
         # Перевірки результатів
         self.assertEqual(result, [])  # Має повернути порожній список
-        self.session.execute.assert_called_once()  # Перевіряємо, що `execute` викликали
+        self.session.execute.assert_not_called()  # Порожнє вікно не читає контакти
 
     async def test_get_upcoming_birthdays_db_error(self):
         # Імітація помилки під час виконання запиту
@@ -0,0 +1,206 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from src.entity.models import Contact, User
+from src.repository import contacts as repositories_contacts
+from src.repository import search as repositories_search
+from src.services.birthdays import BirthdayCalendar
+from tests.conftest import TestingSessionLocal, engine
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.skipif(engine.dialect.name != "sqlite",
+                       reason="EXPLAIN QUERY PLAN is SQLite syntax"),
+]
+
+USER = User(id=1, username="deadpool", email="deadpool@example.com",
+            password="hash")
+
+
+async def captured_sql(call) -> str:
+    """
+    Run a repository function against a mock session and return its SQL.
+    """
+    session = AsyncMock()
+    session.execute.return_value = MagicMock()
+    await call(session)
+    stmt = session.execute.call_args.args[0]
+    return str(stmt.compile(engine.sync_engine,
+                            compile_kwargs={"literal_binds": True}))
+
+
+async def query_plan(sql: str) -> str:
+    async with TestingSessionLocal() as session:
+        conn = await session.connection()
+        # Postgres' to_char(), enough of it for the planner to accept the SQL
+        await conn.run_sync(lambda c: c.connection.dbapi_connection
+                            .create_function("to_char", 2, lambda v, f: v))
+        rows = await session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+        return "\n".join(row.detail for row in rows)
+
+
+@pytest.mark.parametrize("first_name", [None, "Jo"])
+async def test_get_contacts_uses_user_name_index(first_name):
+    sql = await captured_sql(lambda db: repositories_contacts.get_contacts(
+        10, 20, first_name, None, None, db, USER))
+
+    plan = await query_plan(sql)
+
+    assert "USING INDEX ix_contacts_user_name (user_id=?)" in plan
+    # Rows come out of the index already in page order
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("search_mode, index, condition", [
+    ("translit", "ix_contacts_user_first_latin",
+     "user_id=? AND first_name_latin>? AND first_name_latin<?"),
+    ("phonetic", "ix_contacts_user_first_sound",
+     "user_id=? AND first_name_sound=?"),
+])
+async def test_get_contacts_search_modes_use_key_index(search_mode, index,
+                                                       condition):
+    sql = await captured_sql(lambda db: repositories_contacts.get_contacts(
+        10, 0, "Олена", None, None, db, USER, search_mode))
+
+    plan = await query_plan(sql)
+
+    assert f"USING INDEX {index} ({condition})" in plan
+    assert "SCAN contacts" not in plan
+    if search_mode == "phonetic":
+        # One key, so the rows come out of the index in page order
+        assert "TEMP B-TREE" not in plan
+
+
+async def test_birthday_calendar_build_is_scoped_by_user():
+    sql = await captured_sql(lambda db: BirthdayCalendar._scores(db, USER))
+
+    plan = await query_plan(sql)
+
+    # Any of the indexes led by user_id will do
+    assert plan.startswith("SEARCH contacts USING ")
+    assert "(user_id=?)" in plan
+    assert "SCAN contacts" not in plan
+
+
+async def test_get_contacts_by_ids_uses_primary_key():
+    sql = await captured_sql(
+        lambda db: repositories_contacts.get_contacts_by_ids([1, 2, 3], db,
+                                                             USER))
+
+    plan = await query_plan(sql)
+
+    assert "SEARCH contacts USING INTEGER PRIMARY KEY" in plan
+    assert "SCAN contacts" not in plan
+
+
+async def test_lookup_contacts_by_phone_uses_phone_index():
+    sql = await captured_sql(
+        lambda db: repositories_contacts.lookup_contacts_by_phone(
+            ["0501234567", "+380671112233"], db, USER))
+
+    plan = await query_plan(sql)
+
+    assert "USING INDEX ix_contacts_user_phone_e164 (user_id=? AND " \
+           "phone_e164=?)" in plan
+    assert "SCAN contacts" not in plan
+
+
+@pytest.mark.parametrize("query", ["jo", "jo do"])
+async def test_autocomplete_scans_search_term_range(query):
+    sql = await captured_sql(
+        lambda db: repositories_search.autocomplete(query, 10, db, USER))
+
+    plan = await query_plan(sql)
+
+    # sqlite_autoindex_..._1 is the primary key
+    assert "SEARCH contact_search_terms USING COVERING INDEX " \
+           "sqlite_autoindex_contact_search_terms_1 " \
+           "(user_id=? AND term>? AND term<?)" in plan
+    # Terms come out of the key already in suggestion order
+    assert "TEMP B-TREE" not in plan
+    assert "SCAN" not in plan
+    if " " in query:
+        assert "USING COVERING INDEX ix_contact_search_terms_contact " \
+               "(user_id=? AND contact_id=? AND term>? AND term<?)" in plan
+
+
+async def test_autocomplete_next_page_continues_term_range():
+    # A full first page, all of one contact: the next page is needed
+    row = SimpleNamespace(term="joanna", contact_id=1, field="first_name",
+                          first_name="Joanna", last_name="Jones",
+                          email="jo@example.com")
+    session = AsyncMock()
+    session.execute.side_effect = [MagicMock(all=lambda: [row] * 30),
+                                   MagicMock(all=lambda: [])]
+    await repositories_search.autocomplete("jo", 10, session, USER)
+    stmt = session.execute.call_args.args[0]
+    sql = str(stmt.compile(engine.sync_engine,
+                           compile_kwargs={"literal_binds": True}))
+
+    plan = await query_plan(sql)
+
+    assert session.execute.await_count == 2
+    # Seeks to the last term instead of rescanning from the prefix
+    assert "term >= 'joanna'" in sql
+    assert "> ('joanna', 1, 'first_name')" in sql
+    assert "SEARCH contact_search_terms USING COVERING INDEX " \
+           "sqlite_autoindex_contact_search_terms_1 " \
+           "(user_id=? AND term>? AND term<?)" in plan
+    assert "TEMP B-TREE" not in plan
+    assert "SCAN" not in plan
+
+
+async def test_email_is_unique_per_user():
+    async with TestingSessionLocal() as session:
+        owner = User(username="owner", email="owner@example.com",
+                     password="hash")
+        other = User(username="other", email="other@example.com",
+                     password="hash")
+        for user in (owner, other):
+            session.add(Contact(first_name="John", last_name="Doe",
+                                email="john@example.com",
+                                phone_number="1234567890",
+                                birthday=date(1990, 1, 1), user=user))
+        await session.commit()
+
+        session.add(Contact(first_name="Johnny", last_name="Doe",
+                            email="john@example.com",
+                            phone_number="1234567890",
+                            birthday=date(1990, 1, 1), user=owner))
+        with pytest.raises(IntegrityError):
+            await session.commit()
+
+
+async def test_contact_writes_carry_partition_key():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.startswith(("UPDATE contacts", "DELETE FROM contacts")):
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with TestingSessionLocal() as session:
+            owner = User(username="owner", email="owner@example.com",
+                         password="hash")
+            contact = Contact(first_name="John", last_name="Doe",
+                              email="john@example.com",
+                              phone_number="1234567890",
+                              birthday=date(1990, 1, 1), user=owner)
+            session.add(contact)
+            await session.commit()
+            contact.first_name = "Johnny"
+            await session.commit()
+            await session.delete(contact)
+            await session.commit()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    # Lets Postgres prune to the owner's partition
+    assert all("contacts.user_id = ?" in s for s in statements)
@@ -0,0 +1,131 @@
+from datetime import date, datetime, time, timedelta
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.entity.models import Base, Contact, User
+from src.services.auth import auth_service
+from src.services.birthdays import BirthdayCalendar, birthday_calendar, \
+    digest_month_days, score_ranges
+
+TODAY = date(2026, 12, 30)
+
+
+@pytest.fixture()
+def redis():
+    redis = fakeredis.FakeRedis()
+    with patch.object(auth_service, "cache", redis):
+        yield redis
+
+
+@pytest_asyncio.fixture()
+async def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/cal.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture()
+async def user(redis, session_maker):
+    async with session_maker() as db:
+        user = User(username="calendar", email="calendar@example.com",
+                    password="secret", confirmed=True)
+        db.add(user)
+        for first_name, birthday in [("NewYear", date(1990, 1, 1)),
+                                     ("Today", date(1985, 12, 30)),
+                                     ("Later", date(1970, 3, 15))]:
+            db.add(Contact(first_name=first_name, last_name="Doe",
+                           email=f"{first_name.lower()}@example.com",
+                           phone_number="0501234567", birthday=birthday,
+                           user=user))
+        await db.commit()
+    return user
+
+
+async def upcoming_names(session_maker, user, start=TODAY, days=7):
+    async with session_maker() as db:
+        ids = await birthday_calendar.upcoming_ids(db, user, start, days)
+        names = {contact.id: contact.first_name
+                 for contact in await db.scalars(select(Contact))}
+    return [names[contact_id] for contact_id in ids]
+
+
+def test_score_ranges():
+    assert score_ranges(date(2026, 3, 1), 7) == [(301, 308)]
+    assert score_ranges(TODAY, 7) == [(1230, 1231), (101, 106)]
+    assert score_ranges(date(2026, 3, 1), 366) == [(301, 1231), (101, 300)]
+
+
+def test_digest_month_days():
+    assert digest_month_days(date(2026, 10, 19)) == [1019]
+    assert digest_month_days(date(2026, 2, 28)) == [228, 229]
+    assert digest_month_days(date(2028, 2, 28)) == [228]
+    assert digest_month_days(date(2028, 2, 29)) == [229]
+
+
+@pytest.mark.asyncio
+async def test_calendar_is_built_once_until_midnight(redis, session_maker,
+                                                     user):
+    with patch.object(BirthdayCalendar, "_scores",
+                      wraps=BirthdayCalendar._scores) as scores:
+        assert await upcoming_names(session_maker, user) == ["Today",
+                                                             "NewYear"]
+        assert await upcoming_names(session_maker, user) == ["Today",
+                                                             "NewYear"]
+    scores.assert_called_once()
+    key = f"birthdays:{user.email}"
+    assert redis.zcard(key) == 4  # three contacts and the empty marker
+    assert redis.expiretime(key) == int(datetime.combine(
+        TODAY + timedelta(days=1), time.min).timestamp())
+    assert await upcoming_names(session_maker, user,
+                                TODAY + timedelta(days=70), 30) == ["Later"]
+
+
+@pytest.mark.asyncio
+async def test_commit_invalidates_calendar(redis, session_maker, user):
+    await upcoming_names(session_maker, user)
+    async with session_maker() as db:
+        db.add(Contact(first_name="Added", last_name="Doe",
+                       email="added@example.com", phone_number="0501234567",
+                       birthday=date(2000, 1, 2),
+                       user=await db.get(User, user.id)))
+        await db.commit()
+    assert not redis.exists(f"birthdays:{user.email}")
+    assert await upcoming_names(session_maker, user) == ["Today", "NewYear",
+                                                         "Added"]
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_build_is_not_cached(redis, session_maker,
+                                                       user):
+    original = BirthdayCalendar._scores
+
+    async def racing_scores(db, racing_user):
+        scores = await original(db, racing_user)
+        birthday_calendar.invalidate(racing_user.email)
+        return scores
+
+    with patch.object(BirthdayCalendar, "_scores",
+                      staticmethod(racing_scores)):
+        assert await upcoming_names(session_maker, user) == ["Today",
+                                                             "NewYear"]
+    assert not redis.exists(f"birthdays:{user.email}")
+
+
+@pytest.mark.asyncio
+async def test_redis_down_falls_back_to_database(session_maker, user):
+    redis = fakeredis.FakeRedis(connected=False)
+    with patch.object(auth_service, "cache", redis):
+        assert await upcoming_names(session_maker, user) == ["Today",
+                                                             "NewYear"]
+        async with session_maker() as db:
+            contact = await db.scalar(
+                select(Contact).filter_by(first_name="Later"))
+            contact.birthday = date(1990, 12, 31)
+            await db.commit()  # the failed invalidation is only logged
@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.services import email as email_service
+from src.services.email import (build_message, render_template, send_bulk,
+                                send_email, VERIFY_EMAIL_TEMPLATE,
+                                RESET_PASSWORD_TEMPLATE)
+
+
+class TestEmailService(unittest.IsolatedAsyncioTestCase):
+    def test_templates_are_precompiled(self):
+        self.assertIn(VERIFY_EMAIL_TEMPLATE, email_service.templates)
+        self.assertIn(RESET_PASSWORD_TEMPLATE, email_service.templates)
+
+    def test_render_verify_email(self):
+        html = render_template(VERIFY_EMAIL_TEMPLATE, host="http://test/",
+                               username="deadpool", token="abc")
+        self.assertIn("Hi deadpool", html)
+        self.assertIn("http://test/api/auth/confirmed_email/abc", html)
+
+    def test_render_reset_password(self):
+        html = render_template(RESET_PASSWORD_TEMPLATE, host="http://test/",
+                               username="deadpool", token="abc")
+        self.assertIn("http://test/api/auth/password-reset/confirm?token=abc",
+                      html)
+
+    def test_render_escapes_user_input(self):
+        html = render_template(VERIFY_EMAIL_TEMPLATE, host="http://test/",
+                               username="<b>x</b>", token="abc")
+        self.assertIn("&lt;b&gt;x&lt;/b&gt;", html)
+
+    def test_build_message(self):
+        message = build_message("deadpool@example.com", "Subject",
+                                VERIFY_EMAIL_TEMPLATE, host="http://test/",
+                                username="deadpool", token="abc")
+        self.assertEqual(message.recipients, ["deadpool@example.com"])
+        self.assertIn("confirmed_email/abc", message.body)
+        self.assertIsNone(message.template_body)
+
+    async def test_send_email_uses_rendered_body(self):
+        with patch.object(email_service.get_mail(), "send_message",
+                          new_callable=AsyncMock) as send_message:
+            await send_email("deadpool@example.com", "deadpool",
+                             "http://test/")
+        message = send_message.call_args.args[0]
+        self.assertIn("Hi deadpool", message.body)
+        self.assertEqual(send_message.call_args.kwargs, {})
+
+    async def test_send_bulk_survives_failing_messages(self):
+        async def messages():
+            for i in range(20):
+                yield build_message(f"user{i}@example.com", "Subject",
+                                    VERIFY_EMAIL_TEMPLATE,
+                                    host="http://test/", username="x",
+                                    token="abc")
+
+        # Every sender meets a failure that isn't an SMTP ConnectionErrors
+        with patch.object(email_service.get_mail(), "send_message",
+                          new_callable=AsyncMock) as send_message:
+            send_message.side_effect = [ValueError("bad message")] * 2 + \
+                [None] * 18
+            sent = await asyncio.wait_for(
+                send_bulk(messages(), rate=1e6, concurrency=2), timeout=5)
+        self.assertEqual(sent, 18)
+        self.assertEqual(send_message.call_count, 20)
+
+    async def test_send_bulk_rejects_non_positive_rate(self):
+        async def messages():
+            return
+            yield
+
+        with self.assertRaises(ValueError):
+            await send_bulk(messages(), rate=0)
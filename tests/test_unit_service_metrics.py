@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.conf.config import config
+from src.database.instrumentation import instrument, RequestQueryStats, \
+    request_query_stats, fingerprint
+from src.services.metrics import Counter, DB_CONNECTIONS_IN_USE, \
+    DB_POOL_CHECKOUTS, Gauge, Histogram, Registry
+
+
+def test_counter_render():
+    counter = Counter("hits_total", "Hits.", ("result",))
+    counter.inc("hit")
+    counter.inc("hit")
+    counter.inc("miss")
+    assert counter.render() == [
+        "# HELP hits_total Hits.",
+        "# TYPE hits_total counter",
+        'hits_total{result="hit"} 2',
+        'hits_total{result="miss"} 1',
+    ]
+
+
+def test_gauge_track_inprogress():
+    gauge = Gauge("running", "Running.")
+    with gauge.track_inprogress():
+        assert gauge.value() == 1
+    assert gauge.value() == 0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    registry = Registry()
+    registry.register(histogram)
+    output = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{le="1.0"} 2' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in output
+    assert "latency_seconds_count 3" in output
+
+
+@pytest.mark.asyncio
+async def test_instrumented_engine_counts_request_queries():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument(engine)
+    stats = RequestQueryStats()
+    token = request_query_stats.set(stats)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+    finally:
+        request_query_stats.reset(token)
+        await engine.dispose()
+    assert stats.count == 2
+    assert stats.duration > 0
+
+
+@pytest.mark.asyncio
+async def test_instrumented_engine_counts_pool_checkouts():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument(engine)
+    checkouts = DB_POOL_CHECKOUTS.value()
+    in_use = DB_CONNECTIONS_IN_USE.value()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert DB_CONNECTIONS_IN_USE.value() == in_use + 1
+    finally:
+        await engine.dispose()
+    assert DB_POOL_CHECKOUTS.value() == checkouts + 1
+    assert DB_CONNECTIONS_IN_USE.value() == in_use
+
+
+def worker_registry(directory) -> tuple[Registry, Counter, Gauge, Histogram]:
+    registry = Registry(directory)
+    counter = registry.register(Counter("hits_total", "Hits.", ("result",)))
+    gauge = registry.register(Gauge("busy", "Busy."))
+    histogram = registry.register(Histogram("latency_seconds", "Latency.",
+                                            buckets=(1.0,)))
+    return registry, counter, gauge, histogram
+
+
+def test_registry_adds_up_worker_snapshots(tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", ""])
+    exited.wait()
+    # Snapshots of another live worker and of one that has exited
+    for pid in (os.getppid(), exited.pid):
+        other, counter, gauge, histogram = worker_registry(tmp_path)
+        counter.inc("hit", amount=2)
+        gauge.inc()
+        histogram.observe(0.5)
+        other.write_snapshot()
+        os.replace(tmp_path / f"{os.getpid()}.json", tmp_path / f"{pid}.json")
+
+    registry, counter, gauge, histogram = worker_registry(tmp_path)
+    counter.inc("hit")
+    counter.inc("miss")
+    gauge.inc()
+    histogram.observe(5.0)
+    output = registry.render()
+
+    assert 'hits_total{result="hit"} 5' in output
+    assert 'hits_total{result="miss"} 1' in output
+    # The exited worker's gauge no longer counts
+    assert "busy 2" in output
+    assert 'latency_seconds_bucket{le="1.0"} 2' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in output
+
+    local, counter, _, _ = worker_registry(None)
+    counter.inc("hit")
+    # Without a directory only this process's values are rendered
+    assert 'hits_total{result="hit"} 1' in local.render()
+
+
+def test_metrics_endpoint(client):
+    client.get("/api/contacts/abc")
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+    assert ('http_request_duration_seconds_count{method="GET",'
+            'route="/api/contacts/{contact_id}",status="401"}'
+            in response.text)
+    assert "user_cache_requests_total" in response.text
+
+
+def test_fingerprint_normalizes_values_and_in_lists():
+    statement = ("SELECT contacts.id FROM contacts\n  WHERE contacts.user_id = $1"
+                 " AND contacts.id IN ($2, $3, $4) AND email = 'a@b.com'"
+                 " LIMIT 10")
+    assert fingerprint(statement) == (
+        "SELECT contacts.id FROM contacts WHERE contacts.user_id = ?"
+        " AND contacts.id IN (?) AND email = ? LIMIT ?")
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logged_with_plan(monkeypatch, caplog):
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 0)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument(engine)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            with caplog.at_level(logging.WARNING, logger="sql.slow"):
+                await conn.execute(text("SELECT id FROM t WHERE id = :id"),
+                                   {"id": 1})
+    finally:
+        await engine.dispose()
+    records = [r for r in caplog.records if r.name == "sql.slow"
+               and r.fingerprint.startswith("SELECT")]
+    assert len(records) == 1
+    assert records[0].fingerprint == "SELECT id FROM t WHERE id = ?"
+    assert records[0].rows == 0
+    assert "SEARCH t" in records[0].plan
+
+
+@pytest.mark.asyncio
+async def test_slow_query_explained_on_its_own_connection(monkeypatch, caplog,
+                                                          tmp_path):
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 0)
+    # A single connection: EXPLAIN must not wait for a second one
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/slow.db",
+                                 pool_size=1, max_overflow=0, pool_timeout=1)
+    instrument(engine)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+            with caplog.at_level(logging.WARNING, logger="sql.slow"):
+                result = await conn.execute(
+                    text("SELECT id FROM t WHERE id = :id"), {"id": 1})
+            assert result.scalar() == 1
+        async with engine.connect() as conn:
+            # The transaction around the EXPLAIN was committed intact
+            assert (await conn.execute(text("SELECT count(*) FROM t"))
+                    ).scalar() == 1
+    finally:
+        await engine.dispose()
+    records = [r for r in caplog.records if r.name == "sql.slow"
+               and r.fingerprint.startswith("SELECT id")]
+    assert "SEARCH t" in records[0].plan
+
+
+def test_sql_profile_header(client, monkeypatch):
+    monkeypatch.setattr(config, "SQL_PROFILE_ENABLED", True)
+    response = client.get("/api/healthchecker", headers={"X-SQL-Profile": "1"})
+    assert response.status_code == 200, response.text
+    # The per-test transaction adds SAVEPOINT statements around the query
+    queries = [q for q in json.loads(response.headers["X-SQL-Profile"])
+               if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]
+    assert queries[0]["sql"] == "SELECT ?"
+    assert queries[0]["rows"] == 1
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_sql_profile_header_disabled(client):
+    response = client.get("/api/healthchecker", headers={"X-SQL-Profile": "1"})
+    assert response.status_code == 200, response.text
+    assert "X-SQL-Profile" not in response.headers
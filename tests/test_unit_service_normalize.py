@@ -0,0 +1,82 @@
+from src.services.normalize import blocking_keys, e164, email_key, \
+    latin_key, name_key, name_search_keys, phone_key, search_term, \
+    search_terms, sound_key
+
+
+def test_phone_key():
+    assert phone_key("+38 (050) 123-45-67") == "380501234567"
+    assert phone_key("0501234567") == "0501234567"
+    assert phone_key("n/a") is None
+    assert phone_key(None) is None
+
+
+def test_e164():
+    assert e164("0501234567") == "+380501234567"
+    assert e164("+38 (050) 123-45-67") == "+380501234567"
+    assert e164("00380501234567") == "+380501234567"
+    assert e164("501234567") == "+380501234567"
+    assert e164("0501234567", country_code="48") == "+48501234567"
+    assert e164("+1 202 555 0143") == "+12025550143"
+
+
+def test_e164_national_number_gets_default_country_code():
+    # Without a + or 00, 380... is a national number too
+    assert e164("380501234567") == "+380380501234567"
+    # A US number isn't mistaken for one with a country code (+20 is Egypt)
+    assert e164("2025550123", country_code="1", trunk_prefix="1") \
+        == "+12025550123"
+    assert e164("1 202 555 0123", country_code="1", trunk_prefix="1") \
+        == "+12025550123"
+    assert e164("+20 2 2555 0123", country_code="1") == "+20225550123"
+    assert e164("112") is None
+    assert e164("+0501234567") is None
+    assert e164(None) is None
+
+
+def test_email_key():
+    assert email_key("John.Doe+work@Example.com") == "john.doe"
+    assert email_key("JOHN.DOE@other.org") == "john.doe"
+    assert email_key("") is None
+
+
+def test_name_key():
+    assert name_key("John", "Doe") == name_key("doe", "JOHN") == "doe john"
+    assert name_key("Zoë", "Müller-Lüdenscheidt") == "ludenscheidt muller zoe"
+    assert name_key("", None) is None
+
+
+def test_search_terms():
+    assert search_terms("Zoë", "Mary-Ann", "Zoe.MA@Example.com") == {
+        ("first_name", "zoe"), ("last_name", "mary"), ("last_name", "ann"),
+        ("email", "zoe.ma@example.com")}
+    assert search_terms("", None, None) == set()
+    assert search_term("  Zoë ") == "zoe"
+
+
+def test_blocking_keys():
+    assert blocking_keys("John", "Doe", "john@example.com",
+                         "050-123-45-67") == {"phone_key": "0501234567",
+                                              "email_key": "john",
+                                              "name_key": "doe john"}
+
+
+def test_latin_key():
+    assert latin_key("Олена") == latin_key("OLENA") == "olena"
+    assert latin_key("Щербак") == "shcherbak"
+    assert latin_key("Мар'яна") == "mariana"
+    assert latin_key("Mary-Ann  Zoë") == "mary ann zoe"
+    assert latin_key("") is None
+
+
+def test_sound_key():
+    assert sound_key("Сергій") == sound_key("Sergey") == sound_key("Serhii")
+    assert sound_key("Олександр") == sound_key("Alexander")
+    assert sound_key("Олена") == sound_key("Elena")
+    assert sound_key("Тетяна") != sound_key("Олена")
+    assert sound_key(None) is None
+
+
+def test_name_search_keys():
+    assert name_search_keys("Олена", None) == {
+        "first_name_latin": "olena", "last_name_latin": None,
+        "first_name_sound": "ALN", "last_name_sound": None}
@@ -0,0 +1,62 @@
+import json
+from datetime import date, datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from src.entity.models import Contact, User
+from src.schemas.contact import ContactResponse
+from src.services.auth import auth_service
+from src.services.responses import model_response
+
+
+def make_contact(contact_id: int) -> Contact:
+    return Contact(id=contact_id, first_name="John", last_name="Doe",
+                   email=f"john{contact_id}@example.com",
+                   phone_number="1234567890", birthday=date(1990, 4, 7),
+                   created_at=datetime(2024, 1, 1, 12, 0),
+                   updated_at=None, user_id=1,
+                   user=User(id=1, username="deadpool",
+                             email="deadpool@example.com", password="hash"))
+
+
+def test_model_response_serializes_orm_objects():
+    adapter = TypeAdapter(list[ContactResponse])
+    contacts = [make_contact(1), make_contact(2)]
+
+    response = model_response(adapter, contacts, status_code=201)
+
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    expected = [ContactResponse.model_validate(c, from_attributes=True)
+                .model_dump(mode="json") for c in contacts]
+    assert json.loads(response.body) == expected
+    assert "user" not in json.loads(response.body)[0]
+
+
+def test_model_response_validates_content():
+    adapter = TypeAdapter(ContactResponse)
+    contact = make_contact(1)
+    contact.phone_number = "not a phone"
+
+    with pytest.raises(ValidationError):
+        model_response(adapter, contact)
+
+
+def test_get_contacts_returns_json_list(client, get_token):
+    contacts = [make_contact(i) for i in range(1, 4)]
+    with patch.object(auth_service, "cache") as redis_mock, \
+            patch("src.repository.contacts.get_contacts",
+                  AsyncMock(return_value=contacts)):
+        redis_mock.get.return_value = None
+        response = client.get("api/contacts",
+                              headers={"Authorization": f"Bearer {get_token}"})
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    data = response.json()
+    assert [c["id"] for c in data] == [1, 2, 3]
+    assert data[0]["birthday"] == "1990-04-07"
+    assert data[0]["created_at"] == "2024-01-01T12:00:00"
+    assert data[0]["updated_at"] is None
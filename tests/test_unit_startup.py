@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from main import app, lifespan
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.server import default_workers, serve
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFERRED_MODULES = ("fastapi_mail", "cloudinary", "passlib", "asyncpg")
+
+PROBE = """
+import json
+import sys
+import main
+from src.database.db import sessionmanager
+from src.services.auth import auth_service
+print(json.dumps({
+    "modules": sorted(sys.modules),
+    "engine": sessionmanager._engine is not None,
+    "auth": sorted(vars(auth_service)),
+}))
+"""
+
+
+def import_main() -> dict:
+    # A fresh interpreter, so modules the tests already imported don't count
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_main():
+    state = import_main()
+
+    deferred = [name for name in state["modules"]
+                if name.split(".")[0] in DEFERRED_MODULES]
+    assert deferred == []
+    assert state["engine"] is False
+    assert "cache" not in state["auth"]
+    assert "pwd_context" not in state["auth"]
+
+
+def test_default_workers(monkeypatch):
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 3)
+    assert default_workers() == 3
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", None)
+    assert default_workers() == (os.cpu_count() or 1)
+
+
+def test_serve_configures_uvicorn(monkeypatch):
+    monkeypatch.setattr(config, "GRACEFUL_SHUTDOWN_TIMEOUT", 7)
+    monkeypatch.setattr(config, "METRICS_DIR", "")
+    with patch("src.server.uvicorn.run") as run, patch.dict(os.environ):
+        serve(port=9000, workers=2)
+        # The workers share their metrics through a temporary directory
+        assert Path(os.environ["METRICS_DIR"]).is_dir()
+        os.rmdir(os.environ["METRICS_DIR"])
+    run.assert_called_once()
+    assert run.call_args.args == ("main:app",)
+    kwargs = run.call_args.kwargs
+    assert kwargs["port"] == 9000
+    assert kwargs["workers"] == 2
+    assert kwargs["timeout_graceful_shutdown"] == 7
+    assert kwargs["loop"] in ("uvloop", "asyncio")
+    assert kwargs["http"] in ("httptools", "h11")
+
+
+@pytest.mark.asyncio
+async def test_lifespan_closes_pools_on_shutdown():
+    redis_client = AsyncMock()
+    with patch("main.redis.Redis", AsyncMock(return_value=redis_client)), \
+            patch("main.FastAPILimiter.init", AsyncMock()) as limiter_init, \
+            patch.object(sessionmanager, "close", AsyncMock()) as db_close:
+        async with lifespan(app):
+            limiter_init.assert_awaited_once()
+            db_close.assert_not_awaited()
+    redis_client.close.assert_awaited_once()
+    db_close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_shares_metrics_with_other_workers(tmp_path):
+    with patch("main.redis.Redis", AsyncMock()), \
+            patch("main.FastAPILimiter.init", AsyncMock()), \
+            patch.object(sessionmanager, "close", AsyncMock()), \
+            patch("main.registry.directory", tmp_path / "metrics"):
+        async with lifespan(app):
+            assert (tmp_path / "metrics" / f"{os.getpid()}.json").is_file()
+    snapshot = json.loads(
+        (tmp_path / "metrics" / f"{os.getpid()}.json").read_text())
+    assert "http_request_duration_seconds" in snapshot